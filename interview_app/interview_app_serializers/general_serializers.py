@@ -1,23 +1,29 @@
-from django.db import models, transaction
+from django.db import transaction
 from django.utils import timezone
 from rest_framework import serializers, status
 from rest_framework.generics import get_object_or_404
 
 from admin_app.admin_app_serializers.general_serializers import PricePackSerializer
 from interview_app.models import Interview, Ticket
-from question_app import validators
-from question_app.models import Answer, AnswerSet, DropDownOption, SortOption, Option, FileQuestion, \
-    IntegerRangeQuestion, NumberAnswerQuestion, TextAnswerQuestion, DropDownQuestion, OptionalQuestion
+from question_app import answer_writer, validators
+from question_app.models import Answer, AnswerSet, FileQuestion, IntegerRangeQuestion, NumberAnswerQuestion, \
+    TextAnswerQuestion, DropDownQuestion, OptionalQuestion
 from interview_app.interview_app_serializers.question_serializers import NoGroupQuestionSerializer
 from question_app.validators import tag_remover
 from user_app.representors import represent_districts
 
 
+class AnswerListSerializer(serializers.ListSerializer):
+    def create(self, validated_data):
+        return answer_writer.save_answers(self.context.get('answer_set'), validated_data)
+
+
 class AnswerSerializer(serializers.ModelSerializer):
     class Meta:
         model = Answer
         fields = ('id', 'question', 'answer', 'file', 'answered_at')
         ref_name = 'interview_app_answer'
+        list_serializer_class = AnswerListSerializer
 
     def validate(self, data):
         question = data.get('question')
@@ -380,49 +386,7 @@ class AnswerSerializer(serializers.ModelSerializer):
         return data
 
     def create(self, validated_data):
-        OPTION_QUESTIONS = ['optional', 'sort', 'drop_down']
-        answer_set = self.context.get('answer_set')
-        question = validated_data.get('question')
-        question_type = question.question_type
-        answered_before = answer_set.answers.filter(question=question)
-        if answered_before.exists():
-            if question_type == 'file' and validated_data.get('file') is None:
-                if question.is_required:
-                    if answered_before.first().file:
-                        return answered_before.first()
-            answer_set.answers.filter(question=question).delete()
-        if question_type in OPTION_QUESTIONS and validated_data.get('answer') is not None:
-            match question_type:
-                case 'optional':
-                    answer = validated_data.pop('answer')
-                    selected_options = answer.get('selected_options')
-                    options = Option.objects.filter(id__in=selected_options)
-                    json_answer = {'selected_options': list(options.values('id', 'text'))}
-                    if question.optionalquestion.other_options:
-                        other_option = answer.get('other_text')
-                        if other_option is not None:
-                            json_answer['other_text'] = other_option
-                    return Answer.objects.create(answer_set=self.context.get('answer_set'), answer=json_answer,
-                                                 **validated_data)
-                case 'sort':
-                    answer = validated_data.pop('answer').get('sorted_options')
-                    ids = [item.get('id') for item in answer]
-                    placements = {item.get('id'): item.get('placement') for item in answer}
-                    options = SortOption.objects.filter(id__in=ids).order_by(models.Case(
-                        *[models.When(id=id_val, then=models.Value(order_val)) for id_val, order_val in
-                          placements.items()]))
-                    json_answer = {'sorted_options': list(options.values('id', 'text'))}
-                    return Answer.objects.create(answer_set=self.context.get('answer_set'), answer=json_answer,
-                                                 **validated_data)
-
-                case 'drop_down':
-                    answer = validated_data.pop('answer').get('selected_options')
-                    options = DropDownOption.objects.filter(id__in=answer)
-                    json_answer = {'selected_options': list(options.values('id', 'text'))}
-                    return Answer.objects.create(answer_set=self.context.get('answer_set'), answer=json_answer,
-                                                 **validated_data)
-        else:
-            return Answer.objects.create(answer_set=self.context.get('answer_set'), **validated_data)
+        return answer_writer.save_answers(self.context.get('answer_set'), [validated_data])[0]
 
     def to_representation(self, instance):
         result = super().to_representation(instance)
@@ -7,6 +7,7 @@ from porsline_config import settings
 from question_app.models import Questionnaire, NoAnswerQuestion, QuestionGroup, FileQuestion, LinkQuestion, \
     EmailFieldQuestion, PictureFieldQuestion, IntegerRangeQuestion, IntegerSelectiveQuestion, NumberAnswerQuestion, \
     TextAnswerQuestion, SortOption, SortQuestion, DropDownOption, Option, OptionalQuestion, Question, DropDownQuestion
+from question_app.question_app_serializers.question_serializers import QuestionListSerializer
 from question_app.validators import option_in_html_tag_validator, tag_remover
 
 
@@ -16,6 +17,7 @@ class QuestionSerializer(serializers.ModelSerializer):
     class Meta:
         model = Question
         fields = ('question',)
+        list_serializer_class = QuestionListSerializer
 
     def child_question(self, instance):
         """
@@ -56,6 +58,7 @@ class NoGroupQuestionSerializer(serializers.ModelSerializer):
     class Meta:
         model = Question
         fields = ('question',)
+        list_serializer_class = QuestionListSerializer
         ref_name = 'interview'
 
     def child_question(self, instance):
@@ -63,7 +66,7 @@ class NoGroupQuestionSerializer(serializers.ModelSerializer):
             Using serializers dynamically for each question type
         """
         question_type = instance.question_type
-        if instance.group is None:
+        if instance.group_id is None:
             if question_type == 'optional':
                 return OptionalQuestionSerializer(instance.optionalquestion, context=self.context).data
             elif question_type == 'drop_down':
@@ -16,8 +16,9 @@ from interview_app.interview_app_serializers.question_serializers import *
 from interview_app.models import Interview, Ticket
 from interview_app.permissions import IsQuestionOwnerOrReadOnly, InterviewOwnerOrInterviewerReadOnly, IsInterviewer, \
     InterviewOwnerOrInterviewerAddAnswer
-from porsline_config.paginators import MainPagination
+from porsline_config.paginators import MainPagination, AnswerSetPagination
 from question_app.copy_template import copy_template_interview
+from question_app.idempotency import idempotent
 from question_app.models import AnswerSet, Folder
 from result_app.filtersets import AnswerSetFilterSet
 from user_app.models import Profile
@@ -630,7 +631,7 @@ class AnswerSetViewSet(viewsets.mixins.CreateModelMixin,
     permission_classes = [InterviewOwnerOrInterviewerAddAnswer]
     filter_backends = (DjangoFilterBackend,)
     filterset_class = AnswerSetFilterSet
-    pagination_class = MainPagination
+    pagination_class = AnswerSetPagination
 
     @action(methods=['get'], detail=False,
             filter_backends=[DjangoFilterBackend], filterset_class=AnswerSetFilterSet)
@@ -732,6 +733,7 @@ class AnswerSetViewSet(viewsets.mixins.CreateModelMixin,
             return self.get_paginated_response(serializer.data)
 
     @action(methods=['post'], detail=True, url_path='add-answer')
+    @idempotent
     @transaction.atomic
     def add_answer(self, request, interview_uuid, pk):
         answer_set = self.get_object()
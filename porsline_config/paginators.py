@@ -1,4 +1,13 @@
+import binascii
+import json
+from base64 import b64decode, b64encode
+from datetime import datetime
+
+from django.db.models import Q, QuerySet
+from rest_framework.exceptions import NotFound
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 
 
 class MainPagination(PageNumberPagination):
@@ -24,4 +33,70 @@ class MainPagination(PageNumberPagination):
             except ValueError:
                 return self.page_size  # Return the default page size if page_size is not a valid integer
 
-        return self.page_size
\ No newline at end of file
+        return self.page_size
+
+
+class AnswerSetPagination(MainPagination):
+    """
+        Page number pagination that switches to keyset pagination on (answered_at, id) when the request
+        carries a cursor parameter, so deep pages skip COUNT(*) and OFFSET. Lists built in python keep page numbers.
+    """
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'نشانگر صفحه نامعتبر است'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.use_cursor = self.cursor_query_param in request.query_params and isinstance(queryset, QuerySet)
+        if not self.use_cursor:
+            return super().paginate_queryset(queryset, request, view)
+        self.request = request
+        page_size = self.get_page_size(request)
+        position = self.decode_cursor(request.query_params.get(self.cursor_query_param))
+        self.estimated_count = self.estimate_count(queryset) if position is None else None
+        queryset = queryset.order_by('answered_at', 'id')
+        if position is not None:
+            answered_at, pk = position
+            queryset = queryset.filter(Q(answered_at__gt=answered_at) | Q(answered_at=answered_at, id__gt=pk))
+        results = list(queryset[:page_size + 1])
+        self.has_next = len(results) > page_size
+        self.page = results[:page_size]
+        return self.page
+
+    def get_paginated_response(self, data):
+        if not self.use_cursor:
+            return super().get_paginated_response(data)
+        response = {'next': self.get_next_link(), 'results': data}
+        if self.estimated_count is not None:
+            response['estimated_count'] = self.estimated_count
+        return Response(response)
+
+    def get_next_link(self):
+        if not self.use_cursor:
+            return super().get_next_link()
+        if not self.has_next:
+            return None
+        last = self.page[-1]
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param,
+                                   self.encode_cursor(last.answered_at, last.id))
+
+    @staticmethod
+    def encode_cursor(answered_at, pk):
+        return b64encode(json.dumps([answered_at.isoformat(), pk]).encode()).decode()
+
+    def decode_cursor(self, cursor):
+        if not cursor:
+            return None
+        try:
+            answered_at, pk = json.loads(b64decode(cursor.encode(), validate=True))
+            answered_at = datetime.fromisoformat(answered_at)
+            pk = int(pk)
+        except (TypeError, ValueError, binascii.Error):
+            raise NotFound(self.invalid_cursor_message)
+        return answered_at, pk
+
+    @staticmethod
+    def estimate_count(queryset):
+        """
+            Row estimate of the PostgreSQL planner, which scales pg_class.reltuples by the filter selectivity
+        """
+        plan = json.loads(queryset.order_by().explain(format='json'))
+        return int(plan[0]['Plan']['Plan Rows'])
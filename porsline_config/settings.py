@@ -42,6 +42,7 @@ INSTALLED_APPS = [
     'wallet_app',
     'interview_app',
     'admin_app',
+    'result_app',
 
     'drf_yasg',
     'rest_framework',
@@ -167,9 +168,40 @@ SIMPLE_JWT = {
     'BLACKLIST_AFTER_ROTATION': False,
 }
 CELERY_BROKER_URL = 'redis://localhost:6379/1'
+CELERY_BEAT_SCHEDULE = {
+    'drain-answer-stream': {
+        'task': 'question_app.tasks.drain_answer_stream',
+        'schedule': 2.0,
+    },
+    'create-answer-partitions': {
+        'task': 'question_app.tasks.create_answer_partitions',
+        'schedule': 60 * 60 * 24,
+    },
+    'delete-abandoned-answer-sets': {
+        'task': 'question_app.tasks.delete_abandoned_answer_sets',
+        'schedule': 60 * 60,
+    },
+    'sync-questionnaire-exports': {
+        'task': 'question_app.tasks.sync_questionnaire_exports',
+        'schedule': 60.0,
+    },
+}
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': 'redis://localhost:6379/2',
+    }
+}
 
 AUTH_USER_MODEL = 'user_app.User'
 
+ANSWER_INGESTION = config('ANSWER_INGESTION', default=False, cast=bool)
+ANSWER_INGESTION_REDIS_URL = 'redis://localhost:6379/3'
+ANSWER_PARTITIONING = config('ANSWER_PARTITIONING', default=False, cast=bool)
+QUESTIONNAIRE_EXPORT = config('QUESTIONNAIRE_EXPORT', default=False, cast=bool)
+QUESTIONNAIRE_EXPORT_ROOT = os.path.join(MEDIA_ROOT, 'public-questionnaires')
+QUESTIONNAIRE_EXPORT_BASE_URL = config('QUESTIONNAIRE_EXPORT_BASE_URL', default='https://api.metriq.ir')
+
 OTP_LIFE_TIME = 2
 
 OTP_TRY_COUNT = 3
@@ -0,0 +1,25 @@
+import time
+
+from django.core.cache import cache
+from redis import RedisError
+
+
+def current(key):
+    """
+        Current value of a version counter, seeded from the clock so a lost key never reuses an old version
+    """
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump(key):
+    try:
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, time.time_ns(), timeout=None)
+    except RedisError:
+        pass
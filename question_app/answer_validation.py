@@ -0,0 +1,126 @@
+from functools import cached_property
+
+from question_app import snapshots
+from question_app.models import Question, Option
+from question_app.validators import tag_remover
+from result_app import caching
+
+OTHER_OPTION = 'سایر'
+NOTHING_OPTION = 'هیچ کدام'
+ALL_OPTIONS = 'همه گزینه ها'
+SUBTYPE_RELATIONS = ('optionalquestion', 'dropdownquestion', 'sortquestion', 'textanswerquestion',
+                     'numberanswerquestion', 'integerrangequestion', 'integerselectivequestion', 'filequestion')
+OPTION_RELATIONS = ('optionalquestion__options', 'dropdownquestion__options', 'sortquestion__options')
+
+
+def question_ids(items):
+    ids = set()
+    for item in items:
+        try:
+            ids.add(int(item.get('question')))
+        except (AttributeError, TypeError, ValueError):
+            pass
+    return ids
+
+
+def load_questions(questions):
+    return questions.select_related(*SUBTYPE_RELATIONS).prefetch_related(*OPTION_RELATIONS).in_bulk()
+
+
+def questionnaire_questions(questionnaire):
+    """
+        Validation metadata of every question of the questionnaire, cached for its structure version, which answers do
+        not bump
+    """
+    return caching.cached(questionnaire.uuid, 'answer-metadata',
+                          lambda: load_questions(Question.objects.filter(questionnaire=questionnaire)),
+                          version=snapshots.structure_version)
+
+
+def compile_bate_rules(questionnaire):
+    """
+        {question_id: {option_id: number}} of the bate questions, whose answers must all pick options of one number
+    """
+    if not questionnaire.bate_questions:
+        return {}
+    rules = {question_id: {} for question_id in questionnaire.bate_questions}
+    for option_id, question_id, number in Option.objects.filter(
+            optional_question_id__in=questionnaire.bate_questions).values_list('id', 'optional_question_id', 'number'):
+        rules[question_id][option_id] = number
+    return rules
+
+
+def bate_rules(questionnaire):
+    return caching.cached(questionnaire.uuid, 'bate-rules', lambda: compile_bate_rules(questionnaire),
+                          version=snapshots.structure_version)
+
+
+class AnswerValidationContext:
+    """
+        Everything the validation of one add-answer submission needs, loaded up front in a constant number of queries
+    """
+
+    def __init__(self, answer_set, ids, questions=None):
+        self.answer_set = answer_set
+        if questions is None:
+            self.questions = load_questions(Question.objects.filter(id__in=ids))
+        else:
+            self.questions = {question_id: questions[question_id] for question_id in ids if question_id in questions}
+        self.option_ids = {}
+        self.option_labels = {}
+        for question in self.questions.values():
+            options = self.options_of(question)
+            if options is None:
+                continue
+            self.option_ids[question.id] = {option.id for option in options}
+            self.option_labels[question.id] = {option.id: tag_remover(option.text) for option in options}
+
+    @classmethod
+    def cached(cls, answer_set, ids):
+        return cls(answer_set, ids, questionnaire_questions(answer_set.questionnaire))
+
+    @staticmethod
+    def options_of(question):
+        match question.question_type:
+            case 'optional':
+                return list(question.optionalquestion.options.all())
+            case 'drop_down':
+                return list(question.dropdownquestion.options.all())
+            case 'sort':
+                return list(question.sortquestion.options.all())
+        return None
+
+    def has_other_option(self, question_id):
+        return OTHER_OPTION in self.option_labels.get(question_id, {}).values()
+
+    def option_label(self, question_id, option_id):
+        return self.option_labels.get(question_id, {}).get(option_id)
+
+    @cached_property
+    def answered_question_ids(self):
+        if self.answer_set.pk is None:
+            return set()
+        return set(self.answer_set.answers.values_list('question_id', flat=True))
+
+    def bates_agree(self, items):
+        """
+            Checks the bate questions of a validated submission before anything is written. Bate questions that are
+            not part of the submission are read from the answers saved earlier.
+        """
+        rules = bate_rules(self.answer_set.questionnaire)
+        if not rules:
+            return True
+        numbers = set()
+        submitted = set()
+        for item in items:
+            question = item['question']
+            if question.id in rules:
+                submitted.add(question.id)
+                for option_id in (item.get('answer') or {}).get('selected_options') or []:
+                    numbers.add(rules[question.id].get(option_id))
+        earlier = rules.keys() - submitted
+        if earlier:
+            for question_id, option_ids in self.answer_set.answers.filter(question_id__in=earlier).values_list(
+                    'question_id', 'option_ids'):
+                numbers.update(rules[question_id].get(option_id) for option_id in option_ids)
+        return len(numbers) <= 1
@@ -0,0 +1,87 @@
+from question_app import counters
+from question_app.models import Answer, Option, DropDownOption, SortOption, OptionalQuestion
+from result_app import caching, rollups
+
+
+def option_rows(model, ids, fields):
+    if not ids:
+        return {}
+    return {row['id']: row for row in model.objects.filter(id__in=ids).values(*fields)}
+
+
+def sorted_ids(sorted_options):
+    placements = {item.get('id'): item.get('placement') for item in sorted_options}
+    return sorted(placements, key=lambda option_id: (placements[option_id] is None, placements[option_id] or 0))
+
+
+def save_answers(answer_set, items):
+    """
+        Writes a validated add-answer submission with one delete, one lookup per option table and one bulk insert
+    """
+    items = list({item['question'].id: item for item in items}.values())
+    existing = list(answer_set.answers.filter(question_id__in=[item['question'].id for item in items]).select_related(
+        'question'))
+    was_empty = not existing and not answer_set.answers.exists()
+    existing_by_question = {}
+    for answer in existing:
+        existing_by_question.setdefault(answer.question_id, []).append(answer)
+
+    selected = {'optional': set(), 'drop_down': set(), 'sort': set()}
+    other_texts = set()
+    for item in items:
+        question_type = item['question'].question_type
+        body = item.get('answer')
+        if question_type in selected and body is not None:
+            if question_type == 'sort':
+                selected['sort'].update(option.get('id') for option in body.get('sorted_options') or [])
+            else:
+                selected[question_type].update(body.get('selected_options') or [])
+            if question_type == 'optional' and body.get('other_text') is not None:
+                other_texts.add(item['question'].id)
+    if other_texts:
+        other_texts = set(OptionalQuestion.objects.filter(id__in=other_texts, other_options=True).values_list(
+            'id', flat=True))
+    options = option_rows(Option, selected['optional'], ('id', 'text', 'number'))
+    drop_down_options = option_rows(DropDownOption, selected['drop_down'], ('id', 'text'))
+    sort_options = option_rows(SortOption, selected['sort'], ('id', 'text'))
+
+    kept, created = [], []
+    for item in items:
+        question = item['question']
+        previous = existing_by_question.get(question.id, [])
+        if question.question_type == 'file' and item.get('file') is None and question.is_required and previous and \
+                previous[0].file:
+            kept.append(previous[0])
+            continue
+        data = dict(item)
+        body = data.get('answer')
+        if body is not None:
+            match question.question_type:
+                case 'optional':
+                    data['answer'] = {'selected_options': [
+                        options[option_id] for option_id in sorted(set(body.get('selected_options') or []))
+                        if option_id in options]}
+                    if question.id in other_texts:
+                        data['answer']['other_text'] = body.get('other_text')
+                case 'drop_down':
+                    data['answer'] = {'selected_options': [
+                        drop_down_options[option_id] for option_id in sorted(set(body.get('selected_options') or []))
+                        if option_id in drop_down_options]}
+                case 'sort':
+                    data['answer'] = {'sorted_options': [
+                        sort_options[option_id] for option_id in sorted_ids(body.get('sorted_options') or [])
+                        if option_id in sort_options]}
+        answer = Answer(answer_set=answer_set, **data)
+        answer.fill_shadow_fields()
+        created.append(answer)
+
+    kept_ids = {answer.id for answer in kept}
+    superseded = [answer for answer in existing if answer.id not in kept_ids]
+    if superseded:
+        Answer.objects.filter(id__in=[answer.id for answer in superseded]).delete()
+    Answer.objects.bulk_create(created)
+    if was_empty and (kept or created):
+        counters.add(answer_set.questionnaire_id, answer_count=1)
+    rollups.replace_answers(superseded, created)
+    caching.bump_data_version(answer_set.questionnaire.uuid)
+    return kept + created
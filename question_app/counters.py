@@ -0,0 +1,51 @@
+from django.db.models import F, Exists, OuterRef, Subquery, Count, IntegerField
+from django.db.models.functions import Coalesce, Greatest
+
+from question_app.models import Questionnaire, Question, AnswerSet, Answer
+
+
+def add(questionnaire_id, **counts):
+    """
+        Moves the counters of the questionnaire with a single UPDATE ... SET count = count + n. Decrements stop at 0,
+        so a counter that drifted never breaks a delete; reconcile() corrects it.
+    """
+    counts = {name: F(name) + count if count > 0 else Greatest(F(name) + count, 0)
+              for name, count in counts.items() if count}
+    if counts:
+        Questionnaire.objects.filter(pk=questionnaire_id).update(**counts)
+
+
+def answered_sets():
+    return AnswerSet.objects.filter(Exists(Answer.objects.filter(answer_set=OuterRef('pk'))))
+
+
+def empty_sets():
+    return AnswerSet.objects.exclude(Exists(Answer.objects.filter(answer_set=OuterRef('pk'))))
+
+
+def sets_emptied_by(question):
+    """
+        Answer sets whose only answers belong to the question, so deleting it leaves them without answers
+    """
+    return answered_sets().filter(questionnaire_id=question.questionnaire_id).exclude(
+        Exists(Answer.objects.filter(answer_set=OuterRef('pk')).exclude(question_id=question.pk)))
+
+
+def count_of(queryset):
+    return Coalesce(Subquery(
+        queryset.filter(questionnaire=OuterRef('pk')).order_by().values('questionnaire').annotate(
+            count=Count('pk')).values('count'), output_field=IntegerField()), 0)
+
+
+def reconcile(questionnaires=None):
+    """
+        Recounts the counters from the answer set and question tables in one UPDATE and returns the number of
+        questionnaires whose counters had drifted
+    """
+    questionnaires = Questionnaire.objects.all() if questionnaires is None else questionnaires
+    answer_count = count_of(answered_sets())
+    question_count = count_of(Question.objects.all())
+    drifted = questionnaires.annotate(actual_answer_count=answer_count, actual_question_count=question_count).exclude(
+        answer_count=F('actual_answer_count'), question_count=F('actual_question_count')).values('pk')
+    return Questionnaire.objects.filter(pk__in=Subquery(drifted)).update(answer_count=answer_count,
+                                                                         question_count=question_count)
@@ -0,0 +1,112 @@
+import hashlib
+import json
+from datetime import timedelta
+from functools import wraps
+
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError
+from django.utils import timezone
+from redis import RedisError
+from rest_framework import status
+from rest_framework.response import Response
+
+from question_app.models import IdempotencyRecord
+
+HEADER = 'Idempotency-Key'
+REPLAY_HEADER = 'Idempotent-Replayed'
+MAX_KEY_LENGTH = 255
+RESPONSE_TIMEOUT = 60 * 60 * 24
+LOCK_TIMEOUT = 60
+
+
+def scope_key(request, key):
+    """
+        The client key scoped to the caller and the endpoint, so two users can not replay each other's responses
+    """
+    caller = request.user.pk if request.user.is_authenticated else 'anonymous'
+    return hashlib.sha256(f'{caller}:{request.method}:{request.path}:{key}'.encode()).hexdigest()
+
+
+def fingerprint(request):
+    return hashlib.sha256(json.dumps(request.data, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def stored_response(scope):
+    try:
+        return cache.get(f'idempotency:{scope}')
+    except RedisError:
+        record = IdempotencyRecord.objects.filter(
+            key=scope, status_code__isnull=False,
+            created_at__gte=timezone.now() - timedelta(seconds=RESPONSE_TIMEOUT)).first()
+        if record is not None:
+            return {'fingerprint': record.fingerprint, 'status': record.status_code, 'data': record.data}
+    return None
+
+
+def acquire(scope, request_fingerprint):
+    try:
+        return cache.add(f'idempotency:{scope}:lock', 1, timeout=LOCK_TIMEOUT)
+    except RedisError:
+        IdempotencyRecord.objects.filter(
+            key=scope, created_at__lt=timezone.now() - timedelta(seconds=RESPONSE_TIMEOUT)).delete()
+        try:
+            IdempotencyRecord.objects.create(key=scope, fingerprint=request_fingerprint)
+        except IntegrityError:
+            return False
+        return True
+
+
+def release(scope):
+    try:
+        cache.delete(f'idempotency:{scope}:lock')
+    except RedisError:
+        IdempotencyRecord.objects.filter(key=scope, status_code__isnull=True).delete()
+
+
+def store(scope, request_fingerprint, response):
+    data = json.loads(json.dumps(response.data, cls=DjangoJSONEncoder))
+    try:
+        cache.set(f'idempotency:{scope}', {'fingerprint': request_fingerprint, 'status': response.status_code,
+                                            'data': data}, timeout=RESPONSE_TIMEOUT)
+    except RedisError:
+        IdempotencyRecord.objects.update_or_create(key=scope, defaults={
+            'fingerprint': request_fingerprint, 'status_code': response.status_code, 'data': data})
+
+
+def idempotent(view):
+    """
+        Replays the response of the first successful request made with the same Idempotency-Key header instead of
+        running the view again. Responses live in redis and fall back to IdempotencyRecord rows when redis is down.
+    """
+
+    @wraps(view)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if not key:
+            return view(self, request, *args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return Response({'message': 'کلید یکتایی درخواست بیش از حد طولانی است'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        scope = scope_key(request, key)
+        request_fingerprint = fingerprint(request)
+        stored = stored_response(scope)
+        if stored is None:
+            if not acquire(scope, request_fingerprint):
+                return Response({'message': 'درخواست دیگری با همین کلید در حال پردازش است'},
+                                status=status.HTTP_409_CONFLICT)
+            try:
+                stored = stored_response(scope)
+                if stored is None:
+                    response = view(self, request, *args, **kwargs)
+                    if status.is_success(response.status_code):
+                        store(scope, request_fingerprint, response)
+                    return response
+            finally:
+                release(scope)
+        if stored['fingerprint'] != request_fingerprint:
+            return Response({'message': 'این کلید یکتایی قبلا برای درخواست دیگری استفاده شده است'},
+                            status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+        return Response(stored['data'], status=stored['status'], headers={REPLAY_HEADER: 'true'})
+
+    return wrapper
@@ -0,0 +1,144 @@
+import datetime
+import json
+import logging
+import uuid
+
+import redis
+from django.conf import settings
+from django.db import transaction
+
+from question_app.models import AnswerSet, AnswerReceipt
+from question_app.question_app_serializers.answer_serializers import AnswerSerializer
+
+STREAM = 'answers:ingestion'
+GROUP = 'answers:writers'
+PENDING = 'pending'
+BATCH_SIZE = 200
+BLOCK_MILLISECONDS = 1000
+CLAIM_IDLE_MILLISECONDS = 60 * 1000
+RECEIPT_TIMEOUT = 60 * 60 * 24
+MAX_DELIVERIES = 5
+GIVE_UP_ERRORS = {'message': 'ثبت پاسخ ها با خطا مواجه شد، لطفا دوباره ارسال کنید'}
+
+logger = logging.getLogger(__name__)
+
+
+def enabled():
+    return settings.ANSWER_INGESTION
+
+
+def client():
+    return redis.Redis.from_url(settings.ANSWER_INGESTION_REDIS_URL, decode_responses=True)
+
+
+def receipt_key(receipt):
+    return f'answers:receipt:{receipt}'
+
+
+def enqueue(answer_set, data, connection=None):
+    """
+        Appends an add-answer submission that passed validation to the stream and returns its receipt
+    """
+    connection = connection or client()
+    receipt = str(uuid.uuid4())
+    connection.set(receipt_key(receipt), answer_set.id, ex=RECEIPT_TIMEOUT)
+    connection.xadd(STREAM, {
+        'receipt': receipt,
+        'answer_set': answer_set.id,
+        'submitted_at': datetime.datetime.now().isoformat(),
+        'payload': json.dumps(data),
+    })
+    return receipt
+
+
+def receipt_status(answer_set, receipt, connection=None):
+    """
+        done or failed once the consumer has handled the submission, pending while it waits in the stream and None for
+        unknown receipts
+    """
+    stored = AnswerReceipt.objects.filter(answer_set=answer_set, receipt=receipt).first()
+    if stored is not None:
+        return {'receipt': receipt, 'status': stored.status, 'errors': stored.errors}
+    connection = connection or client()
+    if connection.get(receipt_key(receipt)) == str(answer_set.id):
+        return {'receipt': receipt, 'status': PENDING, 'errors': None}
+    return None
+
+
+def persist(fields):
+    """
+        Writes one submission from the stream. A receipt that was already handled is skipped, so redelivered
+        messages are harmless.
+    """
+    receipt = fields['receipt']
+    with transaction.atomic():
+        answer_set = AnswerSet.objects.select_related('questionnaire').filter(id=fields['answer_set']).first()
+        if answer_set is None or AnswerReceipt.objects.filter(receipt=receipt).exists():
+            return
+        answers = AnswerSerializer(data=json.loads(fields['payload']), many=True, context={
+            'answer_set': answer_set,
+            'submitted_at': datetime.datetime.fromisoformat(fields['submitted_at']),
+        })
+        if answers.is_valid():
+            answers.save()
+            AnswerReceipt.objects.create(receipt=receipt, answer_set=answer_set)
+        else:
+            AnswerReceipt.objects.create(receipt=receipt, answer_set=answer_set, status=AnswerReceipt.FAILED,
+                                         errors=answers.errors)
+
+
+def ensure_group(connection):
+    try:
+        connection.xgroup_create(STREAM, GROUP, id='0', mkstream=True)
+    except redis.ResponseError as error:
+        if 'BUSYGROUP' not in str(error):
+            raise
+
+
+def deliveries(connection, message_id):
+    pending = connection.xpending_range(STREAM, GROUP, min=message_id, max=message_id, count=1)
+    return pending[0]['times_delivered'] if pending else 1
+
+
+def give_up(fields):
+    """
+        Records a submission that kept failing as a failed receipt, so its message can be acknowledged
+    """
+    if AnswerSet.objects.filter(id=fields['answer_set']).exists():
+        AnswerReceipt.objects.get_or_create(receipt=fields['receipt'], defaults={
+            'answer_set_id': fields['answer_set'], 'status': AnswerReceipt.FAILED, 'errors': GIVE_UP_ERRORS})
+
+
+def drain(consumer, connection=None, batch_size=BATCH_SIZE):
+    """
+        Persists one batch of the stream and returns the number of messages it read. Messages left unacknowledged, by
+        a consumer that died or by a write that failed, are claimed again once they have been idle for
+        CLAIM_IDLE_MILLISECONDS. After MAX_DELIVERIES failed attempts a message gets a failed receipt and is acknowledged,
+        so it cannot hold back the messages after it.
+    """
+    connection = connection or client()
+    ensure_group(connection)
+    _, messages, *_ = connection.xautoclaim(STREAM, GROUP, consumer, CLAIM_IDLE_MILLISECONDS, count=batch_size)
+    if not messages:
+        for _, stream_messages in connection.xreadgroup(GROUP, consumer, {STREAM: '>'}, count=batch_size,
+                                                        block=BLOCK_MILLISECONDS) or []:
+            messages = stream_messages
+    handled = []
+    for message_id, fields in messages:
+        if fields:
+            try:
+                persist(fields)
+            except Exception:
+                logger.exception('answer stream message %s failed', message_id)
+                if deliveries(connection, message_id) < MAX_DELIVERIES:
+                    continue
+                try:
+                    give_up(fields)
+                except Exception:
+                    logger.exception('answer stream message %s could not be marked as failed', message_id)
+                    continue
+        handled.append(message_id)
+    if handled:
+        connection.xack(STREAM, GROUP, *handled)
+        connection.xdel(STREAM, *handled)
+    return len(messages)
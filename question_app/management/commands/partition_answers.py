@@ -0,0 +1,48 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from question_app import partitioning
+
+
+class Command(BaseCommand):
+    help = 'Converts the answer table to monthly partitions on answered_at, creates the partitions of the coming ' \
+           'months and detaches, archives or drops old ones'
+
+    def add_arguments(self, parser):
+        parser.add_argument('action', choices=['convert', 'create', 'detach'])
+        parser.add_argument('--months-ahead', type=int, default=partitioning.DEFAULT_MONTHS_AHEAD,
+                            help='How many months after the current one get a partition')
+        parser.add_argument('--before', default=None,
+                            help='detach: partitions of months before this YYYY-MM month are detached')
+        parser.add_argument('--drop', action='store_true', help='detach: drop the detached partitions')
+        parser.add_argument('--archive-schema', default=None,
+                            help='detach: move the detached partitions to this schema')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('Answer partitioning needs PostgreSQL')
+        match options.get('action'):
+            case 'convert':
+                if partitioning.convert(options.get('months_ahead')):
+                    self.stdout.write(self.style.SUCCESS('Answer table converted to monthly partitions'))
+                else:
+                    self.stdout.write('Answer table is already partitioned')
+            case 'create':
+                with connection.cursor() as cursor:
+                    if not partitioning.is_partitioned(cursor):
+                        raise CommandError('Answer table is not partitioned, run the convert action first')
+                    partitioning.create_future_partitions(cursor, options.get('months_ahead'))
+                self.stdout.write(self.style.SUCCESS('Answer partitions are in place'))
+            case 'detach':
+                if not options.get('before'):
+                    raise CommandError('detach needs --before YYYY-MM')
+                try:
+                    month = datetime.datetime.strptime(options.get('before'), '%Y-%m').date()
+                except ValueError:
+                    raise CommandError('--before must look like YYYY-MM')
+                if options.get('drop') and options.get('archive_schema'):
+                    raise CommandError('Use either --drop or --archive-schema')
+                detached = partitioning.detach_before(month, options.get('drop'), options.get('archive_schema'))
+                self.stdout.write(self.style.SUCCESS(f'{len(detached)} partitions detached: {", ".join(detached)}'))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from question_app import counters
+from question_app.models import Questionnaire
+
+
+class Command(BaseCommand):
+    help = 'Recounts the answer_count and question_count columns of questionnaires and fixes the ones that drifted'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--questionnaire', dest='questionnaire_uuid', default=None,
+                            help='Only reconcile the questionnaire with this uuid')
+
+    def handle(self, *args, **options):
+        questionnaires = Questionnaire.objects.all()
+        if options.get('questionnaire_uuid'):
+            questionnaires = questionnaires.filter(uuid=options.get('questionnaire_uuid'))
+        fixed = counters.reconcile(questionnaires)
+        self.stdout.write(self.style.SUCCESS(f'{fixed} questionnaire counters reconciled'))
@@ -2,6 +2,7 @@ from uuid import uuid4
 from django.core.validators import FileExtensionValidator
 from django.core.exceptions import ValidationError
 from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
 from django.db import models
 
 from admin_app.models import PricePack
@@ -39,12 +40,26 @@ class Questionnaire(models.Model):
                                    related_name='interviews', null=True, blank=True)
     category = models.ForeignKey('Category', on_delete=models.PROTECT, null=True, blank=True)
     is_template = models.BooleanField(default=False, verbose_name='قالب/غیرقالب')
+    answer_count = models.PositiveIntegerField(default=0, editable=False, verbose_name='تعداد پاسخ ها')
+    question_count = models.PositiveIntegerField(default=0, editable=False, verbose_name='تعداد سوال ها')
+
+    COUNTER_FIELDS = ('answer_count', 'question_count')
 
     class Meta:
         ordering = ['-created_at']
 
     def __str__(self):
         return self.name
+
+    def save(self, *args, **kwargs):
+        """
+            Counters are only changed with F() updates, so saving an instance never writes back counts it read earlier
+        """
+        if not self._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            kwargs['update_fields'] = [field.name for field in self._meta.concrete_fields
+                                       if not field.primary_key and field.name not in self.COUNTER_FIELDS]
+        super().save(*args, **kwargs)
+
     @property
     def to_dict(self):
         return {
@@ -519,6 +534,10 @@ class FileQuestion(Question):
     max_volume = models.PositiveIntegerField(default=30, verbose_name='حداکثر حجم')
     volume_unit = models.CharField(max_length=3, default=mega_byte, choices=UNIT_CHOICES, verbose_name='واحد حجم')
 
+    @property
+    def max_bytes(self):
+        return self.max_volume * (1024 if self.volume_unit == self.kilo_byte else 1024 * 1024)
+
     @property
     def to_dict(self):
         return {
@@ -552,10 +571,41 @@ class AnswerSet(models.Model):
     answered_by = models.ForeignKey(Profile, on_delete=models.SET_NULL, related_name='answer_sets', null=True,
                                     blank=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['questionnaire', 'answered_at', 'id'], name='answer_set_keyset'),
+        ]
+
     def __str__(self):
         return f'{self.questionnaire} - AnswerSet'
 
 
+class FileUpload(models.Model):
+    """
+        A file answer uploaded in chunks. The answer references it by id once every byte has arrived.
+    """
+    UPLOADING = 'uploading'
+    COMPLETED = 'completed'
+    STATUSES = (
+        (UPLOADING, 'در حال بارگذاری'),
+        (COMPLETED, 'کامل شده'),
+    )
+    id = models.UUIDField(primary_key=True, default=uuid4, editable=False)
+    answer_set = models.ForeignKey(AnswerSet, on_delete=models.CASCADE, related_name='uploads',
+                                   verbose_name='دسته جواب')
+    question = models.ForeignKey(FileQuestion, on_delete=models.CASCADE, related_name='uploads', verbose_name='سوال')
+    file_name = models.CharField(max_length=255, verbose_name='نام فایل')
+    size = models.PositiveBigIntegerField(verbose_name='حجم')
+    received = models.PositiveBigIntegerField(default=0, verbose_name='حجم دریافت شده')
+    file = models.FileField(upload_to='answer_file/%Y/%m/%d', verbose_name='فایل')
+    status = models.CharField(max_length=10, choices=STATUSES, default=UPLOADING, verbose_name='وضعیت')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='زمان شروع')
+    completed_at = models.DateTimeField(null=True, blank=True, verbose_name='زمان اتمام')
+
+    def __str__(self):
+        return f'{self.answer_set} - {self.file_name}'
+
+
 class Answer(models.Model):
     LEVEL_CHOICES = (
         (0, 'تعیین نشده'),
@@ -568,13 +618,102 @@ class Answer(models.Model):
                                    verbose_name='دسته جواب')
     answer = models.JSONField(verbose_name='جواب', null=True, blank=True)
     file = models.FileField(upload_to='answer_file/%Y/%m/%d', null=True, blank=True, verbose_name='فایل')
+    upload = models.ForeignKey(FileUpload, on_delete=models.SET_NULL, null=True, blank=True, related_name='answers',
+                               verbose_name='بارگذاری')
     answered_at = models.DateTimeField(auto_now_add=True, verbose_name='زمان پاسخگویی')
     level = models.PositiveIntegerField(default=0, choices=LEVEL_CHOICES, verbose_name='سطح')
+    search_text = models.TextField(default='', blank=True, editable=False, verbose_name='متن قابل جستجو')
+    numeric_value = models.FloatField(null=True, blank=True, editable=False, db_index=True,
+                                      verbose_name='مقدار عددی')
+    text_value = models.TextField(null=True, blank=True, editable=False, verbose_name='مقدار متنی')
+    option_ids = ArrayField(models.BigIntegerField(), default=list, blank=True, editable=False,
+                            verbose_name='شناسه گزینه ها')
+
+    SHADOW_FIELDS = ('search_text', 'numeric_value', 'text_value', 'option_ids')
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=['search_text'], opclasses=['gin_trgm_ops'], name='answer_search_text_trgm'),
+            GinIndex(fields=['option_ids'], name='answer_option_ids'),
+            models.Index(fields=['question', 'numeric_value'], name='answer_question_numeric'),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.fill_shadow_fields()
+        super(Answer, self).save(*args, **kwargs)
+
+    def fill_shadow_fields(self):
+        """
+            Denormalizes the answer body into the typed search_text, numeric_value, text_value and option_ids columns.
+            option_ids of a sort answer keeps the ranking order.
+        """
+        question_type = self.question.question_type
+        body = self.answer if isinstance(self.answer, dict) else {}
+        texts = []
+        self.numeric_value = None
+        self.text_value = None
+        self.option_ids = []
+        match question_type:
+            case 'text_answer' | 'email_field' | 'link':
+                if body.get(question_type) is not None:
+                    self.text_value = str(body.get(question_type))
+                texts.append(self.text_value)
+            case 'number_answer' | 'integer_range' | 'integer_selective':
+                value = body.get(question_type)
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    self.numeric_value = value
+            case 'optional' | 'drop_down':
+                options = [option for option in body.get('selected_options') or [] if isinstance(option, dict)]
+                self.option_ids = [option.get('id') for option in options if isinstance(option.get('id'), int)]
+                if body.get('other_text') is not None:
+                    self.text_value = str(body.get('other_text'))
+                texts.extend(option.get('text') for option in options)
+                texts.append(self.text_value)
+            case 'sort':
+                options = [option for option in body.get('sorted_options') or [] if isinstance(option, dict)]
+                self.option_ids = [option.get('id') for option in options if isinstance(option.get('id'), int)]
+                texts.extend(option.get('text') for option in options)
+        self.search_text = '\n'.join(str(text) for text in texts if text).lower()
 
     def __str__(self):
         return f'{self.answer_set} - {self.question}'
 
 
+class AnswerReceipt(models.Model):
+    """
+        Outcome of an add-answer submission accepted through the ingestion stream, also used to drop redeliveries
+    """
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (DONE, 'ثبت شده'),
+        (FAILED, 'ناموفق'),
+    )
+    receipt = models.UUIDField(unique=True, verbose_name='رسید')
+    answer_set = models.ForeignKey(AnswerSet, on_delete=models.CASCADE, related_name='receipts',
+                                   verbose_name='دسته جواب')
+    status = models.CharField(max_length=10, choices=STATUSES, default=DONE, verbose_name='وضعیت')
+    errors = models.JSONField(null=True, blank=True, verbose_name='خطاها')
+    processed_at = models.DateTimeField(auto_now_add=True, verbose_name='زمان ثبت')
+
+    def __str__(self):
+        return f'{self.answer_set} - {self.receipt}'
+
+
+class IdempotencyRecord(models.Model):
+    """
+        Response of a request made with an Idempotency-Key header, kept in the database while redis is unavailable
+    """
+    key = models.CharField(max_length=64, unique=True, verbose_name='کلید')
+    fingerprint = models.CharField(max_length=64, verbose_name='اثر انگشت درخواست')
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True, verbose_name='کد وضعیت')
+    data = models.JSONField(null=True, blank=True, verbose_name='پاسخ')
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='زمان ایجاد')
+
+    def __str__(self):
+        return self.key
+
+
 class QuestionGroup(Question):
     URL_PREFIX = 'question-groups'
 
@@ -0,0 +1,150 @@
+import datetime
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from question_app.models import Answer
+
+DEFAULT_MONTHS_AHEAD = 3
+
+
+def table_name():
+    return Answer._meta.db_table
+
+
+def partition_name(month):
+    return f'{table_name()}_{month:%Y_%m}'
+
+
+def month_start(value):
+    return datetime.date(value.year, value.month, 1)
+
+
+def add_months(month, count):
+    year, month_index = divmod(month.year * 12 + month.month - 1 + count, 12)
+    return datetime.date(year, month_index + 1, 1)
+
+
+def is_partitioned(cursor):
+    cursor.execute('SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)', [table_name()])
+    row = cursor.fetchone()
+    return row is not None and row[0] == 'p'
+
+
+def partitions(cursor):
+    """
+        [(partition name, first month)] of the attached monthly partitions, oldest first
+    """
+    cursor.execute('''
+        SELECT child.relname
+        FROM pg_inherits
+        JOIN pg_class AS child ON child.oid = pg_inherits.inhrelid
+        WHERE pg_inherits.inhparent = to_regclass(%s)
+        ORDER BY child.relname
+    ''', [table_name()])
+    result = []
+    for name, in cursor.fetchall():
+        try:
+            result.append((name, datetime.datetime.strptime(name[-7:], '%Y_%m').date()))
+        except ValueError:
+            pass
+    return result
+
+
+def attached_since(cursor):
+    """
+        Start of the oldest attached monthly partition as an aware datetime, None when the answer table is not
+        partitioned. Answers of earlier answer sets may live in detached partitions.
+    """
+    if not is_partitioned(cursor):
+        return None
+    months = [first_month for _, first_month in partitions(cursor)]
+    if not months:
+        return None
+    return datetime.datetime.combine(min(months), datetime.time.min, tzinfo=datetime.timezone.utc)
+
+
+def create_partition(cursor, month):
+    quote = connection.ops.quote_name
+    cursor.execute(f'CREATE TABLE IF NOT EXISTS {quote(partition_name(month))} PARTITION OF {quote(table_name())} '
+                   f'FOR VALUES FROM (%s) TO (%s)', [month, add_months(month, 1)])
+
+
+def create_future_partitions(cursor, months_ahead=DEFAULT_MONTHS_AHEAD):
+    current = month_start(timezone.now())
+    for offset in range(months_ahead + 1):
+        create_partition(cursor, add_months(current, offset))
+
+
+@transaction.atomic()
+def convert(months_ahead=DEFAULT_MONTHS_AHEAD):
+    """
+        Rebuilds the answer table as a table partitioned by month of answered_at, keeping its rows, indexes and
+        foreign keys. The primary key becomes (id, answered_at) because a partitioned table can only enforce keys that
+        contain the partition key. The table is locked for the whole copy.
+    """
+    quote = connection.ops.quote_name
+    table = table_name()
+    legacy = f'{table}_unpartitioned'
+    with connection.cursor() as cursor:
+        if is_partitioned(cursor):
+            return False
+        cursor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+        cursor.execute("SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+                       "WHERE conrelid = to_regclass(%s) AND contype = 'f'", [table])
+        foreign_keys = cursor.fetchall()
+        cursor.execute('SELECT pg_get_indexdef(indexrelid) FROM pg_index '
+                       'WHERE indrelid = to_regclass(%s) AND NOT indisprimary', [table])
+        indexes = [definition for definition, in cursor.fetchall()]
+        cursor.execute(f'SELECT MIN(answered_at), MAX(answered_at) FROM {quote(table)}')
+        first, last = cursor.fetchone()
+
+        cursor.execute(f'ALTER TABLE {quote(table)} RENAME TO {quote(legacy)}')
+        cursor.execute(f'CREATE TABLE {quote(table)} (LIKE {quote(legacy)} INCLUDING DEFAULTS INCLUDING IDENTITY '
+                       f'INCLUDING CONSTRAINTS) PARTITION BY RANGE (answered_at)')
+        cursor.execute(f'CREATE TABLE {quote(table + "_default")} PARTITION OF {quote(table)} DEFAULT')
+        if first is not None:
+            month = month_start(first)
+            while month <= month_start(last):
+                create_partition(cursor, month)
+                month = add_months(month, 1)
+        create_future_partitions(cursor, months_ahead)
+        cursor.execute(f'INSERT INTO {quote(table)} SELECT * FROM {quote(legacy)}')
+        cursor.execute(f"SELECT setval(pg_get_serial_sequence(%s, 'id'), COALESCE(MAX(id), 0) + 1, false) "
+                       f"FROM {quote(table)}", [table])
+        cursor.execute(f'DROP TABLE {quote(legacy)}')
+        cursor.execute(f'ALTER TABLE {quote(table)} ADD CONSTRAINT {quote(table + "_pkey")} '
+                       f'PRIMARY KEY (id, answered_at)')
+        for definition in indexes:
+            cursor.execute(definition)
+        for name, definition in foreign_keys:
+            cursor.execute(f'ALTER TABLE {quote(table)} ADD CONSTRAINT {quote(name)} {definition}')
+    return True
+
+
+@transaction.atomic()
+def detach_before(month, drop=False, archive_schema=None):
+    """
+        Detaches every monthly partition older than month. Detached partitions are dropped, moved to archive_schema or
+        left behind as plain tables, without their foreign keys so they never block deleting answer sets or questions.
+    """
+    quote = connection.ops.quote_name
+    detached = []
+    with connection.cursor() as cursor:
+        cursor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+        if archive_schema:
+            cursor.execute(f'CREATE SCHEMA IF NOT EXISTS {quote(archive_schema)}')
+        for name, first_month in partitions(cursor):
+            if first_month >= month:
+                continue
+            cursor.execute(f'ALTER TABLE {quote(table_name())} DETACH PARTITION {quote(name)}')
+            cursor.execute("SELECT conname FROM pg_constraint WHERE conrelid = to_regclass(%s) AND contype = 'f'",
+                           [name])
+            for constraint, in cursor.fetchall():
+                cursor.execute(f'ALTER TABLE {quote(name)} DROP CONSTRAINT {quote(constraint)}')
+            if drop:
+                cursor.execute(f'DROP TABLE {quote(name)}')
+            elif archive_schema:
+                cursor.execute(f'ALTER TABLE {quote(name)} SET SCHEMA {quote(archive_schema)}')
+            detached.append(name)
+    return detached
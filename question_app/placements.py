@@ -0,0 +1,36 @@
+from django.http import Http404
+
+from question_app.models import Question
+from question_app.signals import structure_edited
+from result_app import caching
+
+
+def parse(placements):
+    """
+        {question_id: new placement} of the request body, raising TypeError or ValueError when it is malformed
+    """
+    result = {}
+    for placement in placements:
+        new_placement = int(placement.get('new_placement'))
+        if new_placement < 0:
+            raise ValueError(new_placement)
+        result[int(placement.get('question_id'))] = new_placement
+    return result
+
+
+def reorder_questions(questionnaire_uuid, placements):
+    """
+        Locks and validates every question of the reorder with one query and writes the new placements with one
+        bulk_update. Question receivers are skipped, so the snapshot, export and result caches are outdated here once.
+        Must run inside a transaction.
+    """
+    placements = parse(placements)
+    found = set(Question.objects.select_for_update().filter(
+        questionnaire__uuid=questionnaire_uuid, id__in=placements).values_list('id', flat=True))
+    if len(found) != len(placements):
+        raise Http404
+    Question.objects.bulk_update([Question(id=question_id, placement=placement)
+                                  for question_id, placement in placements.items()], ['placement'])
+    structure_edited(questionnaire_uuid)
+    caching.bump_data_version(questionnaire_uuid)
+    return len(placements)
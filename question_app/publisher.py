@@ -0,0 +1,194 @@
+import datetime
+import fcntl
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import weakref
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.http import HttpRequest
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from question_app.models import Questionnaire
+
+MANIFEST = 'manifest.json'
+CURRENT = 'current.json'
+
+_pending = threading.local()
+
+
+class ExportRequest(HttpRequest):
+    """
+        Stands in for the respondent's request so media links point at QUESTIONNAIRE_EXPORT_BASE_URL
+    """
+
+    def __init__(self, base_url):
+        super().__init__()
+        parts = urlsplit(base_url)
+        self.base_scheme = parts.scheme
+        self.base_host = parts.netloc
+
+    def _get_scheme(self):
+        return self.base_scheme
+
+    def get_host(self):
+        return self.base_host
+
+
+def enabled():
+    return settings.QUESTIONNAIRE_EXPORT
+
+
+def root():
+    return settings.QUESTIONNAIRE_EXPORT_ROOT
+
+
+def published():
+    """
+        Questionnaires respondents may open right now, the same ones PublicQuestionnaireViewSet serves with 200
+    """
+    now = timezone.now()
+    return Questionnaire.objects.filter(Q(end_date__isnull=True) | Q(end_date__gte=now), is_delete=False,
+                                        folder__isnull=False, is_active=True, pub_date__lte=now)
+
+
+def write_atomic(path, content):
+    """
+        Writes next to path and renames over it, so nginx never serves a half written file
+    """
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    descriptor, temporary = tempfile.mkstemp(dir=directory, prefix='.', suffix='.tmp')
+    try:
+        with os.fdopen(descriptor, 'wb') as file:
+            file.write(content)
+            file.flush()
+            os.fsync(file.fileno())
+        os.chmod(temporary, 0o644)
+        os.replace(temporary, path)
+    except BaseException:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+        raise
+
+
+def update_manifest(questionnaire_uuid, entry):
+    """
+        Sets or, with entry None, removes the manifest entry of the questionnaire under a lock shared by all workers
+    """
+    os.makedirs(root(), exist_ok=True)
+    path = os.path.join(root(), MANIFEST)
+    with open(os.path.join(root(), '.manifest.lock'), 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            with open(path) as file:
+                manifest = json.load(file)
+        except FileNotFoundError:
+            manifest = {}
+        if entry is None:
+            manifest.pop(str(questionnaire_uuid), None)
+        else:
+            manifest[str(questionnaire_uuid)] = entry
+        write_atomic(path, json.dumps(manifest, sort_keys=True).encode())
+
+
+def read_manifest():
+    try:
+        with open(os.path.join(root(), MANIFEST)) as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return {}
+
+
+def publish(questionnaire: Questionnaire):
+    """
+        Writes the public representation to <uuid>/<version>.json and <uuid>/current.json and records the version in
+        the manifest. Versioned files never change, so they can be cached for good.
+    """
+    from question_app.question_app_serializers.general_serializers import PublicQuestionnaireSerializer
+
+    context = {'request': ExportRequest(settings.QUESTIONNAIRE_EXPORT_BASE_URL)}
+    body = JSONRenderer().render(PublicQuestionnaireSerializer(questionnaire, context=context).data)
+    version = hashlib.sha256(body).hexdigest()[:16]
+    directory = os.path.join(root(), str(questionnaire.uuid))
+    write_atomic(os.path.join(directory, f'{version}.json'), body)
+    write_atomic(os.path.join(directory, CURRENT), body)
+    for name in os.listdir(directory):
+        if name.endswith('.json') and name not in (CURRENT, f'{version}.json'):
+            os.remove(os.path.join(directory, name))
+    update_manifest(questionnaire.uuid, {
+        'version': version,
+        'file': f'{questionnaire.uuid}/{version}.json',
+        'end_date': questionnaire.end_date.isoformat() if questionnaire.end_date else None,
+        'published_at': timezone.now().isoformat(),
+    })
+    return version
+
+
+def unpublish(questionnaire_uuid):
+    update_manifest(questionnaire_uuid, None)
+    shutil.rmtree(os.path.join(root(), str(questionnaire_uuid)), ignore_errors=True)
+
+
+def export(questionnaire_uuid):
+    """
+        Publishes the questionnaire when respondents may open it and removes its files otherwise
+    """
+    questionnaire = published().prefetch_related('welcome_page', 'thanks_page', 'questions', 'category').filter(
+        uuid=questionnaire_uuid).first()
+    if questionnaire is None:
+        unpublish(questionnaire_uuid)
+        return None
+    return publish(questionnaire)
+
+
+def sync():
+    """
+        Removes the questionnaires whose end_date passed and publishes the ones whose pub_date came
+    """
+    now = timezone.now()
+    manifest = read_manifest()
+    for questionnaire_uuid, entry in manifest.items():
+        if entry['end_date'] and datetime.datetime.fromisoformat(entry['end_date']) < now:
+            unpublish(questionnaire_uuid)
+    for questionnaire_uuid in published().exclude(uuid__in=list(manifest)).values_list('uuid', flat=True):
+        export(questionnaire_uuid)
+
+
+def pending_exports():
+    """
+        {uuid: on_commit callback} of the exports this thread's transaction is waiting to send. The callbacks are held
+        weakly, so the entries of a transaction that rolls back go away with the callbacks Django discards.
+    """
+    if not hasattr(_pending, 'exports'):
+        _pending.exports = weakref.WeakValueDictionary()
+    return _pending.exports
+
+
+def schedule_export(questionnaire_uuid):
+    """
+        Exports the questionnaire once the running transaction commits, once however many of its rows it changed
+    """
+    if not enabled():
+        return
+    from question_app.tasks import export_questionnaire
+
+    questionnaire_uuid = str(questionnaire_uuid)
+    pending = pending_exports()
+    if questionnaire_uuid in pending:
+        return
+
+    def callback():
+        pending.pop(questionnaire_uuid, None)
+        export_questionnaire.delay(questionnaire_uuid)
+
+    if transaction.get_connection().in_atomic_block:
+        pending[questionnaire_uuid] = callback
+    transaction.on_commit(callback)
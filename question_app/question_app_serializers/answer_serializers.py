@@ -3,22 +3,56 @@ from .general_serializers import *
 from ..models import *
 from .. import validators
 import datetime
-from question_app.validators import tag_remover
+from question_app.answer_validation import AnswerValidationContext, question_ids, OTHER_OPTION, NOTHING_OPTION, \
+    ALL_OPTIONS
+from question_app import answer_writer, uploads
+
+
+class PreloadedQuestionField(serializers.PrimaryKeyRelatedField):
+    def to_internal_value(self, data):
+        validation_context = self.context.get('validation_context')
+        if validation_context is not None:
+            try:
+                question = validation_context.questions.get(int(data))
+            except (TypeError, ValueError):
+                question = None
+            if question is not None:
+                return question
+        return super().to_internal_value(data)
+
+
+class AnswerListSerializer(serializers.ListSerializer):
+    def to_internal_value(self, data):
+        if isinstance(data, list) and self.context.get('answer_set') is not None:
+            context_class = AnswerValidationContext.cached if self.context.get('cached_metadata') else \
+                AnswerValidationContext
+            self.context['validation_context'] = context_class(self.context.get('answer_set'), question_ids(data))
+        return super().to_internal_value(data)
+
+    def create(self, validated_data):
+        return answer_writer.save_answers(self.context.get('answer_set'), validated_data)
 
 
 class AnswerSerializer(serializers.ModelSerializer):
+    question = PreloadedQuestionField(queryset=Question.objects.all())
+    upload = serializers.PrimaryKeyRelatedField(queryset=FileUpload.objects.all(), required=False, allow_null=True)
+
     class Meta:
         model = Answer
-        fields = ('id', 'question', 'answer', 'file', 'answered_at', 'level')
+        fields = ('id', 'question', 'answer', 'file', 'upload', 'answered_at', 'level')
         read_only_fields = ('answered_at',)
+        list_serializer_class = AnswerListSerializer
 
     def validate(self, data):
         question = data.get('question')
         answer = data.get('answer')
         file = data.get('file')
+        upload = data.get('upload')
         answer_set: AnswerSet = self.context.get('answer_set')
+        validation_context = self.context.get('validation_context') or AnswerValidationContext(answer_set,
+                                                                                               [question.id])
         questionnaire = answer_set.questionnaire
-        if question.questionnaire != questionnaire:
+        if question.questionnaire_id != questionnaire.id:
             raise serializers.ValidationError(
                 {question.id: 'سوال متعلق به این پرسشنامه نیست'},
                 status.HTTP_400_BAD_REQUEST
@@ -31,7 +65,8 @@ class AnswerSerializer(serializers.ModelSerializer):
         timer = answer_set.questionnaire.timer
         iran_answered_at = answer_set.answered_at.replace(tzinfo=None) + datetime.timedelta(hours=3, minutes=30)
         if timer:
-            if datetime.datetime.now().replace(tzinfo=None) - iran_answered_at > timer:
+            submitted_at = self.context.get('submitted_at') or datetime.datetime.now()
+            if submitted_at.replace(tzinfo=None) - iran_answered_at > timer:
                 raise serializers.ValidationError(
                     {'answered_at': 'زمان پاسخ دهی به سوالات به پایان رسیده است'},
                     status.HTTP_400_BAD_REQUEST
@@ -42,8 +77,8 @@ class AnswerSerializer(serializers.ModelSerializer):
                 {question.id: 'پاسخ به سوال اجباری است'},
                 status.HTTP_400_BAD_REQUEST
             )
-        elif is_required and file is None and question.question_type == 'file':
-            if not answer_set.answers.filter(question=question).exists():
+        elif is_required and file is None and upload is None and question.question_type == 'file':
+            if question.id not in validation_context.answered_question_ids:
                 raise serializers.ValidationError(
                     {question.id: 'پاسخ به سوال (آپلود فایل) اجباری است'},
                     status.HTTP_400_BAD_REQUEST
@@ -53,8 +88,7 @@ class AnswerSerializer(serializers.ModelSerializer):
             max_selected_options = optional_question.max_selected_options
             min_selected_options = optional_question.min_selected_options
             multiple_choice = optional_question.multiple_choice
-            options = optional_question.options.all()
-            options_ids = [option.id for option in options]
+            options_ids = validation_context.option_ids[question.id]
             if answer is not None:
                 selections = set(answer.get('selected_options'))
                 if selections:
@@ -65,36 +99,35 @@ class AnswerSerializer(serializers.ModelSerializer):
                                 {question.id: 'گزینه انتخاب شده مربوط به این سوال نیست'},
                                 status.HTTP_400_BAD_REQUEST
                             )
-                        if 'سایر' not in [tag_remover(option.text) for option in options] and answer.get('other_text'):
+                        if not validation_context.has_other_option(question.id) and answer.get('other_text'):
                             raise serializers.ValidationError(
                                 {question.id: 'گزینه سایر در گزینه ها نیست لطفا متنی وارد نکنید'},
                                 status.HTTP_400_BAD_REQUEST
                             )
-                        for option in options:
-                            if option.id == selection:
-                                if tag_remover(option.text) == 'هیچ کدام':
-                                    if selected_count > 1:
-                                        raise serializers.ValidationError(
-                                            {question.id: 'هیچ کدام نمی تواند با سایر گزینه ها انتخاب شود'},
-                                            status.HTTP_400_BAD_REQUEST
-                                        )
-                                elif tag_remover(option.text) == 'همه گزینه ها':
-                                    if selected_count > 1:
-                                        raise serializers.ValidationError(
-                                            {question.id: 'همه گزینه ها نمی تواند با سایر گزینه ها انتخاب شود'},
-                                            status.HTTP_400_BAD_REQUEST
-                                        )
-                                elif tag_remover(option.text) == 'سایر':
-                                    if selected_count > 1:
-                                        raise serializers.ValidationError(
-                                            {question.id: 'سایر نمی تواند با سایر گزینه ها انتخاب شود'},
-                                            status.HTTP_400_BAD_REQUEST
-                                        )
-                                    if not answer.get('other_text'):
-                                        raise serializers.ValidationError(
-                                            {question.id: 'در صورت انتخاب گزینه سایر باید متنی وارد کنید'},
-                                            status.HTTP_400_BAD_REQUEST
-                                        )
+                        label = validation_context.option_label(question.id, selection)
+                        if label == NOTHING_OPTION:
+                            if selected_count > 1:
+                                raise serializers.ValidationError(
+                                    {question.id: 'هیچ کدام نمی تواند با سایر گزینه ها انتخاب شود'},
+                                    status.HTTP_400_BAD_REQUEST
+                                )
+                        elif label == ALL_OPTIONS:
+                            if selected_count > 1:
+                                raise serializers.ValidationError(
+                                    {question.id: 'همه گزینه ها نمی تواند با سایر گزینه ها انتخاب شود'},
+                                    status.HTTP_400_BAD_REQUEST
+                                )
+                        elif label == OTHER_OPTION:
+                            if selected_count > 1:
+                                raise serializers.ValidationError(
+                                    {question.id: 'سایر نمی تواند با سایر گزینه ها انتخاب شود'},
+                                    status.HTTP_400_BAD_REQUEST
+                                )
+                            if not answer.get('other_text'):
+                                raise serializers.ValidationError(
+                                    {question.id: 'در صورت انتخاب گزینه سایر باید متنی وارد کنید'},
+                                    status.HTTP_400_BAD_REQUEST
+                                )
 
                     if selected_count == 0 and is_required:
                         raise serializers.ValidationError(
@@ -136,8 +169,7 @@ class AnswerSerializer(serializers.ModelSerializer):
             max_selected_options = drop_down_question.max_selected_options
             min_selected_options = drop_down_question.min_selected_options
             multiple_choice = drop_down_question.multiple_choice
-            options = drop_down_question.options.all()
-            options_ids = [option.id for option in options]
+            options_ids = validation_context.option_ids[question.id]
             if answer is not None:
                 selections = set(answer.get('selected_options'))
                 if selections:
@@ -372,64 +404,57 @@ class AnswerSerializer(serializers.ModelSerializer):
                     )
         elif question.question_type == "file":
             file_question: FileQuestion = question.filequestion
-            max_size = file_question.max_volume
             if file is not None:
-                if file.size > max_size * 1024 * 1024:
+                if file.size > file_question.max_bytes:
+                    raise serializers.ValidationError(
+                        {question.id: f'حجم فایل نباید بیشتر از {file_question.max_volume} '
+                                      f'{file_question.get_volume_unit_display()} باشد'},
+                        status.HTTP_400_BAD_REQUEST
+                    )
+            elif upload is not None:
+                if upload.answer_set_id != answer_set.id or upload.question_id != question.id or \
+                        upload.status != FileUpload.COMPLETED:
                     raise serializers.ValidationError(
-                        {question.id: f'حجم فایل نباید بیشتر از {max_size} مگابایت باشد'},
+                        {question.id: 'بارگذاری فایل کامل نشده یا مربوط به این سوال نیست'},
                         status.HTTP_400_BAD_REQUEST
                     )
+                data['file'] = upload.file.name
             # elif file is None and is_required:
             #     raise serializers.ValidationError(
             #         {question.id: 'پاسخ به این سوال (آپلود فایل) اجباری است'},
             #         status.HTTP_400_BAD_REQUEST
             #     )
+        if upload is not None and question.question_type != 'file':
+            raise serializers.ValidationError(
+                {question.id: 'بارگذاری فایل فقط برای سوال آپلود فایل ممکن است'},
+                status.HTTP_400_BAD_REQUEST
+            )
         return data
 
     def create(self, validated_data):
-        OPTION_QUESTIONS = ['optional', 'sort', 'drop_down']
-        answer_set = self.context.get('answer_set')
-        question = validated_data.get('question')
-        question_type = question.question_type
-        answered_before = answer_set.answers.filter(question=question)
-        if answered_before.exists():
-            if question_type == 'file' and validated_data.get('file') is None:
-                if question.is_required:
-                    if answered_before.first().file:
-                        return answered_before.first()
-            answer_set.answers.filter(question=question).delete()
-        if question_type in OPTION_QUESTIONS and validated_data.get('answer') is not None:
-            match question_type:
-                case 'optional':
-                    answer = validated_data.pop('answer')
-                    selected_options = answer.get('selected_options')
-                    options = Option.objects.filter(id__in=selected_options)
-                    json_answer = {'selected_options': list(options.values('id', 'text', 'number'))}
-                    if question.optionalquestion.other_options:
-                        other_option = answer.get('other_text')
-                        if other_option is not None:
-                            json_answer['other_text'] = other_option
-                    return Answer.objects.create(answer_set=self.context.get('answer_set'), answer=json_answer,
-                                                 **validated_data)
-                case 'sort':
-                    answer = validated_data.pop('answer').get('sorted_options')
-                    ids = [item.get('id') for item in answer]
-                    placements = {item.get('id'): item.get('placement') for item in answer}
-                    options = SortOption.objects.filter(id__in=ids).order_by(models.Case(
-                        *[models.When(id=id_val, then=models.Value(order_val)) for id_val, order_val in
-                          placements.items()]))
-                    json_answer = {'sorted_options': list(options.values('id', 'text'))}
-                    return Answer.objects.create(answer_set=self.context.get('answer_set'), answer=json_answer,
-                                                 **validated_data)
+        return answer_writer.save_answers(self.context.get('answer_set'), [validated_data])[0]
 
-                case 'drop_down':
-                    answer = validated_data.pop('answer').get('selected_options')
-                    options = DropDownOption.objects.filter(id__in=answer)
-                    json_answer = {'selected_options': list(options.values('id', 'text'))}
-                    return Answer.objects.create(answer_set=self.context.get('answer_set'), answer=json_answer,
-                                                 **validated_data)
-        else:
-            return Answer.objects.create(answer_set=self.context.get('answer_set'), **validated_data)
+
+class FileUploadSerializer(serializers.ModelSerializer):
+    question = serializers.PrimaryKeyRelatedField(queryset=FileQuestion.objects.all())
+
+    class Meta:
+        model = FileUpload
+        fields = ('id', 'question', 'file_name', 'size', 'received', 'status')
+        read_only_fields = ('received', 'status')
+
+    def validate(self, data):
+        question: FileQuestion = data.get('question')
+        answer_set: AnswerSet = self.context.get('answer_set')
+        if question.questionnaire_id != answer_set.questionnaire_id:
+            raise serializers.ValidationError({'question': 'سوال متعلق به این پرسشنامه نیست'})
+        if data.get('size') > question.max_bytes:
+            raise serializers.ValidationError(
+                {'size': f'حجم فایل نباید بیشتر از {question.max_volume} {question.get_volume_unit_display()} باشد'})
+        return data
+
+    def create(self, validated_data):
+        return uploads.start_upload(self.context.get('answer_set'), **validated_data)
 
 
 class AnswerSetSerializer(serializers.ModelSerializer):
@@ -440,8 +465,8 @@ class AnswerSetSerializer(serializers.ModelSerializer):
         fields = ('id', 'questionnaire', 'answered_at', 'answers', 'answered_by')
         read_only_fields = ('questionnaire', 'answered_at', 'answered_by')
 
-    def validate(self, data):
-        questionnaire = get_object_or_404(Questionnaire, uuid=self.context.get('questionnaire_uuid'))
+    @staticmethod
+    def validate_questionnaire_is_open(questionnaire):
         if questionnaire.is_active and questionnaire.pub_date <= timezone.now():
             if questionnaire.end_date:
                 if questionnaire.end_date >= timezone.now():
@@ -451,6 +476,10 @@ class AnswerSetSerializer(serializers.ModelSerializer):
         else:
             raise serializers.ValidationError(
                 {"questionnaire": "پرسشنامه فعال نیست یا امکان پاسخ دهی به آن وجود ندارد"})
+
+    def validate(self, data):
+        self.validate_questionnaire_is_open(
+            get_object_or_404(Questionnaire, uuid=self.context.get('questionnaire_uuid')))
         return data
 
     @transaction.atomic()
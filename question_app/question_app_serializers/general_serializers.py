@@ -89,7 +89,6 @@ class QuestionnaireSerializer(serializers.ModelSerializer):
     welcome_page = WelcomePageSerializer(read_only=True)
     thanks_page = ThanksPageSerializer(read_only=True)
     questions = NoGroupQuestionSerializer(many=True, read_only=True)
-    answer_count = serializers.SerializerMethodField(method_name='get_answer_set_count')
 
     class Meta:
         model = Questionnaire
@@ -106,9 +105,6 @@ class QuestionnaireSerializer(serializers.ModelSerializer):
         ret['category'] = instance.category.name if instance.category else None
         return ret
 
-    def get_answer_set_count(self, obj):
-        return obj.answer_sets.exclude(answers=None).count()
-
     def validate(self, data):
         folder = data.get('folder')
         name = data.get('name')
@@ -183,9 +179,6 @@ class QuestionnaireSerializer(serializers.ModelSerializer):
 
 
 class NoQuestionQuestionnaireSerializer(serializers.ModelSerializer):
-    answer_count = serializers.SerializerMethodField(method_name='get_answer_count')
-    question_count = serializers.SerializerMethodField(method_name='get_question_count')
-
     class Meta:
         model = Questionnaire
         fields = ('id', 'name', 'uuid', 'pub_date', 'created_at', 'answer_count', 'question_count', 'is_active', 'category')
@@ -196,12 +189,6 @@ class NoQuestionQuestionnaireSerializer(serializers.ModelSerializer):
             representation['approval_status'] = instance.interview.approval_status
         return representation
 
-    def get_answer_count(self, obj):
-        return obj.answer_sets.exclude(answers=None).count()
-
-    def get_question_count(self, obj):
-        return obj.questions.count()
-
 
 class CategorySerializer(serializers.ModelSerializer):
     class Meta:
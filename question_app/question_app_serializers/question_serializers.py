@@ -1,18 +1,29 @@
-from django.db import transaction
+from django.db import models, transaction
 from django.http import HttpRequest
 from rest_framework import serializers
 from rest_framework import status
 from ..models import *
 from porsline_config import settings
+from ..question_loader import load_children
 from ..validators import option_in_html_tag_validator, tag_remover
 
 
+class QuestionListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        """
+            Loads the subclass rows of all the questions by type before serializing them one by one
+        """
+        iterable = data.all() if isinstance(data, models.manager.BaseManager) else data
+        return super().to_representation(load_children(iterable))
+
+
 class QuestionSerializer(serializers.ModelSerializer):
     question = serializers.SerializerMethodField(method_name='child_question')
 
     class Meta:
         model = Question
         fields = ('question',)
+        list_serializer_class = QuestionListSerializer
 
     def child_question(self, instance):
         """
@@ -53,13 +64,14 @@ class NoGroupQuestionSerializer(serializers.ModelSerializer):
     class Meta:
         model = Question
         fields = ('question',)
+        list_serializer_class = QuestionListSerializer
 
     def child_question(self, instance):
         """
             Using serializers dynamically for each question type
         """
         question_type = instance.question_type
-        if instance.group is None:
+        if instance.group_id is None:
             if question_type == 'optional':
                 return OptionalQuestionSerializer(instance.optionalquestion, context=self.context).data
             elif question_type == 'drop_down':
@@ -0,0 +1,57 @@
+from collections import defaultdict
+
+from question_app.models import Question, OptionalQuestion, DropDownQuestion, SortQuestion, TextAnswerQuestion, \
+    NumberAnswerQuestion, IntegerRangeQuestion, IntegerSelectiveQuestion, PictureFieldQuestion, EmailFieldQuestion, \
+    LinkQuestion, FileQuestion, NoAnswerQuestion, QuestionGroup
+
+CHILD_MODELS = {
+    'optional': OptionalQuestion,
+    'drop_down': DropDownQuestion,
+    'sort': SortQuestion,
+    'text_answer': TextAnswerQuestion,
+    'number_answer': NumberAnswerQuestion,
+    'integer_range': IntegerRangeQuestion,
+    'integer_selective': IntegerSelectiveQuestion,
+    'picture_field': PictureFieldQuestion,
+    'email_field': EmailFieldQuestion,
+    'link': LinkQuestion,
+    'file': FileQuestion,
+    'no_answer': NoAnswerQuestion,
+    'group': QuestionGroup,
+}
+OPTION_MODELS = (OptionalQuestion, DropDownQuestion, SortQuestion)
+
+
+def child_relation(model):
+    return Question._meta.get_field(model._meta.model_name)
+
+
+def load_children(questions):
+    """
+        Attaches the subclass row of every question (instance.optionalquestion, ...) with one query per question type,
+        options and group children included, so serializing a questionnaire costs a query per type, not per question
+    """
+    questions = list(questions)
+    pending = defaultdict(list)
+    for question in questions:
+        model = CHILD_MODELS.get(question.question_type)
+        if model is not None and not child_relation(model).is_cached(question):
+            pending[model].append(question)
+    group_children = []
+    for model, same_type in pending.items():
+        queryset = model.objects.filter(pk__in=[question.pk for question in same_type])
+        if model in OPTION_MODELS:
+            queryset = queryset.prefetch_related('options')
+        elif model is QuestionGroup:
+            queryset = queryset.prefetch_related('child_questions')
+        children = queryset.in_bulk()
+        for question in same_type:
+            child = children.get(question.pk)
+            if child is None:
+                continue
+            setattr(question, model._meta.model_name, child)
+            if model is QuestionGroup:
+                group_children.extend(child.child_questions.all())
+    if group_children:
+        load_children(group_children)
+    return questions
@@ -1,115 +1,150 @@
-from django.db.models.signals import post_save
+from django.conf import settings
+from django.db import connections, DEFAULT_DB_ALIAS
+from django.db.models.signals import post_save, pre_delete, post_delete, pre_migrate, post_migrate
 from django.dispatch import receiver
 
-from question_app.models import OptionalQuestion, DropDownQuestion, SortQuestion, TextAnswerQuestion, \
-    NumberAnswerQuestion, IntegerRangeQuestion, IntegerSelectiveQuestion, EmailFieldQuestion, LinkQuestion, FileQuestion
+from question_app import counters, publisher, snapshots
+from question_app.models import Answer, AnswerSet, OptionalQuestion, DropDownQuestion, SortQuestion, \
+    TextAnswerQuestion, NumberAnswerQuestion, IntegerRangeQuestion, IntegerSelectiveQuestion, EmailFieldQuestion, \
+    LinkQuestion, FileQuestion, Questionnaire, Question, Option, DropDownOption, SortOption, WelcomePage, ThanksPage, \
+    Folder
+
+
+ANSWERABLE_QUESTIONS = (OptionalQuestion, DropDownQuestion, SortQuestion, TextAnswerQuestion, NumberAnswerQuestion,
+                        IntegerRangeQuestion, IntegerSelectiveQuestion, EmailFieldQuestion, LinkQuestion, FileQuestion)
+BACKFILL_SQL = '''
+    INSERT INTO {answer_table} (answer_set_id, {columns})
+    SELECT answer_set.id, {values}
+    FROM {answer_set_table} AS answer_set
+    WHERE answer_set.questionnaire_id = %s
+'''
+
+
+def question_created(sender, instance, created, using, **kwargs):
+    """
+        Gives every existing answer set of the questionnaire an empty answer to the new question with one
+        INSERT ... SELECT, whatever the number of answer sets
+    """
+    if not created:
+        return
+    placeholder = Answer(question=instance)
+    placeholder.fill_shadow_fields()
+    fields = [field for field in Answer._meta.concrete_fields if field.name not in ('id', 'answer_set')]
+    connection = connections[using]
+    values = [field.get_db_prep_save(field.pre_save(placeholder, True), connection) for field in fields]
+    sql = BACKFILL_SQL.format(
+        answer_table=connection.ops.quote_name(Answer._meta.db_table),
+        answer_set_table=connection.ops.quote_name(AnswerSet._meta.db_table),
+        columns=', '.join(connection.ops.quote_name(field.column) for field in fields),
+        values=', '.join(['%s'] * len(fields)),
+    )
+    filled = counters.empty_sets().filter(questionnaire_id=instance.questionnaire_id).count()
+    with connection.cursor() as cursor:
+        cursor.execute(sql, values + [instance.questionnaire_id])
+    counters.add(instance.questionnaire_id, answer_count=filled)
+
+
+for question_model in ANSWERABLE_QUESTIONS:
+    post_save.connect(question_created, sender=question_model, dispatch_uid=f'question_created_{question_model}')
+
+
+def question_counted(sender, instance, created, **kwargs):
+    if created:
+        counters.add(instance.questionnaire_id, question_count=1)
 
 
-@receiver(post_save, sender=OptionalQuestion)
-def question_created(sender, instance: OptionalQuestion, created, **kwargs):
-    print('question_created')
-    if created:
-        answer_sets = instance.questionnaire.answer_sets
-        if answer_sets.exists():
-            print('answer_sets.exists()', answer_sets.exists())
-            for answer_set in answer_sets.all():
-                answer_set.answers.create(question=instance)
+for question_model in [Question, *Question.__subclasses__()]:
+    post_save.connect(question_counted, sender=question_model, dispatch_uid=f'question_counted_{question_model}')
 
 
-@receiver(post_save, sender=DropDownQuestion)
-def question_created(sender, instance: DropDownQuestion, created, **kwargs):
-    print('question_created')
-    if created:
-        answer_sets = instance.questionnaire.answer_sets
-        if answer_sets.exists():
-            print('answer_sets.exists()', answer_sets.exists())
-            for answer_set in answer_sets.all():
-                answer_set.answers.create(question=instance)
+@receiver(pre_delete, sender=Question)
+def question_deleting(sender, instance: Question, **kwargs):
+    """
+        Deleting a subclass also deletes its Question row, so receivers on Question see every question exactly once
+    """
+    counters.add(instance.questionnaire_id, answer_count=-counters.sets_emptied_by(instance).count())
 
 
-@receiver(post_save, sender=SortQuestion)
-def question_created(sender, instance: SortQuestion, created, **kwargs):
-    print('question_created')
-    if created:
-        answer_sets = instance.questionnaire.answer_sets
-        if answer_sets.exists():
-            print('answer_sets.exists()', answer_sets.exists())
-            for answer_set in answer_sets.all():
-                answer_set.answers.create(question=instance)
+@receiver(post_delete, sender=Question)
+def question_deleted(sender, instance: Question, **kwargs):
+    counters.add(instance.questionnaire_id, question_count=-1)
 
 
-@receiver(post_save, sender=TextAnswerQuestion)
-def question_created(sender, instance: TextAnswerQuestion, created, **kwargs):
-    print('question_created')
-    if created:
-        answer_sets = instance.questionnaire.answer_sets
-        if answer_sets.exists():
-            print('answer_sets.exists()', answer_sets.exists())
-            for answer_set in answer_sets.all():
-                answer_set.answers.create(question=instance)
+@receiver(pre_delete, sender=AnswerSet)
+def answer_set_deleting(sender, instance: AnswerSet, **kwargs):
+    if instance.answers.exists():
+        counters.add(instance.questionnaire_id, answer_count=-1)
 
 
-@receiver(post_save, sender=NumberAnswerQuestion)
-def question_created(sender, instance: NumberAnswerQuestion, created, **kwargs):
-    print('question_created')
-    if created:
-        answer_sets = instance.questionnaire.answer_sets
-        if answer_sets.exists():
-            print('answer_sets.exists()', answer_sets.exists())
-            for answer_set in answer_sets.all():
-                answer_set.answers.create(question=instance)
+def structure_edited(questionnaire_uuid):
+    snapshots.bump_structure_version(questionnaire_uuid)
+    publisher.schedule_export(questionnaire_uuid)
 
 
-@receiver(post_save, sender=IntegerRangeQuestion)
-def question_created(sender, instance: IntegerRangeQuestion, created, **kwargs):
-    print('question_created')
-    if created:
-        answer_sets = instance.questionnaire.answer_sets
-        if answer_sets.exists():
-            print('answer_sets.exists()', answer_sets.exists())
-            for answer_set in answer_sets.all():
-                answer_set.answers.create(question=instance)
+@receiver(post_save, sender=Questionnaire)
+@receiver(post_delete, sender=Questionnaire)
+def questionnaire_structure_changed(sender, instance: Questionnaire, **kwargs):
+    structure_edited(instance.uuid)
 
 
-@receiver(post_save, sender=IntegerSelectiveQuestion)
-def question_created(sender, instance: IntegerSelectiveQuestion, created, **kwargs):
-    print('question_created')
-    if created:
-        answer_sets = instance.questionnaire.answer_sets
-        if answer_sets.exists():
-            print('answer_sets.exists()', answer_sets.exists())
-            for answer_set in answer_sets.all():
-                answer_set.answers.create(question=instance)
+@receiver(pre_delete, sender=Folder)
+def folder_deleting(sender, instance: Folder, **kwargs):
+    """
+        Deleting a folder detaches its questionnaires with one UPDATE that sends no post_save, so their public snapshots
+        are outdated here while the questionnaires are still known
+    """
+    for questionnaire_uuid in instance.questionnaires.values_list('uuid', flat=True):
+        structure_edited(questionnaire_uuid)
 
 
-@receiver(post_save, sender=EmailFieldQuestion)
-def question_created(sender, instance: EmailFieldQuestion, created, **kwargs):
-    print('question_created')
-    if created:
-        answer_sets = instance.questionnaire.answer_sets
-        if answer_sets.exists():
-            print('answer_sets.exists()', answer_sets.exists())
-            for answer_set in answer_sets.all():
-                answer_set.answers.create(question=instance)
+def structure_changed(sender, instance, **kwargs):
+    structure_edited(instance.questionnaire.uuid)
 
 
-@receiver(post_save, sender=LinkQuestion)
-def question_created(sender, instance: LinkQuestion, created, **kwargs):
-    print('question_created')
-    if created:
-        answer_sets = instance.questionnaire.answer_sets
-        if answer_sets.exists():
-            print('answer_sets.exists()', answer_sets.exists())
-            for answer_set in answer_sets.all():
-                answer_set.answers.create(question=instance)
+for structure_model in [Question, *Question.__subclasses__(), WelcomePage, ThanksPage]:
+    post_save.connect(structure_changed, sender=structure_model,
+                      dispatch_uid=f'structure_changed_save_{structure_model}')
+    post_delete.connect(structure_changed, sender=structure_model,
+                        dispatch_uid=f'structure_changed_delete_{structure_model}')
 
 
-@receiver(post_save, sender=FileQuestion)
-def question_created(sender, instance: FileQuestion, created, **kwargs):
-    print('question_created')
-    if created:
-        answer_sets = instance.questionnaire.answer_sets
-        if answer_sets.exists():
-            print('answer_sets.exists()', answer_sets.exists())
-            for answer_set in answer_sets.all():
-                answer_set.answers.create(question=instance)
+@receiver(post_save, sender=Option)
+@receiver(post_delete, sender=Option)
+def option_changed(sender, instance: Option, **kwargs):
+    structure_edited(instance.optional_question.questionnaire.uuid)
+
+
+@receiver(post_save, sender=DropDownOption)
+@receiver(post_delete, sender=DropDownOption)
+def drop_down_option_changed(sender, instance: DropDownOption, **kwargs):
+    structure_edited(instance.drop_down_question.questionnaire.uuid)
+
+
+@receiver(post_save, sender=SortOption)
+@receiver(post_delete, sender=SortOption)
+def sort_option_changed(sender, instance: SortOption, **kwargs):
+    structure_edited(instance.sort_question.questionnaire.uuid)
+
+
+@receiver(pre_migrate)
+def create_trigram_extension(sender, using, **kwargs):
+    if sender.name != 'question_app' or connections[using].vendor != 'postgresql':
+        return
+    with connections[using].cursor() as cursor:
+        cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+
+
+@receiver(post_migrate)
+def keep_answer_partitions(sender, using, **kwargs):
+    """
+        With ANSWER_PARTITIONING on, migrate converts the answer table to monthly partitions once and then keeps the
+        partitions of the coming months in place
+    """
+    if sender.name != 'question_app' or using != DEFAULT_DB_ALIAS or not settings.ANSWER_PARTITIONING or \
+            connections[using].vendor != 'postgresql':
+        return
+    from question_app import partitioning
+
+    if not partitioning.convert():
+        with connections[using].cursor() as cursor:
+            partitioning.create_future_partitions(cursor)
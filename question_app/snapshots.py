@@ -0,0 +1,59 @@
+import hashlib
+
+from django.core.cache import cache
+from django.db import transaction
+from redis import RedisError
+from rest_framework.renderers import JSONRenderer
+
+from porsline_config import versions
+
+SNAPSHOT_TIMEOUT = 60 * 60 * 24
+
+
+def version_key(questionnaire_uuid):
+    return f'questionnaire:structure:{questionnaire_uuid}'
+
+
+def snapshot_key(questionnaire_uuid, base_url):
+    return f'questionnaire:snapshot:{questionnaire_uuid}:{base_url}'
+
+
+def structure_version(questionnaire_uuid):
+    return versions.current(version_key(questionnaire_uuid))
+
+
+def bump_structure_version(questionnaire_uuid):
+    """
+        Outdates the public snapshot of the questionnaire once the running transaction commits, so a snapshot is never
+        rebuilt from rows that are not committed yet
+    """
+    transaction.on_commit(lambda: versions.bump(version_key(questionnaire_uuid)))
+
+
+def render(data, **fields):
+    body = JSONRenderer().render(data)
+    return {'body': body, 'etag': f'"{hashlib.sha256(body).hexdigest()}"', **fields}
+
+
+def snapshot(questionnaire_uuid, base_url, build):
+    """
+        The public snapshot of the questionnaire for its current structure version, read with a single cache round trip.
+        build() renders it again only after an edit bumped the version, or without redis.
+    """
+    keys = [version_key(questionnaire_uuid), snapshot_key(questionnaire_uuid, base_url)]
+    try:
+        values = cache.get_many(keys)
+        version = values.get(keys[0])
+        stored = values.get(keys[1])
+        if version is not None and stored is not None and stored['version'] == version:
+            return stored
+        if version is None:
+            version = structure_version(questionnaire_uuid)
+    except RedisError:
+        return build()
+    value = build()
+    try:
+        cache.set(keys[1], {**value, 'version': version}, timeout=SNAPSHOT_TIMEOUT)
+    except RedisError:
+        pass
+    return value
@@ -0,0 +1,56 @@
+import os
+import socket
+from datetime import timedelta
+
+from celery import shared_task
+from django.db import connection
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from question_app import ingestion, partitioning, publisher
+from question_app.models import AnswerSet, Answer
+
+ABANDONED_ANSWER_SET_AGE = timedelta(days=1)
+
+
+@shared_task
+def drain_answer_stream():
+    """
+        Persists the add-answer submissions waiting in the ingestion stream until it is empty
+    """
+    consumer = f'{socket.gethostname()}-{os.getpid()}'
+    while ingestion.drain(consumer):
+        pass
+
+
+@shared_task
+def delete_abandoned_answer_sets():
+    """
+        Removes answer sets opened through the two step flow that never received an answer. Answer sets older than the
+        oldest attached answer partition are kept, since their answers may have been detached rather than never given.
+    """
+    abandoned = AnswerSet.objects.filter(answered_at__lt=timezone.now() - ABANDONED_ANSWER_SET_AGE).exclude(
+        Exists(Answer.objects.filter(answer_set=OuterRef('pk'))))
+    with connection.cursor() as cursor:
+        since = partitioning.attached_since(cursor)
+    if since is not None:
+        abandoned = abandoned.filter(answered_at__gte=since)
+    abandoned.delete()
+
+
+@shared_task
+def create_answer_partitions():
+    with connection.cursor() as cursor:
+        if partitioning.is_partitioned(cursor):
+            partitioning.create_future_partitions(cursor)
+
+
+@shared_task
+def export_questionnaire(questionnaire_uuid):
+    publisher.export(questionnaire_uuid)
+
+
+@shared_task
+def sync_questionnaire_exports():
+    if publisher.enabled():
+        publisher.sync()
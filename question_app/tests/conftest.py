@@ -1,4 +1,5 @@
 from django.contrib.auth import get_user_model as UserModel
+from django.core.cache import cache
 from rest_framework.test import APIClient
 from model_bakery import baker
 import pytest
@@ -31,3 +32,9 @@ def user_api():
         return f'/user-api/{path}/'
 
     return do_user_api
+
+
+@pytest.fixture(autouse=True)
+def local_cache(settings):
+    settings.CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+    cache.clear()
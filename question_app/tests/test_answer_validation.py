@@ -0,0 +1,92 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from model_bakery import baker
+
+from question_app.models import Questionnaire, AnswerSet, OptionalQuestion, Option, DropDownQuestion, \
+    DropDownOption, IntegerRangeQuestion, TextAnswerQuestion
+from question_app.answer_validation import questionnaire_questions
+from question_app.question_app_serializers.answer_serializers import AnswerSerializer
+from result_app import caching
+
+
+def submission(questionnaire, count):
+    items = []
+    for _ in range(count):
+        optional = baker.make(OptionalQuestion, questionnaire=questionnaire)
+        option = baker.make(Option, optional_question=optional, text='<p>گزینه</p>')
+        drop_down = baker.make(DropDownQuestion, questionnaire=questionnaire)
+        drop_down_option = baker.make(DropDownOption, drop_down_question=drop_down)
+        integer_range = baker.make(IntegerRangeQuestion, questionnaire=questionnaire, min=0, max=10)
+        text = baker.make(TextAnswerQuestion, questionnaire=questionnaire, min=None, max=None)
+        items += [
+            {'question': optional.id, 'answer': {'selected_options': [option.id]}},
+            {'question': drop_down.id, 'answer': {'selected_options': [drop_down_option.id]}},
+            {'question': integer_range.id, 'answer': {'integer_range': 5}},
+            {'question': text.id, 'answer': {'text_answer': 'متن'}},
+        ]
+    return items
+
+
+def validation_queries(count):
+    questionnaire = baker.make(Questionnaire, timer=None)
+    answer_set = baker.make(AnswerSet, questionnaire=questionnaire)
+    items = submission(questionnaire, count)
+    answer_set = AnswerSet.objects.get(id=answer_set.id)
+    serializer = AnswerSerializer(data=items, many=True, context={'answer_set': answer_set})
+    with CaptureQueriesContext(connection) as queries:
+        assert serializer.is_valid(), serializer.errors
+    return len(queries.captured_queries)
+
+
+@pytest.mark.django_db
+class TestBatchAnswerValidation:
+    def test_query_count_does_not_grow_with_submission_size(self):
+        assert validation_queries(1) == validation_queries(15)
+
+    def test_other_text_without_other_option_is_invalid(self):
+        questionnaire = baker.make(Questionnaire, timer=None)
+        answer_set = baker.make(AnswerSet, questionnaire=questionnaire)
+        question = baker.make(OptionalQuestion, questionnaire=questionnaire)
+        option = baker.make(Option, optional_question=question, text='<b>بله</b>')
+        data = [{'question': question.id, 'answer': {'selected_options': [option.id], 'other_text': 'متن'}}]
+
+        serializer = AnswerSerializer(data=data, many=True, context={'answer_set': answer_set})
+
+        assert not serializer.is_valid()
+
+    def test_nothing_option_cannot_be_combined(self):
+        questionnaire = baker.make(Questionnaire, timer=None)
+        answer_set = baker.make(AnswerSet, questionnaire=questionnaire)
+        question = baker.make(OptionalQuestion, questionnaire=questionnaire, multiple_choice=True,
+                              max_selected_options=3, min_selected_options=1)
+        nothing = baker.make(Option, optional_question=question, text='<span>هیچ کدام</span>')
+        other = baker.make(Option, optional_question=question, text='بله')
+        data = [{'question': question.id, 'answer': {'selected_options': [nothing.id, other.id]}}]
+
+        serializer = AnswerSerializer(data=data, many=True, context={'answer_set': answer_set})
+
+        assert not serializer.is_valid()
+
+
+@pytest.mark.django_db
+class TestValidationMetadataCache:
+    def test_new_answers_keep_the_metadata(self, django_assert_num_queries):
+        questionnaire = baker.make(Questionnaire, timer=None)
+        baker.make(IntegerRangeQuestion, questionnaire=questionnaire, min=0, max=10)
+        questionnaire_questions(questionnaire)
+
+        caching.bump_data_version(questionnaire.uuid)
+
+        with django_assert_num_queries(0):
+            assert len(questionnaire_questions(questionnaire)) == 1
+
+    def test_structure_edit_reloads_the_metadata(self, django_capture_on_commit_callbacks):
+        questionnaire = baker.make(Questionnaire, timer=None)
+        baker.make(IntegerRangeQuestion, questionnaire=questionnaire, min=0, max=10)
+        questionnaire_questions(questionnaire)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            baker.make(TextAnswerQuestion, questionnaire=questionnaire)
+
+        assert len(questionnaire_questions(questionnaire)) == 2
@@ -0,0 +1,101 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from model_bakery import baker
+
+from question_app.models import Questionnaire, AnswerSet, Answer, OptionalQuestion, Option, SortQuestion, \
+    SortOption, IntegerRangeQuestion
+from question_app.question_app_serializers.answer_serializers import AnswerSerializer
+
+
+def submission(questionnaire, count):
+    items = []
+    for _ in range(count):
+        optional = baker.make(OptionalQuestion, questionnaire=questionnaire)
+        option = baker.make(Option, optional_question=optional, text='بله')
+        sort = baker.make(SortQuestion, questionnaire=questionnaire)
+        first, second = baker.make(SortOption, sort_question=sort, _quantity=2)
+        integer_range = baker.make(IntegerRangeQuestion, questionnaire=questionnaire, min=0, max=10)
+        items += [
+            {'question': optional.id, 'answer': {'selected_options': [option.id]}},
+            {'question': sort.id, 'answer': {'sorted_options': [{'id': second.id, 'placement': 1},
+                                                                {'id': first.id, 'placement': 2}]}},
+            {'question': integer_range.id, 'answer': {'integer_range': 5}},
+        ]
+    return items
+
+
+def save(answer_set, items):
+    serializer = AnswerSerializer(data=items, many=True, context={'answer_set': answer_set})
+    assert serializer.is_valid(), serializer.errors
+    with CaptureQueriesContext(connection) as queries:
+        serializer.save()
+    return len(queries.captured_queries)
+
+
+def write_queries(count):
+    questionnaire = baker.make(Questionnaire, timer=None)
+    answer_set = baker.make(AnswerSet, questionnaire=questionnaire)
+    items = submission(questionnaire, count)
+    save(answer_set, items)
+    return save(AnswerSet.objects.get(id=answer_set.id), items)
+
+
+@pytest.mark.django_db
+class TestBulkAnswerWriter:
+    def test_query_count_does_not_grow_with_submission_size(self):
+        assert write_queries(1) == write_queries(10)
+
+    def test_resubmission_replaces_previous_answers(self):
+        questionnaire = baker.make(Questionnaire, timer=None)
+        answer_set = baker.make(AnswerSet, questionnaire=questionnaire)
+        question = baker.make(IntegerRangeQuestion, questionnaire=questionnaire, min=0, max=10)
+
+        save(answer_set, [{'question': question.id, 'answer': {'integer_range': 3}}])
+        save(answer_set, [{'question': question.id, 'answer': {'integer_range': 7}}])
+
+        answers = Answer.objects.filter(answer_set=answer_set)
+        assert answers.count() == 1
+        assert answers.get().answer == {'integer_range': 7}
+        assert answers.get().numeric_value == 7
+
+    def test_option_texts_are_stored_with_the_answer(self):
+        questionnaire = baker.make(Questionnaire, timer=None)
+        answer_set = baker.make(AnswerSet, questionnaire=questionnaire)
+        items = submission(questionnaire, 1)
+
+        save(answer_set, items)
+
+        optional_answer = Answer.objects.get(answer_set=answer_set, question_id=items[0]['question'])
+        sort_answer = Answer.objects.get(answer_set=answer_set, question_id=items[1]['question'])
+        assert optional_answer.answer['selected_options'][0]['text'] == 'بله'
+        assert optional_answer.search_text == 'بله'
+        assert [option['id'] for option in sort_answer.answer['sorted_options']] == \
+               [item['id'] for item in items[1]['answer']['sorted_options']]
+
+    def test_typed_columns_are_filled(self):
+        questionnaire = baker.make(Questionnaire, timer=None)
+        answer_set = baker.make(AnswerSet, questionnaire=questionnaire)
+        items = submission(questionnaire, 1)
+
+        save(answer_set, items)
+
+        answers = {answer.question_id: answer for answer in Answer.objects.filter(answer_set=answer_set)}
+        optional, sort, integer_range = (answers[item['question']] for item in items)
+        assert optional.option_ids == items[0]['answer']['selected_options']
+        assert sort.option_ids == [item['id'] for item in items[1]['answer']['sorted_options']]
+        assert integer_range.numeric_value == 5 and integer_range.text_value is None
+
+    def test_single_answer_goes_through_the_writer(self):
+        questionnaire = baker.make(Questionnaire, timer=None)
+        answer_set = baker.make(AnswerSet, questionnaire=questionnaire)
+        question = baker.make(IntegerRangeQuestion, questionnaire=questionnaire, min=0, max=10)
+        serializer = AnswerSerializer(data={'question': question.id, 'answer': {'integer_range': 4}},
+                                      context={'answer_set': answer_set})
+        assert serializer.is_valid(), serializer.errors
+
+        answer = serializer.save()
+
+        assert answer.answer_set == answer_set
+        assert answer.numeric_value == 4
+        assert Answer.objects.filter(answer_set=answer_set).count() == 1
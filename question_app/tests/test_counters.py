@@ -0,0 +1,89 @@
+import pytest
+from django.core.management import call_command
+from model_bakery import baker
+from rest_framework import status
+
+from question_app.models import Questionnaire, AnswerSet, IntegerRangeQuestion, TextAnswerQuestion
+
+
+def counts(questionnaire):
+    questionnaire.refresh_from_db()
+    return questionnaire.answer_count, questionnaire.question_count
+
+
+def answer(api_client, answer_set, question, value):
+    return api_client.post(
+        f'/question-api/questionnaires/{answer_set.questionnaire.uuid}/answer-sets/{answer_set.id}/add-answer/',
+        [{'question': question.id, 'answer': {'integer_range': value}}], format='json')
+
+
+@pytest.mark.django_db
+class TestQuestionnaireCounters:
+    def test_questions_are_counted_on_create_and_delete(self):
+        questionnaire = baker.make(Questionnaire, timer=None)
+        question = baker.make(IntegerRangeQuestion, questionnaire=questionnaire, min=0, max=10)
+        baker.make(TextAnswerQuestion, questionnaire=questionnaire)
+
+        assert counts(questionnaire) == (0, 2)
+        question.delete()
+        assert counts(questionnaire) == (0, 1)
+
+    def test_answer_set_is_counted_once_when_it_gets_answers(self, api_client):
+        questionnaire = baker.make(Questionnaire, timer=None)
+        question = baker.make(IntegerRangeQuestion, questionnaire=questionnaire, min=0, max=10)
+        answer_set = baker.make(AnswerSet, questionnaire=questionnaire)
+        baker.make(AnswerSet, questionnaire=questionnaire)
+
+        assert answer(api_client, answer_set, question, 3).status_code == status.HTTP_201_CREATED
+        answer(api_client, answer_set, question, 4)
+        assert counts(questionnaire) == (1, 1)
+
+        answer_set.delete()
+        assert counts(questionnaire) == (0, 1)
+
+    def test_question_added_after_answer_sets_fills_empty_sets(self):
+        questionnaire = baker.make(Questionnaire, timer=None)
+        baker.make(AnswerSet, questionnaire=questionnaire, _quantity=2)
+
+        baker.make(IntegerRangeQuestion, questionnaire=questionnaire, min=0, max=10)
+
+        assert counts(questionnaire) == (2, 1)
+
+    def test_saving_a_stale_instance_keeps_the_counters(self):
+        questionnaire = baker.make(Questionnaire, timer=None)
+        baker.make(IntegerRangeQuestion, questionnaire=questionnaire, min=0, max=10)
+
+        questionnaire.name = 'renamed'
+        questionnaire.save()
+
+        assert counts(questionnaire) == (0, 1)
+        assert questionnaire.name == 'renamed'
+
+    def test_deleting_the_only_answered_question_empties_the_answer_sets(self, api_client):
+        questionnaire = baker.make(Questionnaire, timer=None)
+        question = baker.make(IntegerRangeQuestion, questionnaire=questionnaire, min=0, max=10)
+        answer(api_client, baker.make(AnswerSet, questionnaire=questionnaire), question, 3)
+
+        question.delete()
+
+        assert counts(questionnaire) == (0, 0)
+
+    def test_reconcile_command_fixes_drifted_counters(self, api_client):
+        questionnaire = baker.make(Questionnaire, timer=None)
+        question = baker.make(IntegerRangeQuestion, questionnaire=questionnaire, min=0, max=10)
+        answer(api_client, baker.make(AnswerSet, questionnaire=questionnaire), question, 3)
+        Questionnaire.objects.filter(id=questionnaire.id).update(answer_count=7, question_count=0)
+
+        call_command('reconcile_questionnaire_counters')
+
+        assert counts(questionnaire) == (1, 1)
+
+    def test_random_questionnaires_read_the_counters(self, api_client):
+        questionnaire = baker.make(Questionnaire, uuid='c168ea52-7796-4a17-b7df-74a66d2df53a', timer=None)
+        Questionnaire.objects.filter(id=questionnaire.id).update(answer_count=3, question_count=2)
+
+        response = api_client.get('/question-api/questionnaires/get-random-questionnaires/')
+
+        assert response.status_code == status.HTTP_200_OK
+        listed = response.data[0]['questionnaires'][0]
+        assert (listed['answer_count'], listed['question_count']) == (3, 2)
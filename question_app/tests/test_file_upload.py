@@ -0,0 +1,81 @@
+import pytest
+from model_bakery import baker
+from rest_framework import status
+
+from question_app.models import Questionnaire, AnswerSet, Answer, FileQuestion, FileUpload
+
+
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+
+
+def answer_set_url(answer_set, path):
+    return f'/question-api/questionnaires/{answer_set.questionnaire.uuid}/answer-sets/{answer_set.id}/{path}/'
+
+
+def start(api_client, answer_set, question, size):
+    return api_client.post(answer_set_url(answer_set, 'uploads'),
+                           {'question': question.id, 'file_name': 'report.pdf', 'size': size}, format='json')
+
+
+def send_chunk(api_client, answer_set, upload_id, offset, chunk):
+    return api_client.patch(answer_set_url(answer_set, f'uploads/{upload_id}'), chunk,
+                            content_type='application/octet-stream', HTTP_UPLOAD_OFFSET=str(offset))
+
+
+def file_question_answer_set(max_volume=1, volume_unit=FileQuestion.kilo_byte):
+    questionnaire = baker.make(Questionnaire, timer=None)
+    question = baker.make(FileQuestion, questionnaire=questionnaire, max_volume=max_volume, volume_unit=volume_unit,
+                          is_required=True)
+    return question, baker.make(AnswerSet, questionnaire=questionnaire)
+
+
+@pytest.mark.django_db
+class TestChunkedUpload:
+    def test_upload_larger_than_max_volume_is_refused_at_start(self, api_client):
+        question, answer_set = file_question_answer_set()
+
+        response = start(api_client, answer_set, question, 1025)
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_chunks_resume_from_received_offset_and_answer_references_upload(self, api_client):
+        question, answer_set = file_question_answer_set()
+        upload_id = start(api_client, answer_set, question, 6).data['id']
+
+        assert send_chunk(api_client, answer_set, upload_id, 0, b'abc').data['received'] == 3
+        conflict = send_chunk(api_client, answer_set, upload_id, 0, b'abc')
+        resumed = api_client.get(answer_set_url(answer_set, f'uploads/{upload_id}'))
+        send_chunk(api_client, answer_set, upload_id, resumed.data['received'], b'def')
+        completed = api_client.post(answer_set_url(answer_set, f'uploads/{upload_id}/complete'))
+        response = api_client.post(answer_set_url(answer_set, 'add-answer'),
+                                   [{'question': question.id, 'upload': upload_id}], format='json')
+
+        assert conflict.status_code == status.HTTP_409_CONFLICT
+        assert completed.data['status'] == FileUpload.COMPLETED
+        assert response.status_code == status.HTTP_201_CREATED
+        answer = Answer.objects.get(answer_set=answer_set, question=question)
+        assert str(answer.upload_id) == upload_id
+        assert answer.file.read() == b'abcdef'
+
+    def test_bytes_past_the_declared_size_are_refused(self, api_client):
+        question, answer_set = file_question_answer_set()
+        upload_id = start(api_client, answer_set, question, 4).data['id']
+
+        response = send_chunk(api_client, answer_set, upload_id, 0, b'abcdef')
+
+        assert response.status_code == status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+        assert FileUpload.objects.get(id=upload_id).received == 0
+
+    def test_incomplete_upload_can_not_be_answered(self, api_client):
+        question, answer_set = file_question_answer_set()
+        upload_id = start(api_client, answer_set, question, 6).data['id']
+        send_chunk(api_client, answer_set, upload_id, 0, b'abc')
+
+        completed = api_client.post(answer_set_url(answer_set, f'uploads/{upload_id}/complete'))
+        response = api_client.post(answer_set_url(answer_set, 'add-answer'),
+                                   [{'question': question.id, 'upload': upload_id}], format='json')
+
+        assert completed.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
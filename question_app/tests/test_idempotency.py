@@ -0,0 +1,80 @@
+import pytest
+from django.core.cache import cache
+from model_bakery import baker
+from redis import RedisError
+from rest_framework import status
+
+from admin_app.models import PricePack
+from question_app import idempotency
+from question_app.models import Questionnaire, AnswerSet, Answer, IdempotencyRecord, IntegerRangeQuestion
+from user_app.models import Profile
+from wallet_app.models import Transaction
+
+
+def answer_url(answer_set, path='add-answer'):
+    return f'/question-api/questionnaires/{answer_set.questionnaire.uuid}/answer-sets/{answer_set.id}/{path}/'
+
+
+def integer_range_submission():
+    questionnaire = baker.make(Questionnaire, timer=None)
+    question = baker.make(IntegerRangeQuestion, questionnaire=questionnaire, min=0, max=10)
+    answer_set = baker.make(AnswerSet, questionnaire=questionnaire)
+    return answer_set, [{'question': question.id, 'answer': {'integer_range': 4}}]
+
+
+@pytest.mark.django_db
+class TestIdempotentSubmission:
+    def test_retry_replays_the_first_response(self, api_client):
+        answer_set, data = integer_range_submission()
+
+        first = api_client.post(answer_url(answer_set), data, format='json', HTTP_IDEMPOTENCY_KEY='retry')
+        answer_id = Answer.objects.get(answer_set=answer_set).id
+        second = api_client.post(answer_url(answer_set), data, format='json', HTTP_IDEMPOTENCY_KEY='retry')
+
+        assert second.status_code == first.status_code == status.HTTP_201_CREATED
+        assert second.json() == first.json()
+        assert second[idempotency.REPLAY_HEADER] == 'true'
+        assert Answer.objects.get(answer_set=answer_set).id == answer_id
+
+    def test_reused_key_with_another_payload_returns_422(self, api_client):
+        answer_set, data = integer_range_submission()
+        api_client.post(answer_url(answer_set), data, format='json', HTTP_IDEMPOTENCY_KEY='retry')
+        data[0]['answer']['integer_range'] = 5
+
+        response = api_client.post(answer_url(answer_set), data, format='json', HTTP_IDEMPOTENCY_KEY='retry')
+
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+    def test_paid_answer_retry_moves_wallet_balance_once(self, api_client, authenticate):
+        owner = baker.make(Profile)
+        respondent = baker.make(Profile)
+        questionnaire = baker.make(Questionnaire, owner=owner, timer=None, price_pack=baker.make(PricePack, price=100),
+                                   bate_questions=None)
+        question = baker.make(IntegerRangeQuestion, questionnaire=questionnaire, min=0, max=10)
+        answer_set = baker.make(AnswerSet, questionnaire=questionnaire)
+        data = [{'question': question.id, 'answer': {'integer_range': 4}}]
+        authenticate(respondent)
+
+        for _ in range(3):
+            response = api_client.post(answer_url(answer_set, 'add-payed-answer'), data, format='json',
+                                       HTTP_IDEMPOTENCY_KEY='paid')
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert Transaction.objects.count() == 2
+        respondent.wallet.refresh_from_db()
+        assert respondent.wallet.balance == 100
+
+    def test_responses_fall_back_to_the_database_without_redis(self, api_client, monkeypatch):
+        def unavailable(*args, **kwargs):
+            raise RedisError
+
+        for method in ('get', 'set', 'add', 'delete', 'incr'):
+            monkeypatch.setattr(cache, method, unavailable)
+        answer_set, data = integer_range_submission()
+
+        first = api_client.post(answer_url(answer_set), data, format='json', HTTP_IDEMPOTENCY_KEY='retry')
+        second = api_client.post(answer_url(answer_set), data, format='json', HTTP_IDEMPOTENCY_KEY='retry')
+
+        assert IdempotencyRecord.objects.get().status_code == status.HTTP_201_CREATED
+        assert second.json() == first.json()
+        assert second[idempotency.REPLAY_HEADER] == 'true'
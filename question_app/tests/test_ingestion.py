@@ -0,0 +1,166 @@
+import pytest
+from django.db import IntegrityError
+from model_bakery import baker
+from rest_framework import status
+
+from question_app import ingestion
+from question_app.models import Questionnaire, AnswerSet, Answer, AnswerReceipt, IntegerRangeQuestion
+
+
+class MemoryStream:
+    """
+        The handful of redis commands the ingestion stream uses, kept in memory
+    """
+
+    def __init__(self):
+        self.values = {}
+        self.messages = []
+        self.pending = {}
+        self.deliveries = {}
+
+    def set(self, key, value, ex=None):
+        self.values[key] = str(value)
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def xadd(self, stream, fields):
+        message_id = f'{len(self.messages) + 1}-0'
+        self.messages.append((message_id, {key: str(value) for key, value in fields.items()}))
+        return message_id
+
+    def xgroup_create(self, stream, group, id='0', mkstream=False):
+        pass
+
+    def deliver(self, messages):
+        for message_id, _ in messages:
+            self.deliveries[message_id] = self.deliveries.get(message_id, 0) + 1
+        return messages
+
+    def xautoclaim(self, stream, group, consumer, min_idle_time, count=None):
+        """
+            Every pending message counts as idle, as if the claim timeout had passed
+        """
+        return ['0-0', self.deliver(list(self.pending.items())[:count]), []]
+
+    def xreadgroup(self, group, consumer, streams, count=None, block=None):
+        delivered = [message for message in self.messages if message[0] not in self.pending][:count]
+        self.pending.update(delivered)
+        return [[ingestion.STREAM, self.deliver(delivered)]] if delivered else []
+
+    def xpending_range(self, stream, group, min, max, count):
+        if min not in self.pending:
+            return []
+        return [{'message_id': min, 'times_delivered': self.deliveries[min]}]
+
+    def xack(self, stream, group, *message_ids):
+        for message_id in message_ids:
+            self.pending.pop(message_id, None)
+
+    def xdel(self, stream, *message_ids):
+        self.messages = [message for message in self.messages if message[0] not in message_ids]
+
+
+@pytest.fixture(autouse=True)
+def stream(settings, monkeypatch):
+    settings.ANSWER_INGESTION = True
+    memory_stream = MemoryStream()
+    monkeypatch.setattr(ingestion, 'client', lambda: memory_stream)
+    return memory_stream
+
+
+def add_answer_url(answer_set):
+    return f'/question-api/questionnaires/{answer_set.questionnaire.uuid}/answer-sets/{answer_set.id}/add-answer/'
+
+
+def receipt_url(answer_set, receipt):
+    return f'/question-api/questionnaires/{answer_set.questionnaire.uuid}/answer-sets/{answer_set.id}/receipts/' \
+           f'{receipt}/'
+
+
+@pytest.mark.django_db
+class TestAnswerIngestion:
+    def test_valid_submission_is_accepted_without_writing_answers(self, api_client):
+        questionnaire = baker.make(Questionnaire, timer=None)
+        question = baker.make(IntegerRangeQuestion, questionnaire=questionnaire, min=0, max=10)
+        answer_set = baker.make(AnswerSet, questionnaire=questionnaire)
+
+        response = api_client.post(add_answer_url(answer_set),
+                                   [{'question': question.id, 'answer': {'integer_range': 4}}], format='json')
+
+        assert response.status_code == status.HTTP_202_ACCEPTED
+        assert not Answer.objects.filter(answer_set=answer_set).exists()
+        assert api_client.get(receipt_url(answer_set, response.data['receipt'])).data['status'] == ingestion.PENDING
+
+    def test_invalid_submission_is_rejected_synchronously(self, api_client, stream):
+        questionnaire = baker.make(Questionnaire, timer=None)
+        question = baker.make(IntegerRangeQuestion, questionnaire=questionnaire, min=0, max=10)
+        answer_set = baker.make(AnswerSet, questionnaire=questionnaire)
+
+        response = api_client.post(add_answer_url(answer_set),
+                                   [{'question': question.id, 'answer': {'integer_range': 40}}], format='json')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert not stream.messages
+
+    def test_drain_persists_submission_and_confirms_receipt(self, api_client, stream):
+        questionnaire = baker.make(Questionnaire, timer=None)
+        question = baker.make(IntegerRangeQuestion, questionnaire=questionnaire, min=0, max=10)
+        answer_set = baker.make(AnswerSet, questionnaire=questionnaire)
+        response = api_client.post(add_answer_url(answer_set),
+                                   [{'question': question.id, 'answer': {'integer_range': 4}}], format='json')
+
+        assert ingestion.drain('test') == 1
+
+        assert Answer.objects.get(answer_set=answer_set).answer == {'integer_range': 4}
+        assert api_client.get(receipt_url(answer_set, response.data['receipt'])).data['status'] == AnswerReceipt.DONE
+        assert not stream.messages
+
+    def test_redelivered_submission_is_written_once(self, api_client, stream):
+        questionnaire = baker.make(Questionnaire, timer=None)
+        question = baker.make(IntegerRangeQuestion, questionnaire=questionnaire, min=0, max=10)
+        answer_set = baker.make(AnswerSet, questionnaire=questionnaire)
+        api_client.post(add_answer_url(answer_set), [{'question': question.id, 'answer': {'integer_range': 4}}],
+                        format='json')
+        _, fields = stream.messages[0]
+
+        ingestion.persist(fields)
+        Answer.objects.filter(answer_set=answer_set).update(answer={'integer_range': 9})
+        ingestion.persist(fields)
+
+        assert Answer.objects.get(answer_set=answer_set).answer == {'integer_range': 9}
+        assert AnswerReceipt.objects.filter(answer_set=answer_set).count() == 1
+
+    def test_unknown_receipt_returns_404(self, api_client):
+        answer_set = baker.make(AnswerSet)
+
+        response = api_client.get(receipt_url(answer_set, '00000000-0000-0000-0000-000000000000'))
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_failing_submission_is_retried_then_marked_failed(self, api_client, stream, monkeypatch):
+        questionnaire = baker.make(Questionnaire, timer=None)
+        question = baker.make(IntegerRangeQuestion, questionnaire=questionnaire, min=0, max=10)
+        broken, healthy = baker.make(AnswerSet, questionnaire=questionnaire, _quantity=2)
+        receipts = [api_client.post(add_answer_url(answer_set), [{'question': question.id,
+                                                                  'answer': {'integer_range': 4}}],
+                                    format='json').data['receipt'] for answer_set in (broken, healthy)]
+        persist = ingestion.persist
+
+        def failing_persist(fields):
+            if fields['receipt'] == receipts[0]:
+                raise IntegrityError('duplicate key')
+            persist(fields)
+
+        monkeypatch.setattr(ingestion, 'persist', failing_persist)
+
+        ingestion.drain('test')
+
+        assert Answer.objects.filter(answer_set=healthy).exists()
+        assert len(stream.messages) == 1
+        for _ in range(ingestion.MAX_DELIVERIES - 1):
+            ingestion.drain('test')
+        assert not stream.messages and not stream.pending
+        receipt = AnswerReceipt.objects.get(receipt=receipts[0])
+        assert receipt.status == AnswerReceipt.FAILED
+        assert receipt.errors == ingestion.GIVE_UP_ERRORS
@@ -0,0 +1,67 @@
+import datetime
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.utils import timezone
+from model_bakery import baker
+
+from question_app import partitioning
+from question_app.tasks import delete_abandoned_answer_sets
+from question_app.models import Answer, AnswerSet, TextAnswerQuestion
+
+
+def partition_of(answer):
+    with connection.cursor() as cursor:
+        cursor.execute(f'SELECT tableoid::regclass::text FROM {Answer._meta.db_table} WHERE id = %s', [answer.id])
+        return cursor.fetchone()[0]
+
+
+@pytest.mark.django_db
+class TestAnswerPartitioning:
+    def test_convert_keeps_rows_and_routes_new_answers_by_month(self):
+        question = baker.make(TextAnswerQuestion, min=None, max=None)
+        answer_set = baker.make(AnswerSet, questionnaire=question.questionnaire)
+        old = baker.make(Answer, question=question, answer_set=answer_set, answer={'text_answer': 'old'})
+        Answer.objects.filter(id=old.id).update(answered_at=datetime.datetime(2020, 5, 3, tzinfo=datetime.timezone.utc))
+
+        call_command('partition_answers', 'convert')
+        new = baker.make(Answer, question=question, answer_set=answer_set, answer={'text_answer': 'new'})
+
+        with connection.cursor() as cursor:
+            assert partitioning.is_partitioned(cursor)
+        assert partition_of(old) == partitioning.partition_name(datetime.date(2020, 5, 1))
+        assert partition_of(new) == partitioning.partition_name(partitioning.month_start(new.answered_at))
+        assert new.id > old.id
+        assert Answer.objects.filter(search_text__contains='old').get() == old
+
+    def test_detach_removes_old_months_only(self):
+        question = baker.make(TextAnswerQuestion, min=None, max=None)
+        answer_set = baker.make(AnswerSet, questionnaire=question.questionnaire)
+        old, recent = baker.make(Answer, question=question, answer_set=answer_set, _quantity=2)
+        Answer.objects.filter(id=old.id).update(answered_at=datetime.datetime(2020, 5, 3, tzinfo=datetime.timezone.utc))
+        partitioning.convert()
+
+        call_command('partition_answers', 'detach', before='2021-01', archive_schema='answer_archive')
+
+        assert list(Answer.objects.values_list('id', flat=True)) == [recent.id]
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT COUNT(*) FROM answer_archive.{partitioning.partition_name(datetime.date(2020, 5, 1))}')
+            assert cursor.fetchone()[0] == 1
+
+    def test_answer_sets_of_detached_answers_are_not_abandoned(self):
+        question = baker.make(TextAnswerQuestion, min=None, max=None)
+        archived, abandoned = baker.make(AnswerSet, questionnaire=question.questionnaire, _quantity=2)
+        old = baker.make(Answer, question=question, answer_set=archived)
+        Answer.objects.filter(id=old.id).update(answered_at=datetime.datetime(2020, 5, 3, tzinfo=datetime.timezone.utc))
+        AnswerSet.objects.filter(id=archived.id).update(
+            answered_at=datetime.datetime(2020, 5, 3, tzinfo=datetime.timezone.utc))
+        AnswerSet.objects.filter(id=abandoned.id).update(answered_at=timezone.now() - datetime.timedelta(days=2))
+        partitioning.convert()
+        partitioning.detach_before(datetime.date(2021, 1, 1))
+
+        delete_abandoned_answer_sets()
+
+        assert AnswerSet.objects.filter(id=archived.id).exists()
+        assert not AnswerSet.objects.filter(id=abandoned.id).exists()
+        archived.delete()
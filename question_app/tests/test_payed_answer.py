@@ -0,0 +1,70 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from model_bakery import baker
+from rest_framework import status
+
+from admin_app.models import PricePack
+from question_app.models import Questionnaire, AnswerSet, Answer, OptionalQuestion, Option
+from result_app import rollups
+from user_app.models import Profile
+from wallet_app.models import Transaction
+
+
+def bate_questionnaire():
+    questionnaire = baker.make(Questionnaire, owner=baker.make(Profile), timer=None,
+                               price_pack=baker.make(PricePack, price=100))
+    questions = baker.make(OptionalQuestion, questionnaire=questionnaire, _quantity=2)
+    options = [{number: baker.make(Option, optional_question=question, number=number, text=str(number))
+                for number in (1, 2)} for question in questions]
+    questionnaire.bate_questions = [question.id for question in questions]
+    questionnaire.save()
+    return questionnaire, questions, options
+
+
+def submit(api_client, answer_set, questions, options, numbers):
+    data = [{'question': question.id, 'answer': {'selected_options': [question_options[number].id]}}
+            for question, question_options, number in zip(questions, options, numbers)]
+    return api_client.post(f'/question-api/questionnaires/{answer_set.questionnaire.uuid}/answer-sets/'
+                           f'{answer_set.id}/add-payed-answer/', data, format='json')
+
+
+@pytest.mark.django_db
+class TestPayedAnswerBates:
+    def test_contradicting_bates_are_rejected_before_any_answer_or_transfer(self, api_client, authenticate):
+        questionnaire, questions, options = bate_questionnaire()
+        answer_set = baker.make(AnswerSet, questionnaire=questionnaire)
+        authenticate(baker.make(Profile))
+
+        with CaptureQueriesContext(connection) as queries:
+            response = submit(api_client, answer_set, questions, options, (1, 2))
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert not any(query['sql'].startswith(('INSERT', 'UPDATE', 'DELETE')) for query in queries.captured_queries)
+        assert AnswerSet.objects.filter(id=answer_set.id).exists()
+        assert not Answer.objects.exists()
+        assert not Transaction.objects.exists()
+
+    def test_agreeing_bates_are_saved_and_paid(self, api_client, authenticate):
+        questionnaire, questions, options = bate_questionnaire()
+        answer_set = baker.make(AnswerSet, questionnaire=questionnaire)
+        authenticate(baker.make(Profile))
+
+        response = submit(api_client, answer_set, questions, options, (2, 2))
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert Answer.objects.filter(answer_set=answer_set).count() == 2
+        assert Transaction.objects.count() == 2
+
+    def test_bates_answered_earlier_take_part_in_the_check(self, api_client, authenticate):
+        questionnaire, questions, options = bate_questionnaire()
+        answer_set = baker.make(AnswerSet, questionnaire=questionnaire)
+        rollups.record_answers([baker.make(
+            Answer, answer_set=answer_set, question=questions[0],
+            answer={'selected_options': [{'id': options[0][1].id, 'text': '1', 'number': 1}]})])
+        authenticate(baker.make(Profile))
+
+        response = submit(api_client, answer_set, questions[1:], options[1:], (2,))
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert Answer.objects.filter(answer_set=answer_set, question=questions[0]).exists()
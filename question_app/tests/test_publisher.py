@@ -0,0 +1,116 @@
+import json
+import os
+from datetime import timedelta
+
+import pytest
+from django.db import transaction
+from django.utils import timezone
+from model_bakery import baker
+
+from question_app import publisher, tasks
+from question_app.models import Questionnaire, Folder, IntegerRangeQuestion
+
+
+@pytest.fixture(autouse=True)
+def export_settings(settings, tmp_path, monkeypatch):
+    settings.QUESTIONNAIRE_EXPORT = True
+    settings.QUESTIONNAIRE_EXPORT_ROOT = str(tmp_path)
+    settings.QUESTIONNAIRE_EXPORT_BASE_URL = 'http://testserver'
+    monkeypatch.setattr(tasks.export_questionnaire, 'delay', tasks.export_questionnaire)
+
+
+def public_questionnaire(**kwargs):
+    questionnaire = baker.make(Questionnaire, folder=baker.make(Folder), is_active=True, is_delete=False,
+                               pub_date=timezone.now() - timedelta(days=1), timer=None, **kwargs)
+    baker.make(IntegerRangeQuestion, questionnaire=questionnaire, min=0, max=10, media=None)
+    return questionnaire
+
+
+def exported(questionnaire):
+    return publisher.read_manifest().get(str(questionnaire.uuid))
+
+
+@pytest.mark.django_db
+class TestQuestionnairePublisher:
+    def test_export_matches_the_public_endpoint(self, api_client, tmp_path):
+        questionnaire = public_questionnaire()
+
+        version = publisher.export(questionnaire.uuid)
+
+        entry = exported(questionnaire)
+        assert entry['version'] == version
+        with open(tmp_path / entry['file']) as file:
+            data = json.load(file)
+        with open(tmp_path / str(questionnaire.uuid) / publisher.CURRENT) as file:
+            assert json.load(file) == data
+        assert data == api_client.get(f'/question-api/{questionnaire.uuid}/').json()
+
+    def test_edit_publishes_a_new_version(self, tmp_path, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            questionnaire = public_questionnaire()
+        first = exported(questionnaire)['version']
+
+        with django_capture_on_commit_callbacks(execute=True):
+            question = questionnaire.questions.get().integerrangequestion
+            question.title = 'new title'
+            question.save()
+
+        entry = exported(questionnaire)
+        assert entry['version'] != first
+        assert sorted(os.listdir(tmp_path / str(questionnaire.uuid))) == \
+               sorted([publisher.CURRENT, f"{entry['version']}.json"])
+
+    def test_deactivated_questionnaire_is_removed(self, tmp_path, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            questionnaire = public_questionnaire()
+        assert exported(questionnaire) is not None
+
+        with django_capture_on_commit_callbacks(execute=True):
+            questionnaire.is_active = False
+            questionnaire.save()
+
+        assert exported(questionnaire) is None
+        assert not os.path.exists(tmp_path / str(questionnaire.uuid))
+
+    def test_edits_of_one_transaction_export_once(self, monkeypatch, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            questionnaire = public_questionnaire()
+        sent = []
+        monkeypatch.setattr(tasks.export_questionnaire, 'delay', sent.append)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            for title in ('first', 'second'):
+                question = questionnaire.questions.get().integerrangequestion
+                question.title = title
+                question.save()
+        with django_capture_on_commit_callbacks(execute=True):
+            publisher.schedule_export(questionnaire.uuid)
+
+        assert sent == [str(questionnaire.uuid), str(questionnaire.uuid)]
+
+    def test_rolled_back_export_does_not_block_the_next_one(self, monkeypatch, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            questionnaire = public_questionnaire()
+        sent = []
+        monkeypatch.setattr(tasks.export_questionnaire, 'delay', sent.append)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            with pytest.raises(ZeroDivisionError), transaction.atomic():
+                publisher.schedule_export(questionnaire.uuid)
+                1 / 0
+            publisher.schedule_export(questionnaire.uuid)
+
+        assert sent == [str(questionnaire.uuid)]
+
+    def test_sync_removes_ended_and_publishes_started_questionnaires(self, tmp_path):
+        ending = public_questionnaire(end_date=timezone.now() + timedelta(days=1))
+        publisher.export(ending.uuid)
+        Questionnaire.objects.filter(id=ending.id).update(end_date=timezone.now() - timedelta(minutes=1))
+        publisher.update_manifest(ending.uuid, {**exported(ending), 'end_date': timezone.now().isoformat()})
+        starting = public_questionnaire()
+
+        publisher.sync()
+
+        assert exported(ending) is None
+        assert not os.path.exists(tmp_path / str(ending.uuid))
+        assert exported(starting) is not None
@@ -0,0 +1,50 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from model_bakery import baker
+from rest_framework.test import APIRequestFactory
+
+from question_app.models import Questionnaire, OptionalQuestion, Option, SortQuestion, SortOption, \
+    IntegerRangeQuestion, TextAnswerQuestion, QuestionGroup
+from question_app.question_app_serializers.question_serializers import NoGroupQuestionSerializer
+
+
+def questionnaire_with(count):
+    questionnaire = baker.make(Questionnaire, timer=None)
+    for _ in range(count):
+        optional = baker.make(OptionalQuestion, questionnaire=questionnaire, media=None)
+        baker.make(Option, optional_question=optional, _quantity=3)
+        sort = baker.make(SortQuestion, questionnaire=questionnaire, media=None)
+        baker.make(SortOption, sort_question=sort, _quantity=3)
+        baker.make(IntegerRangeQuestion, questionnaire=questionnaire, min=0, max=10, media=None)
+        group = baker.make(QuestionGroup, questionnaire=questionnaire, media=None)
+        baker.make(TextAnswerQuestion, questionnaire=questionnaire, group=group, media=None)
+    return questionnaire
+
+
+def serialize(questionnaire):
+    context = {'request': APIRequestFactory().get('/')}
+    with CaptureQueriesContext(connection) as queries:
+        data = NoGroupQuestionSerializer(questionnaire.questions.all(), many=True, context=context).data
+    return data, len(queries.captured_queries)
+
+
+@pytest.mark.django_db
+class TestQuestionLoader:
+    def test_query_count_does_not_grow_with_question_count(self):
+        _, few = serialize(questionnaire_with(1))
+        _, many = serialize(questionnaire_with(10))
+
+        assert few == many
+
+    def test_children_and_options_are_serialized(self):
+        questionnaire = questionnaire_with(1)
+
+        data, _ = serialize(questionnaire)
+
+        by_type = {item['question']['question_type']: item['question'] for item in data if item['question']}
+        assert set(by_type) == {'optional', 'sort', 'integer_range', 'group'}
+        assert len(by_type['optional']['options']) == 3
+        assert len(by_type['sort']['options']) == 3
+        assert by_type['group']['child_questions'][0]['question']['question_type'] == 'text_answer'
+        assert [item['question'] for item in data].count(None) == 1
@@ -0,0 +1,32 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from model_bakery import baker
+
+from question_app.models import Questionnaire, AnswerSet, Answer, TextAnswerQuestion
+
+
+def creation_queries(answer_sets_count):
+    questionnaire = baker.make(Questionnaire)
+    baker.make(AnswerSet, questionnaire=questionnaire, _quantity=answer_sets_count)
+    with CaptureQueriesContext(connection) as queries:
+        baker.make(TextAnswerQuestion, questionnaire=questionnaire, min=None, max=None)
+    return len(queries.captured_queries)
+
+
+@pytest.mark.django_db
+class TestQuestionCreatedBackfill:
+    def test_new_question_gets_an_empty_answer_in_every_answer_set(self):
+        questionnaire = baker.make(Questionnaire)
+        answer_sets = baker.make(AnswerSet, questionnaire=questionnaire, _quantity=3)
+        baker.make(AnswerSet)
+
+        question = baker.make(TextAnswerQuestion, questionnaire=questionnaire, min=None, max=None)
+
+        answers = Answer.objects.filter(question=question)
+        assert sorted(answers.values_list('answer_set_id', flat=True)) == sorted(
+            answer_set.id for answer_set in answer_sets)
+        assert all(answer.answer is None and answer.search_text == '' for answer in answers)
+
+    def test_query_count_does_not_grow_with_answer_sets(self):
+        assert creation_queries(1) == creation_queries(20)
@@ -1,9 +1,12 @@
 import pytest
 from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from model_bakery import baker
 from rest_framework import status
 from rest_framework.response import Response
 from question_app.models import Questionnaire, OptionalQuestion, Folder
+from user_app.models import Profile
 
 VALID_DATA = {
     "name": "Hello",
@@ -271,3 +274,52 @@ class TestChangeQuestionsPlacements:
                                    data,
                                    format='json')
         assert response.status_code == status.HTTP_200_OK
+
+    def reorder(self, api_client, questionnaire, questions):
+        data = {'placements': [{'question_id': q.id, 'new_placement': len(questions) - index}
+                               for index, q in enumerate(questions)]}
+        with CaptureQueriesContext(connection) as queries:
+            response = api_client.post(
+                f'/question-api/questionnaires/{questionnaire.uuid}/change-questions-placements/', data, format='json')
+        return response, len(queries.captured_queries)
+
+    def test_placements_are_written_in_queries_independent_of_their_count(self, api_client, authenticate):
+        owner = baker.make(Profile)
+        authenticate(owner)
+        questionnaire = baker.make(Questionnaire, owner=owner)
+        few = baker.make(OptionalQuestion, questionnaire=questionnaire, _quantity=2)
+        many = baker.make(OptionalQuestion, questionnaire=questionnaire, _quantity=20)
+
+        self.reorder(api_client, questionnaire, few)
+        _, few_queries = self.reorder(api_client, questionnaire, few)
+        response, many_queries = self.reorder(api_client, questionnaire, many)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert few_queries == many_queries
+        assert [q.placement for q in OptionalQuestion.objects.filter(id__in=[q.id for q in many]).order_by('id')] == \
+               list(range(20, 0, -1))
+
+    def test_if_a_question_is_not_in_questionnaire_returns_404(self, api_client, authenticate):
+        owner = baker.make(Profile)
+        authenticate(owner)
+        questionnaire = baker.make(Questionnaire, owner=owner)
+        question = baker.make(OptionalQuestion, questionnaire=questionnaire, placement=1)
+        other = baker.make(OptionalQuestion, placement=1)
+
+        response, _ = self.reorder(api_client, questionnaire, [question, other])
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+        question.refresh_from_db()
+        assert question.placement == 1
+
+    def test_if_data_is_invalid_returns_400(self, api_client, authenticate):
+        owner = baker.make(Profile)
+        authenticate(owner)
+        questionnaire = baker.make(Questionnaire, owner=owner)
+        question = baker.make(OptionalQuestion, questionnaire=questionnaire)
+
+        response = api_client.post(f'/question-api/questionnaires/{questionnaire.uuid}/change-questions-placements/',
+                                   {'placements': [{'question_id': question.id, 'new_placement': 'first'}]},
+                                   format='json')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
@@ -0,0 +1,78 @@
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from model_bakery import baker
+from rest_framework import status
+
+from question_app.models import Questionnaire, Folder, IntegerRangeQuestion
+
+
+def public_questionnaire():
+    questionnaire = baker.make(Questionnaire, folder=baker.make(Folder), is_active=True, is_delete=False,
+                               pub_date=timezone.now() - timedelta(days=1), end_date=None, timer=None)
+    baker.make(IntegerRangeQuestion, questionnaire=questionnaire, min=0, max=10, media=None)
+    return questionnaire
+
+
+@pytest.mark.django_db
+class TestPublicSnapshot:
+    def test_snapshot_is_served_without_queries(self, api_client, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            questionnaire = public_questionnaire()
+        first = api_client.get(f'/question-api/{questionnaire.uuid}/')
+
+        with CaptureQueriesContext(connection) as queries:
+            second = api_client.get(f'/question-api/{questionnaire.uuid}/')
+
+        assert first.status_code == second.status_code == status.HTTP_200_OK
+        assert second.content == first.content
+        assert second['ETag'] == first['ETag']
+        assert len(first.json()['questions']) == 1
+        assert len(queries.captured_queries) == 0
+
+    def test_matching_etag_returns_304(self, api_client):
+        questionnaire = public_questionnaire()
+        etag = api_client.get(f'/question-api/{questionnaire.uuid}/')['ETag']
+
+        response = api_client.get(f'/question-api/{questionnaire.uuid}/', HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert response['ETag'] == etag
+
+    def test_editing_a_question_renders_a_new_snapshot(self, api_client, django_capture_on_commit_callbacks):
+        questionnaire = public_questionnaire()
+        etag = api_client.get(f'/question-api/{questionnaire.uuid}/')['ETag']
+
+        with django_capture_on_commit_callbacks(execute=True):
+            question = questionnaire.questions.get().integerrangequestion
+            question.title = 'new title'
+            question.save()
+        response = api_client.get(f'/question-api/{questionnaire.uuid}/', HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response['ETag'] != etag
+        assert response.json()['questions'][0]['question']['title'] == 'new title'
+
+    def test_deactivated_questionnaire_returns_403(self, api_client, django_capture_on_commit_callbacks):
+        questionnaire = public_questionnaire()
+        api_client.get(f'/question-api/{questionnaire.uuid}/')
+
+        with django_capture_on_commit_callbacks(execute=True):
+            questionnaire.is_active = False
+            questionnaire.save()
+        response = api_client.get(f'/question-api/{questionnaire.uuid}/')
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_deleting_the_folder_returns_404(self, api_client, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            questionnaire = public_questionnaire()
+        assert api_client.get(f'/question-api/{questionnaire.uuid}/').status_code == status.HTTP_200_OK
+
+        with django_capture_on_commit_callbacks(execute=True):
+            questionnaire.folder.delete()
+
+        assert api_client.get(f'/question-api/{questionnaire.uuid}/').status_code == status.HTTP_404_NOT_FOUND
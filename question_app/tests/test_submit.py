@@ -0,0 +1,92 @@
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+from model_bakery import baker
+from rest_framework import status
+
+from question_app.models import Questionnaire, AnswerSet, Answer, IntegerRangeQuestion, TextAnswerQuestion, \
+    FileQuestion
+from question_app.tasks import delete_abandoned_answer_sets
+
+
+def open_questionnaire():
+    return baker.make(Questionnaire, timer=None, is_active=True, pub_date=timezone.now() - timedelta(days=1))
+
+
+def submit_url(questionnaire):
+    return f'/question-api/questionnaires/{questionnaire.uuid}/answer-sets/submit/'
+
+
+@pytest.mark.django_db
+class TestSubmit:
+    def test_answer_set_and_answers_are_created_in_one_request(self, api_client):
+        questionnaire = open_questionnaire()
+        integer_range = baker.make(IntegerRangeQuestion, questionnaire=questionnaire, min=0, max=10)
+        text = baker.make(TextAnswerQuestion, questionnaire=questionnaire, min=None, max=None)
+
+        response = api_client.post(submit_url(questionnaire), [
+            {'question': integer_range.id, 'answer': {'integer_range': 3}},
+            {'question': text.id, 'answer': {'text_answer': 'متن'}},
+        ], format='json')
+
+        assert response.status_code == status.HTTP_201_CREATED
+        answer_set = AnswerSet.objects.get(questionnaire=questionnaire)
+        assert response.data['id'] == answer_set.id
+        assert Answer.objects.filter(answer_set=answer_set).count() == 2
+
+    def test_invalid_answer_creates_nothing(self, api_client):
+        questionnaire = open_questionnaire()
+        integer_range = baker.make(IntegerRangeQuestion, questionnaire=questionnaire, min=0, max=10)
+
+        response = api_client.post(submit_url(questionnaire),
+                                   [{'question': integer_range.id, 'answer': {'integer_range': 30}}], format='json')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert not AnswerSet.objects.exists()
+
+    def test_empty_submission_returns_400(self, api_client):
+        questionnaire = open_questionnaire()
+
+        response = api_client.post(submit_url(questionnaire), [], format='json')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert not AnswerSet.objects.exists()
+
+    def test_inactive_questionnaire_returns_400(self, api_client):
+        questionnaire = baker.make(Questionnaire, timer=None, is_active=False)
+        integer_range = baker.make(IntegerRangeQuestion, questionnaire=questionnaire, min=0, max=10)
+
+        response = api_client.post(submit_url(questionnaire),
+                                   [{'question': integer_range.id, 'answer': {'integer_range': 3}}], format='json')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'questionnaire' in response.data
+        assert not AnswerSet.objects.exists()
+
+    def test_questionnaire_with_required_file_question_returns_400(self, api_client):
+        questionnaire = open_questionnaire()
+        integer_range = baker.make(IntegerRangeQuestion, questionnaire=questionnaire, min=0, max=10)
+        baker.make(FileQuestion, questionnaire=questionnaire, is_required=True)
+
+        response = api_client.post(submit_url(questionnaire),
+                                   [{'question': integer_range.id, 'answer': {'integer_range': 3}}], format='json')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'message' in response.data
+        assert not AnswerSet.objects.exists()
+
+
+@pytest.mark.django_db
+class TestAbandonedAnswerSets:
+    def test_only_old_answer_sets_without_answers_are_deleted(self):
+        questionnaire = baker.make(Questionnaire)
+        question = baker.make(IntegerRangeQuestion, questionnaire=questionnaire, min=0, max=10)
+        abandoned, answered, recent = baker.make(AnswerSet, questionnaire=questionnaire, _quantity=3)
+        baker.make(Answer, answer_set=answered, question=question)
+        AnswerSet.objects.filter(id__in=[abandoned.id, answered.id]).update(
+            answered_at=timezone.now() - timedelta(days=2))
+
+        delete_abandoned_answer_sets()
+
+        assert set(AnswerSet.objects.values_list('id', flat=True)) == {answered.id, recent.id}
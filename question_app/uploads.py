@@ -0,0 +1,54 @@
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.utils import timezone
+
+from question_app.models import FileUpload
+
+READ_SIZE = 64 * 1024
+
+
+class UploadTooLarge(Exception):
+    pass
+
+
+def start_upload(answer_set, question, file_name, size):
+    """
+        Reserves an empty file under answer_file/ for a chunked upload
+    """
+    upload = FileUpload(answer_set=answer_set, question=question, file_name=file_name, size=size)
+    upload.file.name = default_storage.save(upload.file.field.generate_filename(upload, file_name), ContentFile(b''))
+    upload.save()
+    return upload
+
+
+def append_chunk(upload: FileUpload, stream):
+    """
+        Appends the request body to the upload file in READ_SIZE blocks and stops as soon as the upload would grow past
+        its declared size, so neither the chunk nor the file is ever held in memory
+    """
+    received = upload.received
+    if stream is None:
+        return received
+    path = default_storage.path(upload.file.name)
+    with open(path, 'r+b') as file:
+        file.seek(received)
+        while True:
+            block = stream.read(READ_SIZE)
+            if not block:
+                break
+            if received + len(block) > upload.size:
+                file.truncate(upload.received)
+                raise UploadTooLarge
+            file.write(block)
+            received += len(block)
+        file.truncate(received)
+    upload.received = received
+    upload.save(update_fields=['received'])
+    return received
+
+
+def complete_upload(upload: FileUpload):
+    upload.status = FileUpload.COMPLETED
+    upload.completed_at = timezone.now()
+    upload.save(update_fields=['status', 'completed_at'])
+    return upload
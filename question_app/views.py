@@ -1,7 +1,9 @@
 from uuid import UUID
 
 from django.db.models import Q
+from django.http import HttpResponse, HttpResponseNotModified
 from django.utils import timezone
+from django.utils.http import parse_etags
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import viewsets
 from rest_framework.decorators import action
@@ -10,12 +12,16 @@ from rest_framework.permissions import AllowAny
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from redis import RedisError
 
 from interview_app.models import Interview
 from wallet_app.models import Transaction
+from . import ingestion, placements, snapshots, uploads
+from .answer_validation import questionnaire_questions
 from .copy_template import copy_template_questionnaire
+from .idempotency import idempotent
 from .permissions import *
-from .question_app_serializers.answer_serializers import AnswerSetSerializer, AnswerSerializer
+from .question_app_serializers.answer_serializers import AnswerSetSerializer, AnswerSerializer, FileUploadSerializer
 from .question_app_serializers.general_serializers import *
 from .question_app_serializers.question_serializers import *
 from question_app.models import Question
@@ -52,21 +58,25 @@ class PublicQuestionnaireViewSet(viewsets.mixins.RetrieveModelMixin, viewsets.Ge
 
         super(PublicQuestionnaireViewSet, self).initial(request, *args, **kwargs)
 
-    def retrieve(self, request, *args, **kwargs):
+    def build_snapshot(self):
         instance = self.get_object()
-        if instance.is_active and instance.pub_date <= timezone.now():
-            if instance.end_date:
-                if instance.end_date >= timezone.now():
-                    serializer = self.get_serializer(instance)
-                    return Response(serializer.data)
-                else:
-                    return Response({"detail": "پرسشنامه فعال نیست یا امکان پاسخ دهی به آن وجود ندارد"},
-                                    status.HTTP_403_FORBIDDEN)
-            serializer = self.get_serializer(instance)
-            return Response(serializer.data)
-        else:
+        return snapshots.render(self.get_serializer(instance).data, is_active=instance.is_active,
+                                pub_date=instance.pub_date, end_date=instance.end_date)
+
+    def retrieve(self, request, *args, **kwargs):
+        """
+            Serves the precomputed snapshot of the questionnaire, or 304 when the client already has it
+        """
+        snapshot = snapshots.snapshot(kwargs['uuid'], f'{request.scheme}://{request.get_host()}', self.build_snapshot)
+        now = timezone.now()
+        if not snapshot['is_active'] or snapshot['pub_date'] is None or snapshot['pub_date'] > now or \
+                (snapshot['end_date'] and snapshot['end_date'] < now):
             return Response({"detail": "پرسشنامه فعال نیست یا امکان پاسخ دهی به آن وجود ندارد"},
                             status.HTTP_403_FORBIDDEN)
+        etags = parse_etags(request.headers.get('If-None-Match', ''))
+        if '*' in etags or snapshot['etag'] in etags:
+            return HttpResponseNotModified(headers={'ETag': snapshot['etag']})
+        return HttpResponse(snapshot['body'], content_type='application/json', headers={'ETag': snapshot['etag']})
 
 
 class QuestionnaireViewSet(viewsets.ModelViewSet):
@@ -99,8 +109,8 @@ class QuestionnaireViewSet(viewsets.ModelViewSet):
                     'uuid': obj.uuid,
                     'pub_date': obj.pub_date,
                     'created_at': obj.created_at,
-                    'answer_count': 10,
-                    'question_count': obj.questions.count(),
+                    'answer_count': obj.answer_count,
+                    'question_count': obj.question_count,
                     'is_active': obj.is_active,
                 }
             )
@@ -387,26 +397,127 @@ class AnswerSetViewSet(viewsets.mixins.CreateModelMixin,
     serializer_class = AnswerSetSerializer
     permission_classes = (AllowAny,)
 
+    @action(methods=['post'], detail=False, permission_classes=[AllowAny], url_path='submit')
+    @idempotent
+    def submit(self, request, questionnaire_uuid):
+        """
+            Creates the answer set and all of its answers from one request, or nothing at all when anything is invalid.
+            Files are uploaded to an existing answer set, so questionnaires with a required file question must use the
+            answer set and add-answer endpoints instead.
+        """
+        questionnaire = get_object_or_404(Questionnaire, uuid=questionnaire_uuid)
+        AnswerSetSerializer.validate_questionnaire_is_open(questionnaire)
+        if any(question.question_type == 'file' and question.is_required
+               for question in questionnaire_questions(questionnaire).values()):
+            return Response({'message': 'پرسشنامه های دارای سوال آپلود فایل اجباری را باید با ساخت دسته جواب و ثبت '
+                                        'پاسخ ها پاسخ داد'}, status=status.HTTP_400_BAD_REQUEST)
+        if not isinstance(request.data, list) or not request.data:
+            return Response({'message': 'لیست پاسخ ها نباید خالی باشد'}, status=status.HTTP_400_BAD_REQUEST)
+        answer_set = AnswerSet(questionnaire=questionnaire, answered_at=timezone.now())
+        answers = AnswerSerializer(data=request.data, many=True,
+                                   context={'answer_set': answer_set, 'cached_metadata': True})
+        answers.is_valid(raise_exception=True)
+        with transaction.atomic():
+            answer_set.save()
+            answers.save()
+        return Response(self.get_serializer(answer_set).data, status=status.HTTP_201_CREATED)
+
     @action(methods=['post'], detail=True, permission_classes=[AnonPOSTOrOwner], url_path='add-answer')
-    @transaction.atomic()
+    @idempotent
     def add_answer(self, request, questionnaire_uuid, pk):
         answer_set = self.get_object()
-        answers = AnswerSerializer(data=request.data, many=True, context={'answer_set': answer_set})
-        answers.is_valid(raise_exception=True)
-        answers.save()
+        if ingestion.enabled() and not request.FILES:
+            answers = AnswerSerializer(data=request.data, many=True,
+                                       context={'answer_set': answer_set, 'cached_metadata': True})
+            answers.is_valid(raise_exception=True)
+            try:
+                receipt = ingestion.enqueue(answer_set, request.data)
+                return Response({'receipt': receipt, 'status': ingestion.PENDING}, status=status.HTTP_202_ACCEPTED)
+            except RedisError:
+                pass
+        with transaction.atomic():
+            answers = AnswerSerializer(data=request.data, many=True, context={'answer_set': answer_set})
+            answers.is_valid(raise_exception=True)
+            answers.save()
         answer_set.refresh_from_db()
         return Response(self.get_serializer(answer_set).data, status=status.HTTP_201_CREATED)
 
+    @action(methods=['post'], detail=True, permission_classes=[AllowAny], url_path='uploads')
+    def start_upload(self, request, questionnaire_uuid, pk):
+        answer_set = self.get_object()
+        serializer = FileUploadSerializer(data=request.data, context={'answer_set': answer_set})
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    @action(methods=['get', 'patch'], detail=True, permission_classes=[AllowAny],
+            url_path=r'uploads/(?P<upload_id>[0-9a-f-]{36})')
+    def upload(self, request, questionnaire_uuid, pk, upload_id):
+        """
+            GET reports how many bytes arrived so far, PATCH appends the request body at the Upload-Offset header
+        """
+        answer_set = self.get_object()
+        if request.method == 'GET':
+            upload = get_object_or_404(FileUpload, id=upload_id, answer_set=answer_set)
+            return Response(FileUploadSerializer(upload).data)
+        with transaction.atomic():
+            upload = get_object_or_404(FileUpload.objects.select_for_update(), id=upload_id, answer_set=answer_set)
+            if upload.status == FileUpload.COMPLETED:
+                return Response({'message': 'بارگذاری این فایل کامل شده است'}, status=status.HTTP_400_BAD_REQUEST)
+            try:
+                offset = int(request.headers.get('Upload-Offset'))
+            except (TypeError, ValueError):
+                return Response({'message': 'سرآیند Upload-Offset الزامی است'}, status=status.HTTP_400_BAD_REQUEST)
+            if offset != upload.received:
+                return Response({'message': 'محل شروع قطعه با حجم دریافت شده یکسان نیست', 'received': upload.received},
+                                status=status.HTTP_409_CONFLICT)
+            try:
+                uploads.append_chunk(upload, request.stream)
+            except uploads.UploadTooLarge:
+                return Response({'message': 'حجم دریافت شده از حجم اعلام شده فایل بیشتر است'},
+                                status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        return Response(FileUploadSerializer(upload).data)
+
+    @action(methods=['post'], detail=True, permission_classes=[AllowAny],
+            url_path=r'uploads/(?P<upload_id>[0-9a-f-]{36})/complete')
+    def complete_upload(self, request, questionnaire_uuid, pk, upload_id):
+        answer_set = self.get_object()
+        upload = get_object_or_404(FileUpload, id=upload_id, answer_set=answer_set)
+        if upload.received != upload.size:
+            return Response({'message': 'فایل به طور کامل بارگذاری نشده است', 'received': upload.received},
+                            status=status.HTTP_400_BAD_REQUEST)
+        uploads.complete_upload(upload)
+        return Response(FileUploadSerializer(upload).data)
+
+    @action(methods=['get'], detail=True, permission_classes=[AllowAny],
+            url_path=r'receipts/(?P<receipt>[0-9a-f-]{36})')
+    def receipt(self, request, questionnaire_uuid, pk, receipt):
+        answer_set = self.get_object()
+        try:
+            receipt_status = ingestion.receipt_status(answer_set, receipt)
+        except RedisError:
+            return Response({'message': 'وضعیت رسید در حال حاضر قابل بررسی نیست'},
+                            status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        if receipt_status is None:
+            return Response({'message': 'رسید یافت نشد'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(receipt_status)
+
     @action(methods=['post'], detail=True, permission_classes=[IsAuthenticated], url_path='add-payed-answer')
+    @idempotent
     def add_payed_answer(self, request, questionnaire_uuid, pk):
         answer_set: AnswerSet = self.get_object()
-        answer_set.answered_by = request.user.profile
-        answer_set.save()
         questionnaire = answer_set.questionnaire
-        answers = AnswerSerializer(data=request.data, many=True, context={'answer_set': answer_set, 'request': request})
+        if not questionnaire.price_pack:
+            return Response({"detail": "پرسشنامه تعیین قیمت نشده است"}, status=status.HTTP_400_BAD_REQUEST)
+        context = {'answer_set': answer_set, 'request': request}
+        answers = AnswerSerializer(data=request.data, many=True, context=context)
         answers.is_valid(raise_exception=True)
-        answers.save()
-        if questionnaire.price_pack:
+        if not context['validation_context'].bates_agree(answers.validated_data):
+            return Response({"detail": "پاسخ های شما با هم تناقض دارند"}, status=status.HTTP_400_BAD_REQUEST)
+        with transaction.atomic():
+            answer_set.answered_by = request.user.profile
+            answer_set.save()
+            answers.save()
             price = questionnaire.price_pack.price
             user_wallet = request.user.profile.wallet
             employer_wallet = answer_set.questionnaire.owner.wallet
@@ -432,20 +543,7 @@ class AnswerSetViewSet(viewsets.mixins.CreateModelMixin,
                 amount=price,
                 wallet=employer_wallet
             )
-        else:
-            return Response({"detail": "پرسشنامه تعیین قیمت نشده است"}, status=status.HTTP_400_BAD_REQUEST)
         answer_set.refresh_from_db()
-        bates = questionnaire.bate_questions
-        if bates is not None and len(bates) > 0:
-            bate_answers = answer_set.answers.filter(question__pk__in=bates).values_list('answer', flat=True)
-            option_numbers = []
-            for answer in bate_answers:
-                for selected_option in answer.get('selected_options'):
-                    option_numbers.append(selected_option.get('number'))
-            if len(set(option_numbers)) > 1:
-                answer_set.delete()
-                return Response({"detail": "پاسخ های شما با هم تناقض دارند"}, status=status.HTTP_400_BAD_REQUEST)
-
         return Response(self.get_serializer(answer_set).data, status=status.HTTP_201_CREATED)
 
     def get_queryset(self):
@@ -518,14 +616,9 @@ class ChangeQuestionsPlacements(APIView):
 
     @transaction.atomic()
     def post(self, request, questionnaire_uuid):
-        placements = request.data.get('placements')
         try:
-            for placement in placements:
-                question = get_object_or_404(Question, id=placement.get('question_id'),
-                                             questionnaire__uuid=questionnaire_uuid)
-                question.placement = int(placement.get('new_placement'))
-                question.save()
-        except TypeError:
+            placements.reorder_questions(questionnaire_uuid, request.data.get('placements'))
+        except (TypeError, ValueError, AttributeError):
             return Response({'message': 'لطفا اطلاعات را به درستی وارد کنید'}, status=status.HTTP_400_BAD_REQUEST)
         return Response(status=status.HTTP_200_OK)
 
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class ResultAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'result_app'
+
+    def ready(self):
+        import result_app.signals
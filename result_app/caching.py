@@ -0,0 +1,78 @@
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+from redis import RedisError
+
+from porsline_config import versions
+
+RESULT_CACHE_TIMEOUT = 60 * 10
+RECOMPUTE_LOCK_TIMEOUT = 30
+RECOMPUTE_POLL_INTERVAL = 0.05
+STATISTICS_KEYS = ('hits', 'misses')
+
+
+def version_key(questionnaire_uuid):
+    return f'result:version:{questionnaire_uuid}'
+
+
+def data_version(questionnaire_uuid):
+    return versions.current(version_key(questionnaire_uuid))
+
+
+def bump_data_version(questionnaire_uuid):
+    """
+        Outdates the cached results of the questionnaire once the running transaction commits, so a request between the
+        bump and the commit cannot cache results of the old rows under the new version
+    """
+    transaction.on_commit(lambda: versions.bump(version_key(questionnaire_uuid)))
+
+
+def count(name):
+    key = f'result:cache:{name}'
+    cache.add(key, 0, timeout=None)
+    cache.incr(key)
+
+
+def statistics():
+    try:
+        values = cache.get_many([f'result:cache:{name}' for name in STATISTICS_KEYS])
+    except RedisError:
+        values = {}
+    return {name: values.get(f'result:cache:{name}', 0) for name in STATISTICS_KEYS}
+
+
+def cached(questionnaire_uuid, name, compute, params='', version=data_version):
+    """
+        Returns the cached result of compute for the current version of the questionnaire, its data version unless
+        another version function is given. On a miss only one caller recomputes while the others wait for its result.
+    """
+    try:
+        key = f'result:{name}:{questionnaire_uuid}:{version(questionnaire_uuid)}:{params}'
+        value = cache.get(key)
+        if value is not None:
+            count('hits')
+            return value
+        count('misses')
+        lock_key = f'{key}:lock'
+        if not cache.add(lock_key, 1, timeout=RECOMPUTE_LOCK_TIMEOUT):
+            deadline = time.monotonic() + RECOMPUTE_LOCK_TIMEOUT
+            while time.monotonic() < deadline:
+                time.sleep(RECOMPUTE_POLL_INTERVAL)
+                value = cache.get(key)
+                if value is not None:
+                    return value
+            return compute()
+    except RedisError:
+        return compute()
+    try:
+        value = compute()
+        cache.set(key, value, timeout=RESULT_CACHE_TIMEOUT)
+    except RedisError:
+        pass
+    finally:
+        try:
+            cache.delete(lock_key)
+        except RedisError:
+            pass
+    return value
@@ -0,0 +1,118 @@
+import math
+
+import numpy as np
+from django.db import connection
+
+from question_app.models import Answer
+from result_app.rollups import CHOICE_QUESTIONS, NUMBER_QUESTIONS
+
+CROSSTAB_QUESTIONS = CHOICE_QUESTIONS + NUMBER_QUESTIONS
+DEFAULT_BINS = 5
+MAX_BINS = 20
+
+CHOICE_CATEGORY_SQL = '''
+    SELECT unnest({alias}.option_ids)
+'''
+NUMBER_CATEGORY_SQL = '''
+    SELECT LEAST(width_bucket({alias}.numeric_value, %s, %s, %s), %s)
+    WHERE {alias}.numeric_value IS NOT NULL
+'''
+CROSSTAB_SQL = '''
+    SELECT row_category.value, column_category.value, COUNT(*)
+    FROM {answer_table} AS row_answer
+    JOIN {answer_table} AS column_answer ON column_answer.answer_set_id = row_answer.answer_set_id
+    CROSS JOIN LATERAL ({row_category}) AS row_category(value)
+    CROSS JOIN LATERAL ({column_category}) AS column_category(value)
+    WHERE row_answer.question_id = %s AND column_answer.question_id = %s
+    GROUP BY 1, 2
+'''
+
+
+def categories(question, bins):
+    """
+        The categories of one side of the table and the SQL that maps an answer to them
+    """
+    if question.question_type in CHOICE_QUESTIONS:
+        options = question.optionalquestion.options.all() if question.question_type == 'optional' else \
+            question.dropdownquestion.options.all()
+        return [{'id': option.id, 'text': option.text} for option in options], CHOICE_CATEGORY_SQL, []
+    aggregate = getattr(question, 'aggregate', None)
+    low = aggregate.minimum if aggregate and aggregate.minimum is not None else 0
+    high = aggregate.maximum if aggregate and aggregate.maximum is not None else low
+    if high <= low:
+        high = low + 1
+    width = (high - low) / bins
+    labels = [{'id': number, 'minimum': low + (number - 1) * width, 'maximum': low + number * width}
+              for number in range(1, bins + 1)]
+    return labels, NUMBER_CATEGORY_SQL, [low, high, bins, bins]
+
+
+def chi_square_p_value(chi_square, degrees_of_freedom):
+    """
+        Upper tail of the chi-square distribution through the regularized incomplete gamma function
+    """
+    if degrees_of_freedom <= 0:
+        return None
+    a, x = degrees_of_freedom / 2, chi_square / 2
+    if x <= 0:
+        return 1.0
+    if x < a + 1:
+        term = total = 1 / a
+        for n in range(1, 1000):
+            term *= x / (a + n)
+            total += term
+            if abs(term) < abs(total) * 1e-12:
+                break
+        return max(0.0, 1 - total * math.exp(-x + a * math.log(x) - math.lgamma(a)))
+    b = x + 1 - a
+    c = 1 / 1e-300
+    d = 1 / b
+    h = d
+    for n in range(1, 1000):
+        an = -n * (n - a)
+        b += 2
+        d = an * d + b
+        d = 1e-300 if abs(d) < 1e-300 else d
+        c = b + an / c
+        c = 1e-300 if abs(c) < 1e-300 else c
+        d = 1 / d
+        delta = d * c
+        h *= delta
+        if abs(delta - 1) < 1e-12:
+            break
+    return min(1.0, math.exp(-x + a * math.log(x) - math.lgamma(a)) * h)
+
+
+def crosstab(row_question, column_question, row_bins=DEFAULT_BINS, column_bins=DEFAULT_BINS):
+    rows, row_sql, row_params = categories(row_question, row_bins)
+    columns, column_sql, column_params = categories(column_question, column_bins)
+    row_index = {row['id']: index for index, row in enumerate(rows)}
+    column_index = {column['id']: index for index, column in enumerate(columns)}
+    table = np.zeros((len(rows), len(columns)), dtype=np.int64)
+    sql = CROSSTAB_SQL.format(answer_table=Answer._meta.db_table, row_category=row_sql.format(alias='row_answer'),
+                              column_category=column_sql.format(alias='column_answer'))
+    with connection.cursor() as cursor:
+        cursor.execute(sql, row_params + column_params + [row_question.id, column_question.id])
+        for row_category, column_category, count in cursor.fetchall():
+            if row_category in row_index and column_category in column_index:
+                table[row_index[row_category], column_index[column_category]] += count
+    row_totals = table.sum(axis=1)
+    column_totals = table.sum(axis=0)
+    total = int(table.sum())
+    chi_square = None
+    degrees_of_freedom = (int((row_totals > 0).sum()) - 1) * (int((column_totals > 0).sum()) - 1)
+    if total:
+        expected = np.outer(row_totals, column_totals) / total
+        observed = expected > 0
+        chi_square = float((((table - expected) ** 2)[observed] / expected[observed]).sum())
+    return {
+        'rows': rows,
+        'columns': columns,
+        'counts': table.tolist(),
+        'row_totals': row_totals.tolist(),
+        'column_totals': column_totals.tolist(),
+        'total': total,
+        'chi_square': chi_square,
+        'degrees_of_freedom': max(degrees_of_freedom, 0),
+        'p_value': chi_square_p_value(chi_square, degrees_of_freedom) if chi_square is not None else None,
+    }
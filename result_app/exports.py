@@ -0,0 +1,108 @@
+import csv
+import os
+import tempfile
+
+from django.db.models import Prefetch
+
+from question_app.models import Answer
+
+EXPORT_CHUNK_SIZE = 500
+NO_COLUMN_QUESTIONS = ('group', 'no_answer')
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+class Echo:
+    """
+        File-like object for csv.writer that hands back each written line instead of storing it
+    """
+    def write(self, value):
+        return value
+
+
+def export_questions(questionnaire):
+    return list(questionnaire.questions.exclude(question_type__in=NO_COLUMN_QUESTIONS).order_by('placement', 'id'))
+
+
+def cell_value(question_type, answer_body, file):
+    if question_type == 'file':
+        try:
+            return file.url if file else ''
+        except ValueError:
+            return ''
+    if not answer_body:
+        return ''
+    match question_type:
+        case 'optional':
+            texts = [option.get('text') for option in answer_body.get('selected_options') or []]
+            if answer_body.get('other_text'):
+                texts.append(answer_body.get('other_text'))
+            return ' | '.join(str(text) for text in texts)
+        case 'drop_down':
+            return ' | '.join(str(option.get('text')) for option in answer_body.get('selected_options') or [])
+        case 'sort':
+            return ' | '.join(str(option.get('text')) for option in answer_body.get('sorted_options') or [])
+        case _:
+            value = answer_body.get(question_type)
+            return '' if value is None else value
+
+
+def export_rows(questions, answer_sets, answers=None):
+    """
+        Yields the header and then one row per answer set, reading answer sets from a server side cursor. answers
+        narrows the prefetched answers, e.g. to the date bound of the answer set filter.
+    """
+    yield ['شناسه', 'زمان پاسخگویی'] + [question.title for question in questions]
+    question_types = {question.id: question.question_type for question in questions}
+    answers = Answer.objects.all() if answers is None else answers
+    answers = Prefetch('answers', queryset=answers.filter(question_id__in=question_types.keys()).only(
+        'answer_set_id', 'question_id', 'answer', 'file'))
+    for answer_set in answer_sets.prefetch_related(answers).iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        cells = {answer.question_id: cell_value(question_types[answer.question_id], answer.answer, answer.file)
+                 for answer in answer_set.answers.all()}
+        yield [answer_set.id, answer_set.answered_at.isoformat()] + [cells.get(question.id, '') for question in
+                                                                   questions]
+
+
+def escape_formula(value):
+    """
+        Prefixes text that a spreadsheet would evaluate as a formula with ', so answers and titles stay plain text
+    """
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return f"'{value}"
+    return value
+
+
+def csv_rows(rows):
+    for row in rows:
+        yield [escape_formula(value) for value in row]
+
+
+def csv_stream(rows):
+    writer = csv.writer(Echo())
+    yield '\ufeff'
+    for row in csv_rows(rows):
+        yield writer.writerow(row)
+
+
+def write_xlsx(rows, path):
+    """
+        Writes the rows with XlsxWriter in constant memory mode, so only the current row is held in memory. Text is
+        always written as a string, never as a formula.
+    """
+    import xlsxwriter
+
+    workbook = xlsxwriter.Workbook(path, {'constant_memory': True, 'tmpdir': os.path.dirname(path),
+                                          'strings_to_formulas': False})
+    worksheet = workbook.add_worksheet()
+    for row_number, row in enumerate(rows):
+        worksheet.write_row(row_number, 0, row)
+    workbook.close()
+
+
+def xlsx_stream(rows, chunk_size=64 * 1024):
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'export.xlsx')
+        write_xlsx(rows, path)
+        with open(path, 'rb') as file:
+            while chunk := file.read(chunk_size):
+                yield chunk
@@ -1,12 +1,94 @@
+import datetime
+
 import django_filters
+from django import forms
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from question_app.models import AnswerSet, Answer, Question
+
+OPTION_QUESTIONS = ('optional', 'drop_down')
+NUMBER_QUESTIONS = ('number_answer', 'integer_range', 'integer_selective')
+TEXT_QUESTIONS = ('text_answer', 'email_field', 'link')
+RANGE_LOOKUPS = ('gt', 'gte', 'lt', 'lte')
+
+
+class AnswerValueField(forms.Field):
+    """
+        Parses repeated question_id:operator:value parameters such as 12:option:17 or 14:gte:8
+    """
+    widget = forms.MultipleHiddenInput
 
-from question_app.models import AnswerSet
+    def to_python(self, value):
+        predicates = []
+        for item in value or []:
+            try:
+                question_id, operator, operand = item.split(':', 2)
+                question_id = int(question_id)
+                if operator == 'option':
+                    operand = int(operand)
+                elif operator in RANGE_LOOKUPS:
+                    operand = float(operand)
+                elif operator != 'eq':
+                    raise ValueError
+            except ValueError:
+                raise forms.ValidationError('فیلتر پاسخ باید به شکل شناسه سوال:عملگر:مقدار باشد')
+            predicates.append((question_id, operator, operand))
+        return predicates
+
+
+class AnswerValueFilter(django_filters.Filter):
+    """
+        Keeps the answer sets that satisfy every predicate, each one checked by its own EXISTS subquery
+    """
+    field_class = AnswerValueField
+
+    def filter(self, qs, value):
+        if not value:
+            return qs
+        question_types = dict(Question.objects.filter(id__in={question_id for question_id, _, _ in value}).values_list(
+            'id', 'question_type'))
+        for question_id, operator, operand in value:
+            lookup = self.answer_lookup(question_types.get(question_id), operator, operand)
+            if lookup is None:
+                return qs.none()
+            qs = qs.filter(Exists(self.parent.answers().filter(answer_set=OuterRef('pk'), question_id=question_id,
+                                                               **lookup)))
+        return qs
+
+    @staticmethod
+    def answer_lookup(question_type, operator, operand):
+        if operator == 'option' and question_type in OPTION_QUESTIONS:
+            return {'option_ids__contains': [operand]}
+        if operator in RANGE_LOOKUPS and question_type in NUMBER_QUESTIONS:
+            return {f'numeric_value__{operator}': operand}
+        if operator == 'eq' and question_type in NUMBER_QUESTIONS:
+            try:
+                return {'numeric_value': float(operand)}
+            except ValueError:
+                return None
+        if operator == 'eq' and question_type in TEXT_QUESTIONS:
+            return {'text_value': operand}
+        return None
 
 
 class AnswerSetFilterSet(django_filters.FilterSet):
     start_date = django_filters.DateFilter(field_name='answered_at', lookup_expr='gte')
     end_date = django_filters.DateFilter(field_name='answered_at', lookup_expr='lte')
+    answer = AnswerValueFilter()
 
     class Meta:
         model = AnswerSet
         fields = ['answered_at']
+
+    def answers(self):
+        """
+            Answers of the filtered answer sets bounded by start_date. An answer is never written before its answer set,
+            so the bound keeps every matching answer and lets PostgreSQL skip the answer partitions of earlier months.
+        """
+        answers = Answer.objects.all()
+        start_date = self.form.cleaned_data.get('start_date') if self.form.is_valid() else None
+        if start_date is not None:
+            answers = answers.filter(
+                answered_at__gte=timezone.make_aware(datetime.datetime.combine(start_date, datetime.time.min)))
+        return answers
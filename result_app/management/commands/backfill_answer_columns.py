@@ -0,0 +1,60 @@
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from redis import RedisError
+
+from question_app.models import Answer
+
+
+class Command(BaseCommand):
+    help = 'Fills the typed shadow columns of answers (search_text, numeric_value, text_value and option_ids) in ' \
+           'chunks of ascending id. An interrupted run continues after the last finished chunk.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--questionnaire', dest='questionnaire_uuid', default=None,
+                            help='Only backfill the answers of this questionnaire uuid')
+        parser.add_argument('--chunk-size', type=int, default=2000)
+        parser.add_argument('--after-id', type=int, default=None,
+                            help='Start after this answer id instead of the saved checkpoint')
+        parser.add_argument('--restart', action='store_true', help='Ignore the saved checkpoint')
+
+    def handle(self, *args, **options):
+        checkpoint_key = f'answers:backfill:{options.get("questionnaire_uuid") or "all"}'
+        last_id = options.get('after_id')
+        if last_id is None and not options.get('restart'):
+            last_id = self.checkpoint(checkpoint_key)
+        last_id = last_id or 0
+        answers = Answer.objects.select_related('question').only('answer', 'question__question_type').order_by('id')
+        if options.get('questionnaire_uuid'):
+            answers = answers.filter(answer_set__questionnaire__uuid=options.get('questionnaire_uuid'))
+        backfilled = 0
+        while True:
+            chunk = list(answers.filter(id__gt=last_id)[:options.get('chunk_size')])
+            if not chunk:
+                break
+            for answer in chunk:
+                answer.fill_shadow_fields()
+            with transaction.atomic():
+                backfilled += Answer.objects.bulk_update(chunk, Answer.SHADOW_FIELDS)
+            last_id = chunk[-1].id
+            self.save_checkpoint(checkpoint_key, last_id)
+            self.stdout.write(f'backfilled up to answer {last_id}')
+        self.save_checkpoint(checkpoint_key, None)
+        self.stdout.write(self.style.SUCCESS(f'{backfilled} answers backfilled'))
+
+    @staticmethod
+    def checkpoint(key):
+        try:
+            return cache.get(key)
+        except RedisError:
+            return None
+
+    @staticmethod
+    def save_checkpoint(key, last_id):
+        try:
+            if last_id is None:
+                cache.delete(key)
+            else:
+                cache.set(key, last_id, timeout=None)
+        except RedisError:
+            pass
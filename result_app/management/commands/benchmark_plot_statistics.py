@@ -0,0 +1,61 @@
+import random
+import statistics
+import time
+from collections import Counter
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from result_app import stats_engine
+
+
+def python_statistics(answer_bodies, key):
+    """
+        The list comprehension, statistics module and Counter path PlotAPIView used before the engine
+    """
+    answer_list = [answer.get(key) for answer in answer_bodies if answer is not None and (
+            isinstance(answer.get(key), int) or isinstance(answer.get(key), float))]
+    return {
+        'average': sum(answer_list) / len(answer_list),
+        'minimum_answer': min(answer_list),
+        'maximum_answer': max(answer_list),
+        'count': len(answer_list),
+        'median': statistics.median(answer_list),
+        'variance': statistics.variance(answer_list),
+        'standard_deviation': statistics.stdev(answer_list),
+        'mode': statistics.mode(answer_list),
+        'counts': Counter(answer_list)
+    }
+
+
+def engine_statistics(values):
+    return stats_engine.describe_values(np.fromiter(values, dtype=np.float64))
+
+
+class Command(BaseCommand):
+    help = 'Compares the numeric plot statistics of the statistics module path and the NumPy engine'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='1000,100000,1000000',
+                            help='Comma separated answer counts to benchmark')
+        parser.add_argument('--repeat', type=int, default=3, help='Best of this many runs is reported')
+
+    def handle(self, *args, **options):
+        key = 'integer_range'
+        for size in [int(size) for size in options.get('sizes').split(',')]:
+            values = [random.randint(1, 10) for _ in range(size)]
+            answer_bodies = [{key: value} for value in values]
+            python_time = self.best_of(options.get('repeat'), python_statistics, answer_bodies, key)
+            engine_time = self.best_of(options.get('repeat'), engine_statistics, values)
+            self.stdout.write(
+                f'{size:>9} answers  statistics: {python_time * 1000:10.2f} ms  '
+                f'numpy: {engine_time * 1000:10.2f} ms  speedup: {python_time / engine_time:6.1f}x')
+
+    @staticmethod
+    def best_of(repeat, function, *args):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            function(*args)
+            timings.append(time.perf_counter() - start)
+        return min(timings)
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from question_app.models import Question
+from result_app import rollups
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the per-question answer aggregates used by the plots from scratch'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--questionnaire', dest='questionnaire_uuid', default=None,
+                            help='Only rebuild the questions of this questionnaire uuid')
+
+    def handle(self, *args, **options):
+        questions = Question.objects.filter(question_type__in=rollups.PLOT_QUESTIONS)
+        if options.get('questionnaire_uuid'):
+            questions = questions.filter(questionnaire__uuid=options.get('questionnaire_uuid'))
+        rebuilt = 0
+        for question in questions.iterator():
+            rollups.rebuild_question(question)
+            rebuilt += 1
+        self.stdout.write(self.style.SUCCESS(f'{rebuilt} question aggregates rebuilt'))
@@ -1 +1,62 @@
+from django.db import models
 
+from question_app.models import Question, Questionnaire
+from user_app.models import Profile
+
+
+class QuestionAggregate(models.Model):
+    """
+        Rolled up answers of a plottable question, kept in sync by result_app.rollups
+    """
+    question = models.OneToOneField(Question, on_delete=models.CASCADE, related_name='aggregate',
+                                    verbose_name='سوال')
+    count = models.PositiveIntegerField(default=0, verbose_name='تعداد پاسخ')
+    total = models.FloatField(default=0, verbose_name='مجموع')
+    sum_of_squares = models.FloatField(default=0, verbose_name='مجموع مربعات')
+    minimum = models.FloatField(null=True, blank=True, verbose_name='کمینه')
+    maximum = models.FloatField(null=True, blank=True, verbose_name='بیشینه')
+    histogram = models.JSONField(default=dict, blank=True, verbose_name='تعداد هر مقدار')
+    option_counts = models.JSONField(default=dict, blank=True, verbose_name='تعداد هر گزینه')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='زمان آخرین بروزرسانی')
+
+    def __str__(self):
+        return f'{self.question} - Aggregate'
+
+
+class ReportJob(models.Model):
+    """
+        A result report built in the background by result_app.tasks.build_report
+    """
+    CSV = 'csv'
+    XLSX = 'xlsx'
+    PLOTS = 'plots'
+    REPORT_TYPES = (
+        (CSV, 'خروجی CSV'),
+        (XLSX, 'خروجی اکسل'),
+        (PLOTS, 'نمودارها'),
+    )
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (PENDING, 'در صف'),
+        (RUNNING, 'در حال ساخت'),
+        (DONE, 'آماده'),
+        (FAILED, 'ناموفق'),
+    )
+    questionnaire = models.ForeignKey(Questionnaire, on_delete=models.CASCADE, related_name='report_jobs',
+                                      verbose_name='پرسشنامه')
+    requested_by = models.ForeignKey(Profile, on_delete=models.SET_NULL, null=True, blank=True,
+                                     related_name='report_jobs', verbose_name='درخواست کننده')
+    report_type = models.CharField(max_length=10, choices=REPORT_TYPES, default=CSV, verbose_name='نوع گزارش')
+    filters = models.JSONField(default=dict, blank=True, verbose_name='فیلترها')
+    status = models.CharField(max_length=10, choices=STATUSES, default=PENDING, verbose_name='وضعیت')
+    progress = models.PositiveSmallIntegerField(default=0, verbose_name='درصد پیشرفت')
+    file = models.FileField(upload_to='reports/%Y/%m/%d', null=True, blank=True, verbose_name='فایل')
+    error = models.TextField(blank=True, verbose_name='خطا')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='زمان درخواست')
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name='زمان اتمام')
+
+    def __str__(self):
+        return f'{self.questionnaire} - {self.report_type} Report'
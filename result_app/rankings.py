@@ -0,0 +1,45 @@
+from django.db import connection
+
+from question_app.models import Answer
+
+RANKING_SQL = '''
+    SELECT ranking.option_id, ranking.position, COUNT(*)
+    FROM {answer_table} AS answer
+    CROSS JOIN LATERAL unnest(answer.option_ids) WITH ORDINALITY AS ranking(option_id, position)
+    WHERE answer.question_id = %s
+    GROUP BY 1, 2
+'''
+
+
+def position_counts(question):
+    """
+        {option_id: {position: count}} of the sorted options of a sort question, counted by the database
+    """
+    counts = {}
+    with connection.cursor() as cursor:
+        cursor.execute(RANKING_SQL.format(answer_table=Answer._meta.db_table), [question.id])
+        for option_id, position, count in cursor.fetchall():
+            counts.setdefault(option_id, {})[position] = count
+    return counts
+
+
+def sort_statistics(question, options):
+    """
+        Mean rank, rank position histogram and Borda score of every option, where the first position of k options
+        earns k - 1 points
+    """
+    counts = position_counts(question)
+    options_count = len(options)
+    option_positions = {option.id: counts.get(option.id, {}) for option in options}
+    return {
+        'options': [{'id': option.id, 'text': option.text} for option in options],
+        'count': sum(positions.get(1, 0) for positions in counts.values()),
+        'position_counts': {option_id: {position: positions.get(position, 0) for position in
+                                        range(1, options_count + 1)} for option_id, positions in
+                            option_positions.items()},
+        'mean_ranks': {option_id: sum(position * count for position, count in positions.items()) /
+                       sum(positions.values()) if positions else None for option_id, positions in
+                       option_positions.items()},
+        'borda_scores': {option_id: sum(max(options_count - position, 0) * count for position, count in
+                                        positions.items()) for option_id, positions in option_positions.items()},
+    }
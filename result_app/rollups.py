@@ -0,0 +1,162 @@
+import numpy as np
+from django.db import connection, transaction
+from django.utils import timezone
+
+from question_app.models import Answer
+from result_app import stats_engine
+from result_app.models import QuestionAggregate
+from result_app.stats_engine import histogram_key
+
+NUMBER_QUESTIONS = ('integer_range', 'integer_selective', 'number_answer')
+CHOICE_QUESTIONS = ('optional', 'drop_down')
+PLOT_QUESTIONS = NUMBER_QUESTIONS + CHOICE_QUESTIONS
+OPTION_COUNTS_SQL = '''
+    SELECT option_id, COUNT(*)
+    FROM {answer_table} AS answer
+    CROSS JOIN LATERAL unnest(answer.option_ids) AS option_id
+    WHERE answer.question_id = %s
+    GROUP BY 1
+'''
+
+
+def number_value(question_type, answer_body):
+    if answer_body is None:
+        return None
+    value = answer_body.get(question_type)
+    if isinstance(value, int) or isinstance(value, float):
+        return value
+    return None
+
+
+def _apply(aggregate: QuestionAggregate, question_type, answer_body, sign):
+    if question_type in NUMBER_QUESTIONS:
+        value = number_value(question_type, answer_body)
+        if value is None:
+            return
+        aggregate.count += sign
+        aggregate.total += sign * value
+        aggregate.sum_of_squares += sign * value * value
+        key = histogram_key(value)
+        aggregate.histogram[key] = aggregate.histogram.get(key, 0) + sign
+        if aggregate.histogram[key] <= 0:
+            del aggregate.histogram[key]
+        if sign > 0:
+            aggregate.minimum = value if aggregate.minimum is None else min(aggregate.minimum, value)
+            aggregate.maximum = value if aggregate.maximum is None else max(aggregate.maximum, value)
+        elif key not in aggregate.histogram and value in (aggregate.minimum, aggregate.maximum):
+            # the last answer holding the minimum or maximum is gone, only then the histogram is scanned again
+            values = [float(key) for key in aggregate.histogram.keys()]
+            aggregate.minimum = min(values) if values else None
+            aggregate.maximum = max(values) if values else None
+    elif question_type in CHOICE_QUESTIONS:
+        if not answer_body:
+            return
+        selected_options = answer_body.get('selected_options') or []
+        aggregate.count += sign
+        for option in selected_options:
+            key = str(option.get('id') if isinstance(option, dict) else option)
+            aggregate.option_counts[key] = aggregate.option_counts.get(key, 0) + sign
+            if aggregate.option_counts[key] <= 0:
+                del aggregate.option_counts[key]
+
+
+def _locked(question_ids):
+    """
+        Locks the aggregates in question order, so concurrent submissions touching the same questions cannot deadlock
+    """
+    return list(QuestionAggregate.objects.select_for_update().filter(question_id__in=question_ids).order_by(
+        'question_id'))
+
+
+def _update(changes):
+    by_question = {}
+    for answer, sign in changes:
+        if answer.question.question_type in PLOT_QUESTIONS and answer.answer is not None:
+            by_question.setdefault(answer.question_id, (answer.question.question_type, []))[1].append(
+                (answer.answer, sign))
+    if not by_question:
+        return
+    with transaction.atomic():
+        aggregates = _locked(by_question.keys())
+        missing = by_question.keys() - {aggregate.question_id for aggregate in aggregates}
+        if missing:
+            QuestionAggregate.objects.bulk_create(
+                [QuestionAggregate(question_id=question_id) for question_id in sorted(missing)], ignore_conflicts=True)
+            aggregates = _locked(by_question.keys())
+        now = timezone.now()
+        for aggregate in aggregates:
+            question_type, bodies = by_question[aggregate.question_id]
+            for body, sign in bodies:
+                _apply(aggregate, question_type, body, sign)
+            aggregate.updated_at = now
+        QuestionAggregate.objects.bulk_update(aggregates, ['count', 'total', 'sum_of_squares', 'minimum', 'maximum',
+                                                           'histogram', 'option_counts', 'updated_at'])
+
+
+def record_answers(answers):
+    """
+        Adds newly written answers to the aggregates of their questions
+    """
+    _update([(answer, 1) for answer in answers])
+
+
+def discard_answers(answers):
+    """
+        Removes answers that are about to be replaced or deleted from the aggregates of their questions
+    """
+    _update([(answer, -1) for answer in answers])
+
+
+def replace_answers(removed, added):
+    """
+        Applies a submission that replaced some answers with new ones in a single locked pass
+    """
+    _update([(answer, -1) for answer in removed] + [(answer, 1) for answer in added])
+
+
+@transaction.atomic()
+def rebuild_question(question):
+    aggregate, _ = QuestionAggregate.objects.select_for_update().get_or_create(question=question)
+    aggregate.count = 0
+    aggregate.total = 0
+    aggregate.sum_of_squares = 0
+    aggregate.minimum = None
+    aggregate.maximum = None
+    aggregate.histogram = {}
+    aggregate.option_counts = {}
+    if question.question_type in NUMBER_QUESTIONS:
+        values = stats_engine.load_values(question)
+        if values.size:
+            aggregate.count = int(values.size)
+            aggregate.total = float(values.sum())
+            aggregate.sum_of_squares = float((values * values).sum())
+            aggregate.minimum = float(values.min())
+            aggregate.maximum = float(values.max())
+            distinct, frequencies = np.unique(values, return_counts=True)
+            aggregate.histogram = {histogram_key(value): int(frequency) for value, frequency in
+                                   zip(distinct.tolist(), frequencies.tolist())}
+    else:
+        aggregate.count = question.answers.exclude(answer=None).exclude(answer={}).count()
+        with connection.cursor() as cursor:
+            cursor.execute(OPTION_COUNTS_SQL.format(answer_table=Answer._meta.db_table), [question.id])
+            aggregate.option_counts = {str(option_id): count for option_id, count in cursor.fetchall()}
+    aggregate.save()
+    return aggregate
+
+
+def number_statistics(aggregate: QuestionAggregate):
+    """
+        Statistics of NumberQuestionPlotSerializer computed from the histogram instead of the answers
+    """
+    return stats_engine.describe_histogram(aggregate.histogram)
+
+
+def choice_statistics(aggregate: QuestionAggregate, options):
+    option_counts = aggregate.option_counts if aggregate else {}
+    options_count = {option.id: option_counts.get(str(option.id), 0) for option in options}
+    total = sum(options_count.values()) if sum(options_count.values()) != 0 else 1
+    return {
+        'options': [{'id': option.id, 'text': option.text} for option in options],
+        'counts': options_count,
+        'percentages': {option_id: count / total * 100 for option_id, count in options_count.items()}
+    }
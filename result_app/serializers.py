@@ -1,6 +1,7 @@
 from rest_framework import serializers
 
 from question_app.models import Answer, AnswerSet
+from result_app.models import ReportJob
 
 
 class AnswerSerializer(serializers.ModelSerializer):
@@ -72,6 +73,33 @@ class ChoiceQuestionPlotSerializer(serializers.Serializer):
     percentages = serializers.JSONField()
 
 
+class SortQuestionPlotSerializer(serializers.Serializer):
+    question_id = serializers.IntegerField()
+    question = serializers.CharField()
+    group_title = serializers.CharField()
+    group_id = serializers.IntegerField()
+    question_type = serializers.CharField()
+    options = serializers.JSONField()
+    count = serializers.IntegerField()
+    mean_ranks = serializers.JSONField()
+    position_counts = serializers.JSONField()
+    borda_scores = serializers.JSONField()
+
+
+class CrosstabSerializer(serializers.Serializer):
+    row_question = serializers.JSONField()
+    column_question = serializers.JSONField()
+    rows = serializers.JSONField()
+    columns = serializers.JSONField()
+    counts = serializers.JSONField()
+    row_totals = serializers.JSONField()
+    column_totals = serializers.JSONField()
+    total = serializers.IntegerField()
+    chi_square = serializers.FloatField(allow_null=True)
+    degrees_of_freedom = serializers.IntegerField()
+    p_value = serializers.FloatField(allow_null=True)
+
+
 class NumberQuestionPlotSerializer(serializers.Serializer):
     question_id = serializers.IntegerField()
     question = serializers.CharField()
@@ -94,3 +122,23 @@ class NumberQuestionPlotSerializer(serializers.Serializer):
         if self.context.get('integer_selective'):
             representation['shape'] = self.context.get('shape')
         return representation
+
+
+class ReportJobSerializer(serializers.ModelSerializer):
+    start_date = serializers.DateField(write_only=True, required=False)
+    end_date = serializers.DateField(write_only=True, required=False)
+
+    class Meta:
+        model = ReportJob
+        fields = ('id', 'report_type', 'start_date', 'end_date', 'filters', 'status', 'progress', 'error',
+                  'created_at', 'finished_at')
+        read_only_fields = ('filters', 'status', 'progress', 'error', 'created_at', 'finished_at')
+
+    def validate(self, data):
+        start_date = data.pop('start_date', None)
+        end_date = data.pop('end_date', None)
+        if start_date and end_date and start_date > end_date:
+            raise serializers.ValidationError('تاریخ شروع باید قبل از تاریخ پایان باشد')
+        data['filters'] = {key: value.isoformat() for key, value in
+                           (('start_date', start_date), ('end_date', end_date)) if value}
+        return data
@@ -0,0 +1,59 @@
+from django.db.models.signals import pre_delete, post_save, post_delete
+from django.dispatch import receiver
+
+from question_app.models import Questionnaire, AnswerSet, Answer, Question, Option, DropDownOption, SortOption
+from result_app import caching, rollups
+
+
+@receiver(post_save, sender=Questionnaire)
+def questionnaire_saved(sender, instance: Questionnaire, **kwargs):
+    caching.bump_data_version(instance.uuid)
+
+
+@receiver(pre_delete, sender=AnswerSet)
+def answer_set_deleted(sender, instance: AnswerSet, **kwargs):
+    rollups.discard_answers(instance.answers.select_related('question'))
+
+
+@receiver(post_save, sender=AnswerSet)
+def answer_set_created(sender, instance: AnswerSet, created, **kwargs):
+    if created:
+        caching.bump_data_version(instance.questionnaire.uuid)
+
+
+@receiver(post_delete, sender=AnswerSet)
+def answer_set_removed(sender, instance: AnswerSet, **kwargs):
+    caching.bump_data_version(instance.questionnaire.uuid)
+
+
+@receiver(post_save, sender=Answer)
+def answer_saved(sender, instance: Answer, **kwargs):
+    caching.bump_data_version(instance.answer_set.questionnaire.uuid)
+
+
+def question_changed(sender, instance, **kwargs):
+    caching.bump_data_version(instance.questionnaire.uuid)
+
+
+for question_model in [Question, *Question.__subclasses__()]:
+    post_save.connect(question_changed, sender=question_model, dispatch_uid=f'question_changed_save_{question_model}')
+    post_delete.connect(question_changed, sender=question_model,
+                        dispatch_uid=f'question_changed_delete_{question_model}')
+
+
+@receiver(post_save, sender=Option)
+@receiver(post_delete, sender=Option)
+def option_changed(sender, instance: Option, **kwargs):
+    caching.bump_data_version(instance.optional_question.questionnaire.uuid)
+
+
+@receiver(post_save, sender=DropDownOption)
+@receiver(post_delete, sender=DropDownOption)
+def drop_down_option_changed(sender, instance: DropDownOption, **kwargs):
+    caching.bump_data_version(instance.drop_down_question.questionnaire.uuid)
+
+
+@receiver(post_save, sender=SortOption)
+@receiver(post_delete, sender=SortOption)
+def sort_option_changed(sender, instance: SortOption, **kwargs):
+    caching.bump_data_version(instance.sort_question.questionnaire.uuid)
@@ -0,0 +1,62 @@
+import numpy as np
+
+
+def histogram_key(value):
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value)
+
+
+def load_values(question):
+    """
+        Loads the numeric answers of a number question into an array with a single query
+    """
+    values = question.answers.exclude(numeric_value=None).values_list('numeric_value', flat=True)
+    return np.fromiter(values.iterator(chunk_size=10000), dtype=np.float64)
+
+
+def describe(values, frequencies):
+    """
+        Computes the NumberQuestionPlotSerializer statistics of sorted distinct values and their frequencies
+    """
+    values = np.asarray(values, dtype=np.float64)
+    frequencies = np.asarray(frequencies, dtype=np.int64)
+    count = int(frequencies.sum())
+    if count == 0:
+        return None
+    average = float(np.dot(values, frequencies) / count)
+    cumulative = np.cumsum(frequencies)
+    lower, upper = np.searchsorted(cumulative, [(count - 1) // 2, count // 2], side='right')
+    if count > 1:
+        variance = float(np.dot((values - average) ** 2, frequencies) / (count - 1))
+    else:
+        variance = 0
+    return {
+        'average': average,
+        'minimum_answer': float(values[0]),
+        'maximum_answer': float(values[-1]),
+        'count': count,
+        'median': float((values[lower] + values[upper]) / 2),
+        'variance': variance,
+        'standard_deviation': float(np.sqrt(variance)),
+        'mode': float(values[np.argmax(frequencies)]),
+        'counts': {histogram_key(value): int(frequency) for value, frequency in
+                   zip(values.tolist(), frequencies.tolist())}
+    }
+
+
+def describe_values(values):
+    values, frequencies = np.unique(values, return_counts=True)
+    return describe(values, frequencies)
+
+
+def describe_histogram(histogram):
+    items = sorted((float(key), frequency) for key, frequency in histogram.items() if frequency > 0)
+    if not items:
+        return None
+    values, frequencies = zip(*items)
+    return describe(values, frequencies)
+
+
+def question_statistics(question):
+    return describe_values(load_values(question))
@@ -0,0 +1,74 @@
+import csv
+import json
+import logging
+import os
+import tempfile
+
+from celery import shared_task
+from django.core.files import File
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+
+from question_app.models import AnswerSet
+from result_app import exports
+from result_app.filtersets import AnswerSetFilterSet
+from result_app.models import ReportJob
+
+logger = logging.getLogger(__name__)
+
+REPORT_FAILED_MESSAGE = 'ساخت گزارش با خطا مواجه شد، لطفا دوباره تلاش کنید'
+
+
+def track_progress(job, rows, total):
+    """
+        Passes the rows through and stores the percentage of written answer sets after every chunk
+    """
+    for number, row in enumerate(rows):
+        yield row
+        if number and number % exports.EXPORT_CHUNK_SIZE == 0:
+            ReportJob.objects.filter(id=job.id).update(progress=min(99, number * 100 // max(total, 1)))
+
+
+def write_report(job, path):
+    if job.report_type == ReportJob.PLOTS:
+        from result_app.views import PlotAPIView
+
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(PlotAPIView.plots(job.questionnaire.uuid), file, ensure_ascii=False, cls=DjangoJSONEncoder)
+        return
+    filterset = AnswerSetFilterSet(
+        data=job.filters, queryset=AnswerSet.objects.filter(questionnaire=job.questionnaire).order_by(
+            'answered_at', 'id'))
+    answer_sets = filterset.qs
+    rows = track_progress(job, exports.export_rows(exports.export_questions(job.questionnaire), answer_sets,
+                                                   filterset.answers()), answer_sets.count())
+    if job.report_type == ReportJob.XLSX:
+        exports.write_xlsx(rows, path)
+    else:
+        with open(path, 'w', encoding='utf-8-sig', newline='') as file:
+            csv.writer(file).writerows(exports.csv_rows(rows))
+
+
+@shared_task
+def build_report(job_id):
+    job = ReportJob.objects.select_related('questionnaire').get(id=job_id)
+    ReportJob.objects.filter(id=job.id).update(status=ReportJob.RUNNING, progress=0)
+    extension = 'json' if job.report_type == ReportJob.PLOTS else job.report_type
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, f'report.{extension}')
+            write_report(job, path)
+            with open(path, 'rb') as file:
+                job.file.save(f'{job.questionnaire.uuid}-{job.id}.{extension}', File(file), save=False)
+    except Exception:
+        logger.exception('report job %s of questionnaire %s failed', job.id, job.questionnaire.uuid)
+        job.status = ReportJob.FAILED
+        job.error = REPORT_FAILED_MESSAGE
+        update_fields = ['status', 'error', 'finished_at']
+    else:
+        job.status = ReportJob.DONE
+        job.progress = 100
+        update_fields = ['status', 'progress', 'file', 'finished_at']
+    job.finished_at = timezone.now()
+    job.save(update_fields=update_fields)
+    return job.status
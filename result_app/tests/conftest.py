@@ -0,0 +1,30 @@
+from django.core.cache import cache
+from rest_framework.test import APIClient
+import pytest
+
+
+@pytest.fixture
+def api_client():
+    return APIClient()
+
+
+@pytest.fixture
+def authenticate(api_client):
+    def do_authenticate(user):
+        return api_client.force_authenticate(user=user)
+
+    return do_authenticate
+
+
+@pytest.fixture
+def result_api():
+    def do_result_api(questionnaire_uuid, path):
+        return f'/result-api/{questionnaire_uuid}/{path}/'
+
+    return do_result_api
+
+
+@pytest.fixture(autouse=True)
+def local_cache(settings):
+    settings.CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+    cache.clear()
@@ -0,0 +1,77 @@
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from model_bakery import baker
+from redis import RedisError
+
+from question_app.models import Questionnaire, AnswerSet, Answer, IntegerRangeQuestion
+from result_app import caching, rollups
+from user_app.models import Profile
+
+
+def add_answer(question, value):
+    answer_set = baker.make(AnswerSet, questionnaire=question.questionnaire)
+    rollups.record_answers([baker.make(Answer, answer_set=answer_set, question=question,
+                                       answer={'integer_range': value})])
+
+
+@pytest.mark.django_db
+class TestResultCache:
+    def test_repeat_plot_load_does_not_read_answers(self, api_client, authenticate, result_api):
+        owner = baker.make(Profile)
+        questionnaire = baker.make(Questionnaire, owner=owner)
+        question = baker.make(IntegerRangeQuestion, questionnaire=questionnaire, max=5)
+        add_answer(question, 2)
+        authenticate(owner)
+        first = api_client.get(result_api(questionnaire.uuid, 'plots'))
+
+        with CaptureQueriesContext(connection) as queries:
+            second = api_client.get(result_api(questionnaire.uuid, 'plots'))
+
+        assert second.data == first.data
+        assert not any('question_app_answer' in query['sql'] or 'result_app_questionaggregate' in query['sql']
+                       for query in queries.captured_queries)
+        assert caching.statistics() == {'hits': 1, 'misses': 1}
+
+    def test_new_answer_invalidates_plots(self, api_client, authenticate, result_api,
+                                          django_capture_on_commit_callbacks):
+        owner = baker.make(Profile)
+        questionnaire = baker.make(Questionnaire, owner=owner)
+        question = baker.make(IntegerRangeQuestion, questionnaire=questionnaire, max=5)
+        add_answer(question, 2)
+        authenticate(owner)
+        api_client.get(result_api(questionnaire.uuid, 'plots'))
+
+        with django_capture_on_commit_callbacks(execute=True):
+            add_answer(question, 4)
+        response = api_client.get(result_api(questionnaire.uuid, 'plots'))
+
+        assert response.data[0]['count'] == 2
+
+    def test_data_version_moves_only_after_commit(self, django_capture_on_commit_callbacks):
+        questionnaire = baker.make(Questionnaire)
+        before = caching.data_version(questionnaire.uuid)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            caching.bump_data_version(questionnaire.uuid)
+            assert caching.data_version(questionnaire.uuid) == before
+
+        assert caching.data_version(questionnaire.uuid) != before
+
+    def test_waits_for_concurrent_recompute(self, monkeypatch):
+        key = f'result:plots:uuid:{caching.data_version("uuid")}:'
+        cache.add(f'{key}:lock', 1)
+        monkeypatch.setattr(caching.time, 'sleep', lambda seconds: cache.set(key, ['computed elsewhere']))
+
+        result = caching.cached('uuid', 'plots', lambda: pytest.fail('recomputed while another caller held the lock'))
+
+        assert result == ['computed elsewhere']
+
+    def test_statistics_without_redis_are_zero(self, monkeypatch):
+        def unavailable(*args, **kwargs):
+            raise RedisError
+
+        monkeypatch.setattr(cache, 'get_many', unavailable)
+
+        assert caching.statistics() == {'hits': 0, 'misses': 0}
@@ -0,0 +1,51 @@
+import pytest
+from model_bakery import baker
+from rest_framework import status
+
+from question_app.models import Questionnaire, AnswerSet, Answer, IntegerRangeQuestion, OptionalQuestion, Option, \
+    TextAnswerQuestion
+from result_app import rollups
+from user_app.models import Profile
+
+
+@pytest.mark.django_db
+class TestCrosstab:
+    @pytest.fixture
+    def answered(self):
+        owner = baker.make(Profile)
+        questionnaire = baker.make(Questionnaire, owner=owner)
+        gender = baker.make(OptionalQuestion, questionnaire=questionnaire)
+        male, female = baker.make(Option, optional_question=gender, _quantity=2)
+        age = baker.make(IntegerRangeQuestion, questionnaire=questionnaire)
+        answers = []
+        for option, value in [(male, 10), (male, 12), (female, 30), (female, 40), (male, 40)]:
+            answer_set = baker.make(AnswerSet, questionnaire=questionnaire)
+            answers.append(baker.make(Answer, answer_set=answer_set, question=gender,
+                                      answer={'selected_options': [{'id': option.id, 'text': option.text}]}))
+            answers.append(baker.make(Answer, answer_set=answer_set, question=age, answer={'integer_range': value}))
+        rollups.record_answers(answers)
+        return owner, questionnaire, gender, age, male, female
+
+    def test_counts_options_by_binned_numbers(self, api_client, authenticate, result_api, answered):
+        owner, questionnaire, gender, age, male, female = answered
+        authenticate(owner)
+
+        response = api_client.get(result_api(questionnaire.uuid, 'crosstab'),
+                                  {'row': gender.id, 'column': age.id, 'column_bins': 3})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert [row['id'] for row in response.data['rows']] == [male.id, female.id]
+        assert response.data['counts'] == [[2, 0, 1], [0, 0, 2]]
+        assert response.data['total'] == 5
+        assert response.data['degrees_of_freedom'] == 1
+        assert response.data['chi_square'] == pytest.approx(20 / 9)
+        assert 0 < response.data['p_value'] < 1
+
+    def test_if_question_type_is_not_supported_returns_400(self, api_client, authenticate, result_api, answered):
+        owner, questionnaire, gender, *_ = answered
+        text = baker.make(TextAnswerQuestion, questionnaire=questionnaire)
+        authenticate(owner)
+
+        response = api_client.get(result_api(questionnaire.uuid, 'crosstab'), {'row': gender.id, 'column': text.id})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
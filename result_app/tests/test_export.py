@@ -0,0 +1,92 @@
+import csv
+import datetime
+import io
+import zipfile
+
+import pytest
+from django.utils import timezone
+from model_bakery import baker
+from rest_framework import status
+
+from question_app.models import Questionnaire, AnswerSet, Answer, TextAnswerQuestion, IntegerRangeQuestion
+from user_app.models import Profile
+
+
+def read_csv(response):
+    content = b''.join(response.streaming_content).decode('utf-8-sig')
+    return list(csv.reader(io.StringIO(content)))
+
+
+@pytest.mark.django_db
+class TestExport:
+    def test_if_user_is_owner_streams_one_column_per_question(self, api_client, authenticate, result_api):
+        owner = baker.make(Profile)
+        questionnaire = baker.make(Questionnaire, owner=owner)
+        second = baker.make(IntegerRangeQuestion, questionnaire=questionnaire, placement=2, title='سن')
+        first = baker.make(TextAnswerQuestion, questionnaire=questionnaire, placement=1, title='نام')
+        answer_set = baker.make(AnswerSet, questionnaire=questionnaire)
+        baker.make(Answer, answer_set=answer_set, question=first, answer={'text_answer': 'علی'})
+        baker.make(Answer, answer_set=answer_set, question=second, answer={'integer_range': 4})
+        authenticate(owner)
+
+        response = api_client.get(result_api(questionnaire.uuid, 'answer-sets/excel-data'))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response['Content-Type'].startswith('text/csv')
+        rows = read_csv(response)
+        assert rows[0][2:] == ['نام', 'سن']
+        assert rows[1][0] == str(answer_set.id)
+        assert rows[1][2:] == ['علی', '4']
+
+    def test_honours_date_filters(self, api_client, authenticate, result_api):
+        owner = baker.make(Profile)
+        questionnaire = baker.make(Questionnaire, owner=owner)
+        baker.make(TextAnswerQuestion, questionnaire=questionnaire, placement=1)
+        old, new = baker.make(AnswerSet, questionnaire=questionnaire, _quantity=2)
+        AnswerSet.objects.filter(id=old.id).update(answered_at=timezone.now() - datetime.timedelta(days=10))
+        authenticate(owner)
+
+        response = api_client.get(result_api(questionnaire.uuid, 'answer-sets/excel-data'),
+                                  {'start_date': (timezone.now() - datetime.timedelta(days=1)).date()})
+
+        rows = read_csv(response)
+        assert [row[0] for row in rows[1:]] == [str(new.id)]
+
+    def test_xlsx_export(self, api_client, authenticate, result_api):
+        owner = baker.make(Profile)
+        questionnaire = baker.make(Questionnaire, owner=owner)
+        baker.make(TextAnswerQuestion, questionnaire=questionnaire, placement=1)
+        baker.make(AnswerSet, questionnaire=questionnaire)
+        authenticate(owner)
+
+        response = api_client.get(result_api(questionnaire.uuid, 'answer-sets/excel-data'), {'file_format': 'xlsx'})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert b''.join(response.streaming_content)[:2] == b'PK'
+
+    def test_formula_answers_are_exported_as_text(self, api_client, authenticate, result_api):
+        owner = baker.make(Profile)
+        questionnaire = baker.make(Questionnaire, owner=owner)
+        question = baker.make(TextAnswerQuestion, questionnaire=questionnaire, placement=1, title='@title')
+        answer_set = baker.make(AnswerSet, questionnaire=questionnaire)
+        baker.make(Answer, answer_set=answer_set, question=question, answer={'text_answer': '=1+2'})
+        authenticate(owner)
+
+        rows = read_csv(api_client.get(result_api(questionnaire.uuid, 'answer-sets/excel-data')))
+        response = api_client.get(result_api(questionnaire.uuid, 'answer-sets/excel-data'), {'file_format': 'xlsx'})
+
+        assert rows[0][2] == "'@title"
+        assert rows[1][2] == "'=1+2"
+        with zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content))) as workbook:
+            sheet = workbook.read('xl/worksheets/sheet1.xml').decode()
+        assert '<f>' not in sheet
+        assert '<t>=1+2</t>' in sheet
+
+    def test_if_file_format_is_invalid_returns_400(self, api_client, authenticate, result_api):
+        owner = baker.make(Profile)
+        questionnaire = baker.make(Questionnaire, owner=owner)
+        authenticate(owner)
+
+        response = api_client.get(result_api(questionnaire.uuid, 'answer-sets/excel-data'), {'file_format': 'pdf'})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
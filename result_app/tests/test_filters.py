@@ -0,0 +1,77 @@
+import re
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from model_bakery import baker
+from rest_framework import status
+
+from question_app.models import Questionnaire, AnswerSet, Answer, IntegerRangeQuestion, OptionalQuestion, \
+    TextAnswerQuestion
+from user_app.models import Profile
+
+
+def answer_set_ids(response):
+    return {answer_set['id'] for answer_set in response.data['results']}
+
+
+@pytest.mark.django_db
+class TestAnswerValueFilters:
+    @pytest.fixture
+    def answered(self):
+        owner = baker.make(Profile)
+        questionnaire = baker.make(Questionnaire, owner=owner)
+        optional = baker.make(OptionalQuestion, questionnaire=questionnaire)
+        integer_range = baker.make(IntegerRangeQuestion, questionnaire=questionnaire)
+        text = baker.make(TextAnswerQuestion, questionnaire=questionnaire)
+        answer_sets = []
+        for option_id, value, name in [(17, 9, 'Ali'), (17, 3, 'Sara'), (18, 10, 'Reza')]:
+            answer_set = baker.make(AnswerSet, questionnaire=questionnaire)
+            baker.make(Answer, answer_set=answer_set, question=optional,
+                       answer={'selected_options': [{'id': option_id, 'text': 'option'}]})
+            baker.make(Answer, answer_set=answer_set, question=integer_range, answer={'integer_range': value})
+            baker.make(Answer, answer_set=answer_set, question=text, answer={'text_answer': name})
+            answer_sets.append(answer_set)
+        return owner, questionnaire, optional, integer_range, text, answer_sets
+
+    def test_filters_combine_with_and(self, api_client, authenticate, result_api, answered):
+        owner, questionnaire, optional, integer_range, _, answer_sets = answered
+        authenticate(owner)
+
+        response = api_client.get(result_api(questionnaire.uuid, 'answer-sets'),
+                                  {'answer': [f'{optional.id}:option:17', f'{integer_range.id}:gte:8']})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert answer_set_ids(response) == {answer_sets[0].id}
+
+    def test_equality_filter(self, api_client, authenticate, result_api, answered):
+        owner, questionnaire, _, _, text, answer_sets = answered
+        authenticate(owner)
+
+        response = api_client.get(result_api(questionnaire.uuid, 'answer-sets'), {'answer': f'{text.id}:eq:Reza'})
+
+        assert answer_set_ids(response) == {answer_sets[2].id}
+
+    def test_if_filter_is_malformed_returns_400(self, api_client, authenticate, result_api, answered):
+        owner, questionnaire, optional, *_ = answered
+        authenticate(owner)
+
+        response = api_client.get(result_api(questionnaire.uuid, 'answer-sets'), {'answer': f'{optional.id}:like:x'})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_start_date_bounds_the_answer_queries(self, api_client, authenticate, result_api, answered):
+        owner, questionnaire, optional, *_, answer_sets = answered
+        authenticate(owner)
+
+        with CaptureQueriesContext(connection) as captured:
+            response = api_client.get(result_api(questionnaire.uuid, 'answer-sets'),
+                                      {'start_date': '2020-01-01', 'answer': f'{optional.id}:option:17'})
+        queries = [query['sql'] for query in captured.captured_queries]
+
+        assert answer_set_ids(response) == {answer_sets[0].id, answer_sets[1].id}
+        assert all(len(answer_set['answers']) == 3 for answer_set in response.data['results'])
+        answer_scans = [sql.count('FROM "question_app_answer"') for sql in queries]
+        bounded_scans = [len(re.findall(r'(?:"question_app_answer"|U0)\."answered_at" >=', sql)) for sql in queries]
+        assert sum(answer_scans) == 3
+        assert bounded_scans == answer_scans
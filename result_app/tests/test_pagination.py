@@ -0,0 +1,60 @@
+import pytest
+from model_bakery import baker
+from rest_framework import status
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from porsline_config.paginators import AnswerSetPagination
+
+from question_app.models import Questionnaire, AnswerSet
+from user_app.models import Profile
+
+
+@pytest.mark.django_db
+class TestAnswerSetCursorPagination:
+    def test_cursor_walks_every_answer_set_once(self, api_client, authenticate, result_api):
+        owner = baker.make(Profile)
+        questionnaire = baker.make(Questionnaire, owner=owner)
+        answer_sets = baker.make(AnswerSet, questionnaire=questionnaire, _quantity=10)
+        authenticate(owner)
+
+        response = api_client.get(result_api(questionnaire.uuid, 'answer-sets'), {'cursor': ''})
+        first = response
+        seen = [answer_set['id'] for answer_set in response.data['results']]
+        while response.data['next']:
+            response = api_client.get(response.data['next'])
+            seen += [answer_set['id'] for answer_set in response.data['results']]
+
+        assert response.status_code == status.HTTP_200_OK
+        assert 'estimated_count' in first.data
+        assert 'estimated_count' not in response.data
+        assert seen == [answer_set.id for answer_set in answer_sets]
+
+    def test_without_cursor_keeps_page_numbers(self, api_client, authenticate, result_api):
+        owner = baker.make(Profile)
+        questionnaire = baker.make(Questionnaire, owner=owner)
+        baker.make(AnswerSet, questionnaire=questionnaire, _quantity=3)
+        authenticate(owner)
+
+        response = api_client.get(result_api(questionnaire.uuid, 'answer-sets'))
+
+        assert response.data['count'] == 3
+
+    def test_if_cursor_is_invalid_returns_404(self, api_client, authenticate, result_api):
+        owner = baker.make(Profile)
+        questionnaire = baker.make(Questionnaire, owner=owner)
+        authenticate(owner)
+
+        response = api_client.get(result_api(questionnaire.uuid, 'answer-sets'), {'cursor': 'not-a-cursor'})
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_cursor_on_a_list_falls_back_to_page_numbers(self):
+        answer_sets = baker.make(AnswerSet, _quantity=3)
+        request = Request(APIRequestFactory().get('/', {'cursor': ''}))
+        paginator = AnswerSetPagination()
+
+        page = paginator.paginate_queryset(answer_sets, request)
+
+        assert page == answer_sets
+        assert paginator.get_paginated_response([]).data['count'] == 3
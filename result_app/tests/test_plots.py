@@ -0,0 +1,169 @@
+import statistics
+from collections import Counter
+
+import pytest
+from django.core.management import call_command
+from model_bakery import baker
+from rest_framework import status
+
+from question_app.models import Questionnaire, AnswerSet, Answer, IntegerRangeQuestion, OptionalQuestion, Option, \
+    SortQuestion, SortOption
+from result_app import rollups
+from result_app.models import QuestionAggregate
+from user_app.models import Profile
+
+
+def make_answers(question, bodies):
+    answers = []
+    for body in bodies:
+        answer_set = baker.make(AnswerSet, questionnaire=question.questionnaire)
+        answers.append(baker.make(Answer, answer_set=answer_set, question=question, answer=body))
+    return answers
+
+
+@pytest.mark.django_db
+class TestQuestionAggregate:
+    def test_number_statistics_match_statistics_module(self):
+        question = baker.make(IntegerRangeQuestion, max=10)
+        values = [1, 4, 4, 7, 9, 10]
+        rollups.record_answers(make_answers(question, [{'integer_range': value} for value in values]))
+
+        result = rollups.number_statistics(QuestionAggregate.objects.get(question=question))
+
+        assert result['count'] == len(values)
+        assert result['average'] == pytest.approx(statistics.mean(values))
+        assert result['median'] == statistics.median(values)
+        assert result['variance'] == pytest.approx(statistics.variance(values))
+        assert result['standard_deviation'] == pytest.approx(statistics.stdev(values))
+        assert result['mode'] == statistics.mode(values)
+        assert result['minimum_answer'] == min(values)
+        assert result['maximum_answer'] == max(values)
+        assert result['counts'] == {str(key): count for key, count in Counter(values).items()}
+
+    def test_single_answer_has_zero_variance(self):
+        question = baker.make(IntegerRangeQuestion, max=10)
+        rollups.record_answers(make_answers(question, [{'integer_range': 3}]))
+
+        result = rollups.number_statistics(QuestionAggregate.objects.get(question=question))
+
+        assert result['variance'] == 0
+        assert result['standard_deviation'] == 0
+        assert result['median'] == 3
+
+    def test_discarding_answers_reverts_aggregate(self):
+        question = baker.make(IntegerRangeQuestion, max=10)
+        kept = make_answers(question, [{'integer_range': 2}])
+        removed = make_answers(question, [{'integer_range': 8}])
+        rollups.record_answers(kept + removed)
+
+        rollups.discard_answers(removed)
+
+        aggregate = QuestionAggregate.objects.get(question=question)
+        assert aggregate.count == 1
+        assert aggregate.maximum == 2
+        assert aggregate.histogram == {'2': 1}
+
+    def test_minimum_and_maximum_follow_discarded_answers(self):
+        question = baker.make(IntegerRangeQuestion, max=10)
+        lowest, duplicate, middle, highest = make_answers(
+            question, [{'integer_range': 1}, {'integer_range': 1}, {'integer_range': 5}, {'integer_range': 9}])
+        rollups.record_answers([lowest, duplicate, middle, highest])
+
+        rollups.discard_answers([lowest])
+        aggregate = QuestionAggregate.objects.get(question=question)
+        assert (aggregate.minimum, aggregate.maximum) == (1, 9)
+
+        rollups.discard_answers([duplicate, highest])
+        aggregate = QuestionAggregate.objects.get(question=question)
+        assert (aggregate.minimum, aggregate.maximum) == (5, 5)
+
+        rollups.discard_answers([middle])
+        aggregate = QuestionAggregate.objects.get(question=question)
+        assert (aggregate.minimum, aggregate.maximum) == (None, None)
+
+    def test_deleting_answer_set_discards_its_answers(self):
+        question = baker.make(IntegerRangeQuestion, max=10)
+        answers = make_answers(question, [{'integer_range': 5}, {'integer_range': 6}])
+        rollups.record_answers(answers)
+
+        answers[0].answer_set.delete()
+
+        aggregate = QuestionAggregate.objects.get(question=question)
+        assert aggregate.count == 1
+        assert aggregate.histogram == {'6': 1}
+
+    def test_rebuild_command_recounts_options(self):
+        question = baker.make(OptionalQuestion)
+        first, second = baker.make(Option, optional_question=question, _quantity=2)
+        make_answers(question, [
+            {'selected_options': [{'id': first.id, 'text': first.text}]},
+            {'selected_options': [{'id': first.id, 'text': first.text}]},
+            {'selected_options': [{'id': second.id, 'text': second.text}]},
+        ])
+
+        call_command('rebuild_rollups', questionnaire_uuid=str(question.questionnaire.uuid))
+
+        aggregate = QuestionAggregate.objects.get(question=question)
+        assert aggregate.count == 3
+        assert aggregate.option_counts == {str(first.id): 2, str(second.id): 1}
+
+
+@pytest.mark.django_db
+class TestPlots:
+    def test_if_user_is_owner_returns_aggregated_plots(self, api_client, authenticate, result_api):
+        owner = baker.make(Profile)
+        questionnaire = baker.make(Questionnaire, owner=owner)
+        question = baker.make(IntegerRangeQuestion, questionnaire=questionnaire, max=5)
+        rollups.record_answers(make_answers(question, [{'integer_range': 1}, {'integer_range': 5}]))
+        authenticate(owner)
+
+        response = api_client.get(result_api(questionnaire.uuid, 'plots'))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.data) == 1
+        assert response.data[0]['average'] == 3
+        assert response.data[0]['max'] == 5
+
+    def test_if_questionnaire_has_no_answers_returns_empty_list(self, api_client, authenticate, result_api):
+        owner = baker.make(Profile)
+        questionnaire = baker.make(Questionnaire, owner=owner)
+        baker.make(IntegerRangeQuestion, questionnaire=questionnaire)
+        authenticate(owner)
+
+        response = api_client.get(result_api(questionnaire.uuid, 'plots'))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data == []
+
+
+@pytest.mark.django_db
+class TestSortPlots:
+    def test_ranking_statistics(self, api_client, authenticate, result_api):
+        owner = baker.make(Profile)
+        questionnaire = baker.make(Questionnaire, owner=owner)
+        question = baker.make(SortQuestion, questionnaire=questionnaire)
+        first, second, third = baker.make(SortOption, sort_question=question, _quantity=3)
+        for order in [(first, second, third), (first, third, second), (second, first, third)]:
+            make_answers(question, [{'sorted_options': [{'id': option.id, 'text': option.text} for option in order]}])
+        authenticate(owner)
+
+        response = api_client.get(result_api(questionnaire.uuid, 'plots'))
+
+        plot = response.data[0]
+        assert plot['question_type'] == 'sort'
+        assert plot['count'] == 3
+        assert plot['mean_ranks'][first.id] == pytest.approx(4 / 3)
+        assert plot['mean_ranks'][third.id] == pytest.approx(8 / 3)
+        assert plot['position_counts'][second.id] == {1: 1, 2: 1, 3: 1}
+        assert plot['borda_scores'] == {first.id: 5, second.id: 3, third.id: 1}
+
+    def test_unanswered_sort_question_is_skipped(self, api_client, authenticate, result_api):
+        owner = baker.make(Profile)
+        questionnaire = baker.make(Questionnaire, owner=owner)
+        question = baker.make(SortQuestion, questionnaire=questionnaire)
+        baker.make(SortOption, sort_question=question)
+        authenticate(owner)
+
+        response = api_client.get(result_api(questionnaire.uuid, 'plots'))
+
+        assert response.data == []
@@ -0,0 +1,89 @@
+import csv
+import io
+
+import pytest
+from model_bakery import baker
+from rest_framework import status
+
+from question_app.models import Questionnaire, AnswerSet, Answer, TextAnswerQuestion
+from result_app.models import ReportJob
+from result_app import tasks
+from result_app.tasks import build_report
+from user_app.models import Profile
+
+
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+
+
+@pytest.mark.django_db
+class TestReportJobs:
+    def test_enqueue_creates_pending_job_and_schedules_task(self, api_client, authenticate, result_api, monkeypatch,
+                                                           django_capture_on_commit_callbacks):
+        owner = baker.make(Profile)
+        questionnaire = baker.make(Questionnaire, owner=owner)
+        scheduled = []
+        monkeypatch.setattr('result_app.views.build_report.delay', scheduled.append)
+        authenticate(owner)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            response = api_client.post(result_api(questionnaire.uuid, 'reports'),
+                                       {'report_type': 'csv', 'start_date': '2023-01-01'})
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert response.data['status'] == ReportJob.PENDING
+        assert response.data['filters'] == {'start_date': '2023-01-01'}
+        assert scheduled == [response.data['id']]
+
+    def test_if_dates_are_reversed_returns_400(self, api_client, authenticate, result_api):
+        owner = baker.make(Profile)
+        questionnaire = baker.make(Questionnaire, owner=owner)
+        authenticate(owner)
+
+        response = api_client.post(result_api(questionnaire.uuid, 'reports'),
+                                   {'report_type': 'csv', 'start_date': '2023-02-01', 'end_date': '2023-01-01'})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_built_report_can_be_downloaded(self, api_client, authenticate, result_api):
+        owner = baker.make(Profile)
+        questionnaire = baker.make(Questionnaire, owner=owner)
+        question = baker.make(TextAnswerQuestion, questionnaire=questionnaire, placement=1, title='نام')
+        answer_set = baker.make(AnswerSet, questionnaire=questionnaire)
+        baker.make(Answer, answer_set=answer_set, question=question, answer={'text_answer': 'سارا'})
+        job = baker.make(ReportJob, questionnaire=questionnaire, report_type=ReportJob.CSV)
+        authenticate(owner)
+
+        build_report(job.id)
+        poll = api_client.get(result_api(questionnaire.uuid, f'reports/{job.id}'))
+        download = api_client.get(result_api(questionnaire.uuid, f'reports/{job.id}/download'))
+
+        assert poll.data['status'] == ReportJob.DONE
+        assert poll.data['progress'] == 100
+        rows = list(csv.reader(io.StringIO(b''.join(download.streaming_content).decode('utf-8-sig'))))
+        assert rows[0][2:] == ['نام']
+        assert rows[1][2:] == ['سارا']
+
+    def test_if_report_is_not_ready_download_returns_400(self, api_client, authenticate, result_api):
+        owner = baker.make(Profile)
+        questionnaire = baker.make(Questionnaire, owner=owner)
+        job = baker.make(ReportJob, questionnaire=questionnaire)
+        authenticate(owner)
+
+        response = api_client.get(result_api(questionnaire.uuid, f'reports/{job.id}/download'))
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_failed_report_hides_the_exception(self, monkeypatch, caplog):
+        job = baker.make(ReportJob, questionnaire=baker.make(Questionnaire), report_type=ReportJob.CSV)
+
+        def broken(job, path):
+            raise OSError('/srv/media/reports: permission denied')
+
+        monkeypatch.setattr(tasks, 'write_report', broken)
+
+        assert build_report(job.id) == ReportJob.FAILED
+        job.refresh_from_db()
+        assert job.error == tasks.REPORT_FAILED_MESSAGE
+        assert 'permission denied' in caplog.text
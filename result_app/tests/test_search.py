@@ -0,0 +1,81 @@
+import pytest
+from django.core.management import call_command
+from model_bakery import baker
+from rest_framework import status
+
+from question_app.models import Questionnaire, AnswerSet, Answer, TextAnswerQuestion, IntegerRangeQuestion, \
+    OptionalQuestion
+from user_app.models import Profile
+
+
+@pytest.fixture
+def search(api_client, result_api):
+    def do_search(questionnaire, term):
+        return api_client.get(result_api(questionnaire.uuid, 'answer-sets/search'), {'search': term})
+
+    return do_search
+
+
+@pytest.mark.django_db
+class TestAnswerSearch:
+    def test_matches_text_and_option_answers(self, authenticate, search):
+        owner = baker.make(Profile)
+        questionnaire = baker.make(Questionnaire, owner=owner)
+        text_question = baker.make(TextAnswerQuestion, questionnaire=questionnaire)
+        optional_question = baker.make(OptionalQuestion, questionnaire=questionnaire)
+        first, second, third = baker.make(AnswerSet, questionnaire=questionnaire, _quantity=3)
+        baker.make(Answer, answer_set=first, question=text_question, answer={'text_answer': 'Hello Tehran'})
+        baker.make(Answer, answer_set=second, question=optional_question,
+                   answer={'selected_options': [{'id': 1, 'text': 'tehran university'}]})
+        baker.make(Answer, answer_set=third, question=text_question, answer={'text_answer': 'Shiraz'})
+        authenticate(owner)
+
+        response = search(questionnaire, 'Tehran')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['count'] == 2
+        assert {answer_set['id'] for answer_set in response.data['results']} == {first.id, second.id}
+
+    def test_matches_numbers_by_value(self, authenticate, search):
+        owner = baker.make(Profile)
+        questionnaire = baker.make(Questionnaire, owner=owner)
+        question = baker.make(IntegerRangeQuestion, questionnaire=questionnaire)
+        matching, other = baker.make(AnswerSet, questionnaire=questionnaire, _quantity=2)
+        baker.make(Answer, answer_set=matching, question=question, answer={'integer_range': 7})
+        baker.make(Answer, answer_set=other, question=question, answer={'integer_range': 17})
+        authenticate(owner)
+
+        response = search(questionnaire, '7')
+
+        assert [answer_set['id'] for answer_set in response.data['results']] == [matching.id]
+
+    def test_if_search_is_missing_returns_400(self, api_client, authenticate, result_api):
+        owner = baker.make(Profile)
+        questionnaire = baker.make(Questionnaire, owner=owner)
+        authenticate(owner)
+
+        response = api_client.get(result_api(questionnaire.uuid, 'answer-sets/search'))
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_rebuild_command_fills_search_columns(self):
+        question = baker.make(TextAnswerQuestion)
+        answer = baker.make(Answer, question=question, answer={'text_answer': 'Old Answer'})
+        Answer.objects.filter(id=answer.id).update(search_text='')
+
+        call_command('backfill_answer_columns')
+
+        answer.refresh_from_db()
+        assert answer.search_text == 'old answer'
+
+    def test_backfill_command_resumes_after_given_id(self):
+        question = baker.make(TextAnswerQuestion)
+        done, pending = baker.make(Answer, question=question, answer={'text_answer': 'Answer'}, _quantity=2)
+        Answer.objects.update(search_text='', text_value=None)
+
+        call_command('backfill_answer_columns', after_id=done.id, chunk_size=1)
+
+        done.refresh_from_db()
+        pending.refresh_from_db()
+        assert done.text_value is None
+        assert pending.text_value == 'Answer' and pending.search_text == 'answer'
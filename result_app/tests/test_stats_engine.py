@@ -0,0 +1,39 @@
+import statistics
+
+import numpy as np
+import pytest
+from model_bakery import baker
+
+from question_app.models import AnswerSet, Answer, NumberAnswerQuestion
+from result_app import stats_engine
+
+
+class TestDescribeValues:
+    def test_matches_statistics_module(self):
+        values = [2.5, 1, 7, 7, 3, 10, 4.25]
+
+        result = stats_engine.describe_values(np.array(values))
+
+        assert result['count'] == len(values)
+        assert result['average'] == pytest.approx(statistics.mean(values))
+        assert result['median'] == statistics.median(values)
+        assert result['variance'] == pytest.approx(statistics.variance(values))
+        assert result['standard_deviation'] == pytest.approx(statistics.stdev(values))
+        assert result['mode'] == 7
+        assert result['counts'] == {'1': 1, '2.5': 1, '3': 1, '4.25': 1, '7': 2, '10': 1}
+
+    def test_empty_values(self):
+        assert stats_engine.describe_values(np.array([])) is None
+
+
+@pytest.mark.django_db
+class TestLoadValues:
+    def test_skips_non_numeric_answers(self):
+        question = baker.make(NumberAnswerQuestion)
+        for body in [{'number_answer': 5}, {'number_answer': 1.5}, {'number_answer': 'x'}, {}, None]:
+            answer_set = baker.make(AnswerSet, questionnaire=question.questionnaire)
+            baker.make(Answer, answer_set=answer_set, question=question, answer=body)
+
+        values = stats_engine.load_values(question)
+
+        assert sorted(values.tolist()) == [1.5, 5.0]
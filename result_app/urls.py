@@ -3,9 +3,14 @@ from . import views
 
 
 urlpatterns = [
+    path('cache-statistics/', views.CacheStatisticsAPIView.as_view()),
     path('<str:questionnaire_uuid>/answer-sets/', views.AnswerSetViewSet.as_view({'get': 'list'})),
     path('<str:questionnaire_uuid>/answer-sets/<int:pk>/', views.AnswerSetViewSet.as_view({'get': 'retrieve'})),
     path('<str:questionnaire_uuid>/answer-sets/search/', views.AnswerSetViewSet.as_view({'get': 'search'})),
     path('<str:questionnaire_uuid>/plots/', views.PlotAPIView.as_view()),
+    path('<str:questionnaire_uuid>/crosstab/', views.CrosstabAPIView.as_view()),
     path('<str:questionnaire_uuid>/answer-sets/excel-data/', views.AnswerSetViewSet.as_view({'get': 'excel_data'})),
+    path('<str:questionnaire_uuid>/reports/', views.ReportJobViewSet.as_view({'get': 'list', 'post': 'create'})),
+    path('<str:questionnaire_uuid>/reports/<int:pk>/', views.ReportJobViewSet.as_view({'get': 'retrieve'})),
+    path('<str:questionnaire_uuid>/reports/<int:pk>/download/', views.ReportJobViewSet.as_view({'get': 'download'})),
 ]
@@ -1,18 +1,25 @@
-import statistics
-from collections import Counter
+import os
 
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Prefetch, Q
+from django.http import FileResponse, StreamingHttpResponse
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.generics import get_object_or_404
 from rest_framework.response import Response
+from rest_framework.permissions import IsAdminUser
 from rest_framework.views import APIView
-from question_app.models import AnswerSet, Questionnaire
+from question_app.models import AnswerSet, Question, Questionnaire
 from result_app.filtersets import AnswerSetFilterSet
-from result_app.serializers import AnswerSetSerializer
-from porsline_config.paginators import MainPagination
+from result_app.models import ReportJob
+from result_app.serializers import AnswerSetSerializer, ReportJobSerializer
+from result_app.tasks import build_report
+from porsline_config.paginators import MainPagination, AnswerSetPagination
 from .permissions import IsQuestionnaireOwner
-from .serializers import NumberQuestionPlotSerializer, ChoiceQuestionPlotSerializer
+from .serializers import NumberQuestionPlotSerializer, ChoiceQuestionPlotSerializer, SortQuestionPlotSerializer, \
+    CrosstabSerializer
+from . import caching, crosstabs, exports, rankings, rollups
 
 
 # Create your views here.
@@ -25,103 +32,39 @@ class AnswerSetViewSet(viewsets.ReadOnlyModelViewSet):
     permission_classes = [IsQuestionnaireOwner]
     filter_backends = (DjangoFilterBackend,)
     filterset_class = AnswerSetFilterSet
-    pagination_class = MainPagination
+    pagination_class = AnswerSetPagination
 
     @action(methods=['get'], detail=False, permission_classes=[IsQuestionnaireOwner],
             filter_backends=[DjangoFilterBackend], filterset_class=AnswerSetFilterSet)
     def excel_data(self, request, questionnaire_uuid):
-        queryset = self.filter_queryset(self.get_queryset())
-        serializer = AnswerSetSerializer(queryset, many=True, context={'questionnaire_uuid': questionnaire_uuid})
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        file_format = request.query_params.get('file_format', 'csv')
+        if file_format not in ('csv', 'xlsx'):
+            return Response({'message': 'فرمت فایل باید csv یا xlsx باشد'}, status=status.HTTP_400_BAD_REQUEST)
+        questionnaire = get_object_or_404(Questionnaire, uuid=questionnaire_uuid)
+        queryset = self.filter_queryset(
+            AnswerSet.objects.filter(questionnaire=questionnaire).order_by('answered_at', 'id'))
+        rows = exports.export_rows(exports.export_questions(questionnaire), queryset, self.answers())
+        if file_format == 'xlsx':
+            response = StreamingHttpResponse(
+                exports.xlsx_stream(rows),
+                content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+        else:
+            response = StreamingHttpResponse(exports.csv_stream(rows), content_type='text/csv; charset=utf-8')
+        response['Content-Disposition'] = f'attachment; filename="{questionnaire_uuid}.{file_format}"'
+        return response
+
     def search(self, request, questionnaire_uuid):
         search = request.query_params.get('search', None)
         if search is None:
             return Response({'message': 'لطفا عبارت سرچ را وارد کنید'}, status=status.HTTP_400_BAD_REQUEST)
-        result = []
-        questionnaire = Questionnaire.objects.get(uuid=questionnaire_uuid)
-        for answer_set in questionnaire.answer_sets.prefetch_related('answers', 'answers__question').all():
-            for answer in answer_set.answers.all():
-                question = answer.question
-                question_type = question.question_type
-                answer_set = answer.answer_set
-                answer_body = answer.answer
-                if answer_body:
-                    match question_type:
-                        case 'text_answer':
-                            look_up = answer_body.get('text_answer')
-                            if look_up:
-                                if search in look_up:
-                                    result.append(answer_set)
-                                    break
-                        case 'number_answer':
-                            look_up = answer_body.get('number_answer')
-                            if look_up:
-                                try:
-                                    if int(search) == look_up:
-                                        result.append(answer_set)
-                                        break
-                                except ValueError:
-                                    pass
-                        case 'integer_range':
-                            look_up = answer_body.get('integer_range')
-                            if look_up:
-                                try:
-                                    if int(search) == look_up:
-                                        result.append(answer_set)
-                                        break
-                                except ValueError:
-                                    pass
-                        case 'integer_selective':
-                            look_up = answer_body.get('integer_selective')
-                            if look_up:
-                                try:
-                                    if int(search) == look_up:
-                                        result.append(answer_set)
-                                        break
-                                except ValueError:
-                                    pass
-                        case 'email_field':
-                            look_up = answer_body.get('email_field')
-                            if look_up:
-                                if search in look_up:
-                                    result.append(answer_set)
-                                    break
-                        case 'link':
-                            look_up = answer_body.get('link')
-                            if look_up:
-                                if search in look_up:
-                                    result.append(answer_set)
-                                    break
-                        case 'optional':
-                            option_texts = [option.get('text') for option in answer_body.get('selected_options')]
-                            find = False
-                            for text in option_texts:
-                                if search in text:
-                                    find = True
-                                    break
-                            if find:
-                                result.append(answer_set)
-                                break
-                        case 'drop_down':
-                            option_texts = [option.get('text') for option in answer_body.get('selected_options')]
-                            find = False
-                            for text in option_texts:
-                                if search in text:
-                                    find = True
-                                    break
-                            if find:
-                                result.append(answer_set)
-                                break
-                        case 'sort':
-                            option_texts = [option.get('text') for option in answer_body.get('sorted_options')]
-                            find = False
-                            for text in option_texts:
-                                if search in text:
-                                    find = True
-                                    break
-                            if find:
-                                result.append(answer_set)
-                                break
+        term = search.strip().lower()
+        matches = Q(search_text__contains=term) if term else Q(pk__in=[])
+        try:
+            matches |= Q(numeric_value=float(search))
+        except ValueError:
+            pass
+        result = self.get_queryset().filter(
+            Exists(self.answers().filter(matches, answer_set=OuterRef('pk'))))
 
         page = self.paginate_queryset(result)
         if page is not None:
@@ -132,11 +75,24 @@ class AnswerSetViewSet(viewsets.ReadOnlyModelViewSet):
         # serializer = AnswerSetSerializer(result, many=True, context={'questionnaire_uuid': questionnaire_uuid})
         # return Response(serializer.data)
 
+    def list(self, request, *args, **kwargs):
+        data = caching.cached(self.kwargs['questionnaire_uuid'], 'answer-sets',
+                              lambda: super(AnswerSetViewSet, self).list(request, *args, **kwargs).data,
+                              params=request.query_params.urlencode())
+        return Response(data)
+
     def get_queryset(self):
-        queryset = AnswerSet.objects.prefetch_related('answers__question', 'answers').filter(
+        queryset = AnswerSet.objects.prefetch_related(Prefetch('answers', queryset=self.answers()),
+                                                      'answers__question').filter(
             questionnaire__uuid=self.kwargs['questionnaire_uuid']).order_by('answered_at')
         return queryset
 
+    def answers(self):
+        """
+            Answers bounded by the start_date of the request, so answer queries only scan the partitions it can match
+        """
+        return AnswerSetFilterSet(self.request.query_params, request=self.request).answers()
+
     def get_serializer_context(self):
         context = super().get_serializer_context()
         context.update({'questionnaire_uuid': self.kwargs.get('questionnaire_uuid')})
@@ -147,199 +103,123 @@ class PlotAPIView(APIView):
     permission_classes = [IsQuestionnaireOwner]
 
     def get(self, request, questionnaire_uuid, *args, **kwargs):
+        result = caching.cached(questionnaire_uuid, 'plots', lambda: self.plots(questionnaire_uuid))
+        return Response(result, status=status.HTTP_200_OK)
+
+    @staticmethod
+    def plots(questionnaire_uuid):
         questionnaire = get_object_or_404(Questionnaire, uuid=questionnaire_uuid)
         questions = questionnaire.questions.filter(
-            question_type__in=['integer_range', 'integer_selective', 'optional', 'drop_down', 'number_answer'])
-        if questions.exists():
-            answer_sets = questionnaire.answer_sets.prefetch_related('answers', 'answers__question').all()
-            if answer_sets.exists():
-                result = []
-                for question in questions:
-                    answers = question.answers.filter(answer_set__in=answer_sets)
-                    if answers.exists():
-                        match question.question_type:
-                            case 'integer_range':
-                                answer_list = [answer.answer.get('integer_range') for answer in answers if answer.answer is not None and (isinstance(answer.answer.get('integer_range'), int) or isinstance(answer.answer.get('integer_range'), float))]
-                                if len(answer_list) != 0:
-                                    if len(answer_list) > 1:
-                                        to_serializer = {
-                                            'question_id': question.id,
-                                            'question': question.title,
-                                            'question_type': question.question_type,
-                                            'group_id': question.group.id if question.group else None,
-                                            'group_title': question.group.title if question.group else None,
-                                            'max': question.integerrangequestion.max,
-                                            'average': sum(answer_list) / len(answer_list),
-                                            'minimum_answer': min(answer_list),
-                                            'maximum_answer': max(answer_list),
-                                            'count': len(answer_list),
-                                            'median': statistics.median(answer_list),
-                                            'variance': statistics.variance(answer_list),
-                                            'standard_deviation': statistics.stdev(answer_list),
-                                            'mode': statistics.mode(answer_list),
-                                            'counts': Counter(answer_list)
-                                        }
-                                    else:
-                                        to_serializer = {
-                                            'question_id': question.id,
-                                            'question': question.title,
-                                            'question_type': question.question_type,
-                                            'group_id': question.group.id if question.group else None,
-                                            'group_title': question.group.title if question.group else None,
-                                            'max': question.integerrangequestion.max,
-                                            'average': sum(answer_list) / len(answer_list),
-                                            'minimum_answer': min(answer_list),
-                                            'maximum_answer': max(answer_list),
-                                            'count': len(answer_list),
-                                            'median': statistics.median(answer_list),
-                                            'variance': 0,
-                                            'standard_deviation': 0,
-                                            'mode': statistics.mode(answer_list),
-                                            'counts': Counter(answer_list)
-                                        }
-                                    result.append(NumberQuestionPlotSerializer(to_serializer).data)
-                            case 'integer_selective':
-                                answer_list = [answer.answer.get('integer_selective') for answer in answers if answer.answer is not None and (isinstance(answer.answer.get('integer_selective'), int) or isinstance(answer.answer.get('integer_selective'), float))]
-                                if len(answer_list) != 0:
-                                    if len(answer_list) > 1:
-                                        to_serializer = {
-                                            'question_id': question.id,
-                                            'question': question.title,
-                                            'question_type': question.question_type,
-                                            'group_id': question.group.id if question.group else None,
-                                            'group_title': question.group.title if question.group else None,
-                                            'max': question.integerselectivequestion.max,
-                                            'average': sum(answer_list) / len(answer_list),
-                                            'minimum_answer': min(answer_list),
-                                            'maximum_answer': max(answer_list),
-                                            'count': len(answer_list),
-                                            'median': statistics.median(answer_list),
-                                            'variance': statistics.variance(answer_list),
-                                            'standard_deviation': statistics.stdev(answer_list),
-                                            'mode': statistics.mode(answer_list),
-                                            'counts': Counter(answer_list)
-                                        }
-                                    else:
-                                        to_serializer = {
-                                            'question_id': question.id,
-                                            'question': question.title,
-                                            'question_type': question.question_type,
-                                            'group_id': question.group.id if question.group else None,
-                                            'group_title': question.group.title if question.group else None,
-                                            'max': question.integerselectivequestion.max,
-                                            'average': sum(answer_list) / len(answer_list),
-                                            'minimum_answer': min(answer_list),
-                                            'maximum_answer': max(answer_list),
-                                            'count': len(answer_list),
-                                            'median': statistics.median(answer_list),
-                                            'variance': 0,
-                                            'standard_deviation': 0,
-                                            'mode': statistics.mode(answer_list),
-                                            'counts': Counter(answer_list)
-                                        }
-                                    result.append(NumberQuestionPlotSerializer(to_serializer,
-                                                                               context={'integer_selective': True,
-                                                                                        'shape': question.integerselectivequestion.shape}).data)
-                            # AVG
-                            case 'number_answer':
-                                answer_list = [answer.answer.get('number_answer') for answer in answers if answer.answer is not None and (isinstance(answer.answer.get('number_answer'), int) or isinstance(answer.answer.get('number_answer'), float))]
-                                if len(answer_list) != 0:
-                                    if len(answer_list) > 1:
-                                        to_serializer = {
-                                            'question_id': question.id,
-                                            'question': question.title,
-                                            'question_type': question.question_type,
-                                            'group_id': question.group.id if question.group else None,
-                                            'group_title': question.group.title if question.group else None,
-                                            'max': question.numberanswerquestion.max,
-                                            'average': sum(answer_list) / len(answer_list),
-                                            'minimum_answer': min(answer_list),
-                                            'maximum_answer': max(answer_list),
-                                            'count': len(answer_list),
-                                            'median': statistics.median(answer_list),
-                                            'variance': statistics.variance(answer_list),
-                                            'standard_deviation': statistics.stdev(answer_list),
-                                            'mode': statistics.mode(answer_list),
-                                            'counts': Counter(answer_list)
-                                        }
-                                    else:
-                                        to_serializer = {
-                                            'question_id': question.id,
-                                            'question': question.title,
-                                            'question_type': question.question_type,
-                                            'group_id': question.group.id if question.group else None,
-                                            'group_title': question.group.title if question.group else None,
-                                            'max': question.numberanswerquestion.max,
-                                            'average': sum(answer_list) / len(answer_list),
-                                            'minimum_answer': min(answer_list),
-                                            'maximum_answer': max(answer_list),
-                                            'count': len(answer_list),
-                                            'median': statistics.median(answer_list),
-                                            'variance': 0,
-                                            'standard_deviation': 0,
-                                            'mode': statistics.mode(answer_list),
-                                            'counts': Counter(answer_list)
-                                        }
-                                    result.append(NumberQuestionPlotSerializer(to_serializer).data)
-                            # PERCENT
-                            case 'optional':
-                                question = question.optionalquestion
-                                options = question.options.all()
-                                option_ids = [option.id for option in options]
-                                options_json = [{'id': option.id, 'text': option.text} for option in options]
-                                options_count = {option_id: 0 for option_id in option_ids}
-                                option_percent = {option_id: 0 for option_id in option_ids}
-                                for answer in answers:
-                                    if answer.answer:
-                                        answer_body = answer.answer.get('selected_options')
-                                        for option in answer_body:
-                                            if option.get('id') in option_ids:
-                                                options_count[option.get('id')] += 1
-                                total = sum(options_count.values()) if sum(options_count.values()) != 0 else 1
-                                for option_id, count in options_count.items():
-                                    option_percent[option_id] = count / total * 100
-                                to_serializer = {
-                                    'question_id': question.id,
-                                    'question': question.title,
-                                    'question_type': question.question_type,
-                                    'group_id': question.group.id if question.group else None,
-                                    'group_title': question.group.title if question.group else None,
-                                    'options': options_json,
-                                    'counts': options_count,
-                                    'percentages': option_percent
-                                }
-                                result.append(ChoiceQuestionPlotSerializer(to_serializer).data)
-                            # PERCENT
-                            case 'drop_down':
-                                question = question.dropdownquestion
-                                options = question.options.all()
-                                option_ids = [option.id for option in options]
-                                options_json = [{'id': option.id, 'text': option.text} for option in options]
-                                options_count = {option_id: 0 for option_id in option_ids}
-                                option_percent = {option_id: 0 for option_id in option_ids}
-                                for answer in answers:
-                                    if answer.answer:
-                                        answer_body = answer.answer.get('selected_options')
-                                        for option in answer_body:
-                                            if option.get('id') in option_ids:
-                                                options_count[option.get('id')] += 1
-                                total = sum(options_count.values()) if sum(options_count.values()) != 0 else 1
-                                for option_id, count in options_count.items():
-                                    option_percent[option_id] = count / total * 100
-                                to_serializer = {
-                                    'question_id': question.id,
-                                    'question': question.title,
-                                    'question_type': question.question_type,
-                                    'group_id': question.group.id if question.group else None,
-                                    'group_title': question.group.title if question.group else None,
-                                    'options': options_json,
-                                    'counts': options_count,
-                                    'percentages': option_percent
-                                }
-                                result.append(ChoiceQuestionPlotSerializer(to_serializer).data)
-                return Response(result, status=status.HTTP_200_OK)
-            else:
-                return Response([], status=status.HTTP_200_OK)
-        else:
-            return Response([],
-                            status=status.HTTP_200_OK)
+            Q(question_type__in=rollups.PLOT_QUESTIONS, aggregate__count__gt=0) | Q(question_type='sort')
+        ).select_related(
+            'group', 'aggregate', 'integerrangequestion', 'integerselectivequestion', 'numberanswerquestion',
+            'optionalquestion', 'dropdownquestion', 'sortquestion').prefetch_related(
+            'optionalquestion__options', 'dropdownquestion__options', 'sortquestion__options')
+        result = []
+        for question in questions:
+            to_serializer = {
+                'question_id': question.id,
+                'question': question.title,
+                'question_type': question.question_type,
+                'group_id': question.group.id if question.group else None,
+                'group_title': question.group.title if question.group else None,
+            }
+            match question.question_type:
+                case 'integer_range':
+                    to_serializer['max'] = question.integerrangequestion.max
+                    to_serializer.update(rollups.number_statistics(question.aggregate))
+                    result.append(NumberQuestionPlotSerializer(to_serializer).data)
+                case 'integer_selective':
+                    to_serializer['max'] = question.integerselectivequestion.max
+                    to_serializer.update(rollups.number_statistics(question.aggregate))
+                    result.append(NumberQuestionPlotSerializer(to_serializer,
+                                                               context={'integer_selective': True,
+                                                                        'shape': question.integerselectivequestion.shape}).data)
+                case 'number_answer':
+                    to_serializer['max'] = question.numberanswerquestion.max
+                    to_serializer.update(rollups.number_statistics(question.aggregate))
+                    result.append(NumberQuestionPlotSerializer(to_serializer).data)
+                case 'optional':
+                    options = question.optionalquestion.options.all()
+                    to_serializer.update(rollups.choice_statistics(question.aggregate, options))
+                    result.append(ChoiceQuestionPlotSerializer(to_serializer).data)
+                case 'drop_down':
+                    options = question.dropdownquestion.options.all()
+                    to_serializer.update(rollups.choice_statistics(question.aggregate, options))
+                    result.append(ChoiceQuestionPlotSerializer(to_serializer).data)
+                case 'sort':
+                    to_serializer.update(rankings.sort_statistics(question, question.sortquestion.options.all()))
+                    if to_serializer['count']:
+                        result.append(SortQuestionPlotSerializer(to_serializer).data)
+        return result
+
+
+class CrosstabAPIView(APIView):
+    permission_classes = [IsQuestionnaireOwner]
+
+    def get(self, request, questionnaire_uuid, *args, **kwargs):
+        try:
+            row_id = int(request.query_params.get('row'))
+            column_id = int(request.query_params.get('column'))
+            row_bins = int(request.query_params.get('row_bins', crosstabs.DEFAULT_BINS))
+            column_bins = int(request.query_params.get('column_bins', crosstabs.DEFAULT_BINS))
+        except (TypeError, ValueError):
+            return Response({'message': 'شناسه سوال سطر و ستون را به درستی وارد کنید'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if row_id == column_id:
+            return Response({'message': 'سوال سطر و ستون باید متفاوت باشند'}, status=status.HTTP_400_BAD_REQUEST)
+        if not (1 <= row_bins <= crosstabs.MAX_BINS and 1 <= column_bins <= crosstabs.MAX_BINS):
+            return Response({'message': f'تعداد بازه ها باید بین ۱ و {crosstabs.MAX_BINS} باشد'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        questions = Question.objects.filter(
+            questionnaire__uuid=questionnaire_uuid, id__in=[row_id, column_id],
+            question_type__in=crosstabs.CROSSTAB_QUESTIONS).select_related(
+            'aggregate', 'optionalquestion', 'dropdownquestion').prefetch_related(
+            'optionalquestion__options', 'dropdownquestion__options').in_bulk()
+        if row_id not in questions or column_id not in questions:
+            return Response({'message': 'سوال ها باید چند گزینه ای یا عددی و متعلق به این پرسشنامه باشند'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        def compute():
+            row_question, column_question = questions[row_id], questions[column_id]
+            result = crosstabs.crosstab(row_question, column_question, row_bins, column_bins)
+            result['row_question'] = {'id': row_question.id, 'title': row_question.title,
+                                      'question_type': row_question.question_type}
+            result['column_question'] = {'id': column_question.id, 'title': column_question.title,
+                                         'question_type': column_question.question_type}
+            return CrosstabSerializer(result).data
+
+        result = caching.cached(questionnaire_uuid, 'crosstab', compute,
+                                params=f'{row_id}:{column_id}:{row_bins}:{column_bins}')
+        return Response(result, status=status.HTTP_200_OK)
+
+
+class CacheStatisticsAPIView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        return Response(caching.statistics(), status=status.HTTP_200_OK)
+
+
+class ReportJobViewSet(viewsets.mixins.CreateModelMixin,
+                       viewsets.mixins.RetrieveModelMixin,
+                       viewsets.mixins.ListModelMixin,
+                       viewsets.GenericViewSet):
+    serializer_class = ReportJobSerializer
+    permission_classes = [IsQuestionnaireOwner]
+    pagination_class = MainPagination
+
+    def get_queryset(self):
+        return ReportJob.objects.filter(questionnaire__uuid=self.kwargs['questionnaire_uuid']).order_by('-created_at')
+
+    def perform_create(self, serializer):
+        questionnaire = get_object_or_404(Questionnaire, uuid=self.kwargs['questionnaire_uuid'])
+        job = serializer.save(questionnaire=questionnaire, requested_by=self.request.user.profile)
+        transaction.on_commit(lambda: build_report.delay(job.id))
+
+    @action(methods=['get'], detail=True)
+    def download(self, request, questionnaire_uuid, pk):
+        job = self.get_object()
+        if job.status != ReportJob.DONE:
+            return Response({'message': 'گزارش هنوز آماده نشده است'}, status=status.HTTP_400_BAD_REQUEST)
+        return FileResponse(job.file.open('rb'), as_attachment=True, filename=os.path.basename(job.file.name))
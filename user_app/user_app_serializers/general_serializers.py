@@ -15,7 +15,8 @@ class FolderSerializer(serializers.ModelSerializer):
         is_interview = self.context.get('is_interview')
         print(self.context)
         return general_serializers.NoQuestionQuestionnaireSerializer(
-            instance.questionnaires.filter(is_delete=False, interview__isnull=not is_interview),
+            instance.questionnaires.filter(is_delete=False, interview__isnull=not is_interview).select_related(
+                'interview'),
             many=True, read_only=True, context=self.context).data
 
     def validate(self, data):
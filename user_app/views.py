@@ -12,7 +12,6 @@ from rest_framework_simplejwt.token_blacklist.models import OutstandingToken, Bl
 from rest_framework_simplejwt.tokens import RefreshToken
 
 from porsline_config import settings
-from question_app.models import AnswerSet
 from user_app.user_app_serializers.authentication_serializers import GateWaySerializer, OTPCheckSerializer, \
     RefreshTokenSerializer
 from user_app.user_app_serializers.general_serializers import FolderSerializer, ProfileSerializer, \
@@ -41,7 +40,6 @@ class UserViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=['get', 'patch'], permission_classes=[permissions.IsAuthenticated])
     def me(self, request):
-        AnswerSet.objects.filter(answers__isnull=True).delete()
         if request.method == 'GET':
             serializer = ProfileSerializer(
                 Profile.objects.prefetch_related('preferred_districts', 'preferred_districts__city', 'preferred_districts__city__province', 'preferred_districts__city__province__country', 'resume__skills',